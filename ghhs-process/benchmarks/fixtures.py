@@ -0,0 +1,121 @@
+"""Синтетические таблицы процессов для бенчмарков"""
+import os
+import random
+from types import SimpleNamespace
+
+NAMES = ['python3', 'nginx', 'php-fpm', 'gunicorn', 'chrome', 'postgres', 'bash', 'sshd',
+         'systemd', 'kworker/0:1', 'node', 'java', 'redis-server', 'containerd-shim']
+USERS = ['root', 'www-data', 'postgres', 'nobody', 'deploy']
+STATUSES = ['sleeping', 'sleeping', 'sleeping', 'running', 'idle', 'disk-sleep']
+BOOT_TIME = 1700000000.0
+
+
+def make_processes(count, seed=0):
+    """{(pid, create_time): proc} с правдоподобным распределением имен и нагрузки"""
+    rng = random.Random(seed)
+    names = NAMES + [f"worker-{i}" for i in range(max(1, count // 50))]
+    processes = {}
+    for pid in range(1, count + 1):
+        create_time = BOOT_TIME + pid
+        processes[(pid, create_time)] = {
+            'pid': pid,
+            # Родитель - один из ранее запущенных: дерево глубиной в несколько уровней
+            'ppid': rng.randint(max(1, pid // 8), pid - 1) if pid > 1 else 0,
+            'name': rng.choice(names),
+            'cpu': round(rng.expovariate(1.0), 1),
+            'memory': rng.lognormvariate(3, 1.5),
+            'io_read': 0.0,
+            'io_write': 0.0,
+            'uss': 0.0,
+            'pss': 0.0,
+            'swap': 0.0,
+            'threads': rng.randint(1, 64),
+            'user': rng.choice(USERS),
+            'status': rng.choice(STATUSES),
+            'create_time': create_time
+        }
+    return processes
+
+
+def mutate(processes, changed=0.05, churn=0.01, seed=1):
+    """Следующее поколение: часть процессов меняет CPU/RSS, часть завершается и стартует"""
+    rng = random.Random(seed)
+    current = dict(processes)
+    keys = list(current)
+    for key in rng.sample(keys, int(len(keys) * changed)):
+        current[key] = dict(current[key], cpu=round(rng.expovariate(0.2), 1),
+                            memory=current[key]['memory'] * rng.uniform(0.9, 1.1))
+    next_pid = max(pid for pid, _ in keys) + 1
+    for key in rng.sample(keys, int(len(keys) * churn)):
+        proc = current.pop(key)
+        new_key = (next_pid, BOOT_TIME + next_pid)
+        current[new_key] = dict(proc, pid=next_pid, create_time=new_key[1], cpu=0.0)
+        next_pid += 1
+    return current
+
+
+class FakePsutil:
+    """Подменяет модуль psutil для PsutilBackend: process_iter по синтетической таблице"""
+
+    class NoSuchProcess(Exception):
+        pass
+
+    class AccessDenied(Exception):
+        pass
+
+    def __init__(self, processes):
+        self.processes = processes
+
+    def process_iter(self, attrs=None):
+        for proc in self.processes.values():
+            info = {
+                'pid': proc['pid'], 'ppid': proc['ppid'], 'name': proc['name'],
+                'cpu_times': SimpleNamespace(user=proc['cpu'], system=0.0),
+                'memory_info': SimpleNamespace(rss=int(proc['memory'] * 1024 * 1024)),
+                'num_threads': proc['threads'], 'status': proc['status'],
+                'create_time': proc['create_time'], 'username': proc['user'],
+            }
+            yield SimpleNamespace(info=info, username=lambda user=proc['user']: user)
+
+    def boot_time(self):
+        return BOOT_TIME
+
+
+# Статус psutil -> код состояния в /proc/<pid>/stat
+STATE_CODES = {'running': 'R', 'sleeping': 'S', 'disk-sleep': 'D', 'idle': 'I'}
+
+
+def make_procfs(root, processes, clock_ticks=None, page_size=None):
+    """Пишет /proc-подобное дерево для ProcfsBackend(procfs=root) и psutil.PROCFS_PATH = root.
+
+    Пишутся stat, status, statm и cmdline процессов и общий stat с btime,
+    поэтому оба бэкенда читают одни и те же данные. Пользователи задаются
+    uid по номеру в USERS и разрешаются через системный pwd.
+    """
+    clock_ticks = clock_ticks or os.sysconf('SC_CLK_TCK')
+    page_size = page_size or os.sysconf('SC_PAGE_SIZE')
+    os.makedirs(root, exist_ok=True)
+    with open(os.path.join(root, 'stat'), 'w') as f:
+        f.write(f"cpu  0 0 0 0 0 0 0 0 0 0\nbtime {int(BOOT_TIME)}\n")
+    uids = {user: uid for uid, user in enumerate(USERS)}
+    for proc in processes.values():
+        directory = os.path.join(root, str(proc['pid']))
+        os.makedirs(directory, exist_ok=True)
+        start = int(round((proc['create_time'] - BOOT_TIME) * clock_ticks))
+        rss_pages = int(proc['memory'] * 1024 * 1024 / page_size)
+        utime = int(round(proc['cpu'] * clock_ticks))
+        state = STATE_CODES.get(proc['status'], 'S')
+        fields = [state, str(proc['ppid']), '1', '1', '0', '-1', '4194560', '0', '0', '0', '0',
+                  str(utime), '0', '0', '0', '20', '0', str(proc['threads']), '0', str(start),
+                  str(rss_pages * page_size * 4), str(rss_pages)] + ['0'] * 30
+        with open(os.path.join(directory, 'stat'), 'w') as f:
+            f.write(f"{proc['pid']} ({proc['name'][:15]}) {' '.join(fields)}\n")
+        uid = uids[proc['user']]
+        with open(os.path.join(directory, 'status'), 'w') as f:
+            f.write(f"Name:\t{proc['name'][:15]}\nState:\t{state}\nPid:\t{proc['pid']}\n"
+                    f"Uid:\t{uid}\t{uid}\t{uid}\t{uid}\nGid:\t0\t0\t0\t0\n"
+                    f"Threads:\t{proc['threads']}\n")
+        with open(os.path.join(directory, 'statm'), 'w') as f:
+            f.write(f"{rss_pages * 4} {rss_pages} 0 0 0 0 0\n")
+        with open(os.path.join(directory, 'cmdline'), 'w') as f:
+            f.write(f"/usr/bin/{proc['name']}\0--fixture\0")
@@ -0,0 +1,86 @@
+"""Сверка ProcfsBackend с psutil и стоимость одного прохода каждого бэкенда.
+
+    python -m benchmarks.parity                        # 1k/5k/20k процессов
+    python -m benchmarks.parity --sizes 1000 --live    # плюс сверка на текущей системе
+
+Оба бэкенда читают одно синтетическое дерево: ProcfsBackend(procfs=root) и
+настоящий psutil с PROCFS_PATH = root, поэтому поля должны совпадать точно.
+Код возврата 1 - есть расхождения. Только Linux.
+"""
+import argparse
+import sys
+import tempfile
+
+import psutil
+
+from benchmarks.fixtures import make_procfs, make_processes
+from benchmarks.run import Suite
+from core.backends import PARITY_FIELDS, ProcfsBackend, PsutilBackend, compare_backends
+
+DEFAULT_SIZES = (1000, 5000, 20000)
+SHOWN_MISMATCHES = 10
+
+
+def check_size(suite, size):
+    """Сверка и замеры на синтетическом /proc из size процессов; возвращает число расхождений"""
+    with tempfile.TemporaryDirectory(prefix="ghhs-procfs-") as root:
+        make_procfs(root, make_processes(size))
+        original = psutil.PROCFS_PATH
+        psutil.PROCFS_PATH = root
+        # process_iter кеширует Process, а тот запоминает путь /proc при создании
+        clear_cache = getattr(psutil.process_iter, 'cache_clear', None)
+        if clear_cache is not None:
+            clear_cache()
+        try:
+            # boot_time бэкенд берет из psutil - уже из синтетического /proc/stat
+            native = ProcfsBackend(procfs=root)
+            reference = PsutilBackend()
+            mismatches = compare_backends(native, reference, PARITY_FIELDS + ('create_time',),
+                                          strict=True)
+            suite.bench('parity.procfs', size, native.collect)
+            suite.bench('parity.psutil', size, reference.collect)
+        finally:
+            psutil.PROCFS_PATH = original
+    for problem in mismatches[:SHOWN_MISMATCHES]:
+        print("  расхождение:", *problem)
+    if len(mismatches) > SHOWN_MISMATCHES:
+        print(f"  ... и еще {len(mismatches) - SHOWN_MISMATCHES}")
+    return len(mismatches)
+
+
+def check_live():
+    """Сверка на текущей системе: гонки между проходами возможны, поэтому только отчет"""
+    mismatches = compare_backends(ProcfsBackend(), PsutilBackend(), ('ppid', 'name', 'user'))
+    print(f"Текущая система: {len(mismatches)} расхождений в ppid/name/user")
+    for problem in mismatches[:SHOWN_MISMATCHES]:
+        print("  расхождение:", *problem)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Сверка ProcfsBackend с psutil")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--live", action="store_true", help="также сверить на текущей системе")
+    args = parser.parse_args(argv)
+    if not sys.platform.startswith('linux'):
+        print("ProcfsBackend есть только на Linux", file=sys.stderr)
+        return 0
+
+    suite = Suite(args.repeat)
+    failures = 0
+    for size in (int(s) for s in args.sizes.split(",")):
+        failures += check_size(suite, size)
+    if args.live:
+        check_live()
+
+    medians = {(r['name'], r['size']): r['median_ms'] for r in suite.results}
+    print("\nРазмер     procfs, ms   psutil, ms   быстрее")
+    for size in sorted({size for _, size in medians}):
+        native, reference = medians[('parity.procfs', size)], medians[('parity.psutil', size)]
+        print(f"{size:>6}   {native:11.1f}  {reference:11.1f}   x{reference / native:.1f}")
+    print(f"\nРасхождений: {failures}")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
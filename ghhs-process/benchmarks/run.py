@@ -0,0 +1,248 @@
+"""Бенчмарки горячих путей: сбор, дельты, сортировка, фильтр, отрисовка таблицы.
+
+    python -m benchmarks.run                              # все размеры, вывод в консоль
+    python -m benchmarks.run --sizes 1000,10000 --output bench.json
+    python -m benchmarks.run --compare old.json --output new.json
+    xvfb-run python -m benchmarks.run                     # с замерами отрисовки Tk
+
+Запускается из каталога ghhs-process. Без дисплея бенчмарки отрисовки пропускаются.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.fixtures import FakePsutil, make_procfs, make_processes, mutate
+import core.backends
+from core.backends import ProcfsBackend, PsutilBackend
+from core.alerts import AlertEngine, parse_rule
+from core.process_info import ProcessSnapshot, diff_snapshots
+from core.process_tree import ProcessTree
+from core.search import ProcessSearch
+from core.sorting import SortEngine
+
+DEFAULT_SIZES = (100, 1000, 10000, 50000)
+QUERIES = ('python', 'user:www-data', 'cpu>2 name~^php', 'threads>=32 mem>100')
+# Правила оповещений: набор повторяется до ALERT_RULES штук
+RULES = ('name~^python cpu>90 for 30s', 'name:java memory+>1024/5m', 'threads>=60 cpu>3',
+         'user:www-data status:running', 'memory+>100/1m')
+ALERT_RULES = 50
+
+
+def measure(function, repeat):
+    """Время одного вызова в секундах по repeat запускам (после прогрева)"""
+    function()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def measure_apply(structure, delta, backward, repeat):
+    """Время structure.apply(delta) на готовой структуре; возврат обратной дельтой вне замера"""
+    structure.apply(delta)
+    structure.apply(backward)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        structure.apply(delta)
+        timings.append(time.perf_counter() - started)
+        structure.apply(backward)
+    return timings
+
+
+class Suite:
+    def __init__(self, repeat):
+        self.repeat = repeat
+        self.results = []
+
+    def bench(self, name, size, function, repeat=None):
+        self.record(name, size, measure(function, repeat or self.repeat))
+
+    def record(self, name, size, timings):
+        result = {
+            'name': name, 'size': size,
+            'min_ms': min(timings) * 1000,
+            'median_ms': statistics.median(timings) * 1000,
+            'mean_ms': statistics.fmean(timings) * 1000,
+            'repeat': len(timings),
+        }
+        self.results.append(result)
+        print(f"{name:<28} {size:>7}  median {result['median_ms']:9.3f} ms  min {result['min_ms']:9.3f} ms",
+              flush=True)
+
+
+def bench_collection(suite, size, processes, procfs_limit):
+    backend = PsutilBackend()
+    original = core.backends.psutil
+    core.backends.psutil = FakePsutil(processes)
+    try:
+        suite.bench('collect.psutil_fake', size, backend.collect)
+    finally:
+        core.backends.psutil = original
+
+    if size <= procfs_limit and sys.platform.startswith('linux'):
+        with tempfile.TemporaryDirectory() as root:
+            make_procfs(root, processes)
+            suite.bench('collect.procfs_fake', size, ProcfsBackend(procfs=root).collect,
+                        repeat=max(3, suite.repeat // 3))
+
+
+def bench_core(suite, size, processes, following):
+    delta = diff_snapshots(processes, following)
+    suite.bench('diff', size, lambda: diff_snapshots(processes, following))
+    suite.bench('snapshot.build', size, lambda: ProcessSnapshot.from_processes(following))
+    previous = ProcessSnapshot.from_processes(processes)
+    previous.positions()
+    suite.bench('snapshot.apply_delta', size, lambda: previous.apply_delta(delta))
+
+    snapshot = ProcessSnapshot.from_processes(following)
+    for column in ('cpu', 'name'):
+        suite.bench(f'sort.argsort.{column}', size,
+                    lambda column=column: snapshot.argsort(column, reverse=True))
+
+    engine = SortEngine('cpu', reverse=True)
+    suite.bench('sort.engine.rebuild', size, lambda: engine.rebuild(processes))
+
+    # Дельта туда и обратно возвращает индексы в исходное состояние - замер без rebuild
+    backward = diff_snapshots(following, processes)
+    engine.rebuild(processes)
+    suite.record('sort.engine.apply_delta', size, measure_apply(engine, delta, backward, suite.repeat))
+    engine.apply(delta)
+    suite.bench('sort.engine.order', size, lambda: engine.order(snapshot))
+    suite.bench('sort.top50', size, lambda: engine.top(snapshot, 50))
+
+    tree = ProcessTree()
+    suite.bench('tree.rebuild', size, lambda: tree.rebuild(processes))
+
+    def tree_roundtrip():
+        tree.apply(delta)
+        tree.apply(backward)
+    suite.record('tree.apply_delta', size, [t / 2 for t in measure(tree_roundtrip, suite.repeat)])
+    tree.apply(delta)
+    suite.bench('tree.flatten', size, lambda: tree.flatten())
+
+    search = ProcessSearch()
+    search.index.rebuild(following)
+    for query in QUERIES:
+        def run_query(query=query):
+            search._result = (None, None, None)  # Без кеша результата
+            search.filter(query, snapshot)
+        suite.bench(f'filter[{query}]', size, run_query)
+
+    alerts = AlertEngine([parse_rule(f"rule{i}: {RULES[i % len(RULES)]} => highlight")
+                          for i in range(ALERT_RULES)])
+    previous = ProcessSnapshot.from_processes(processes, snapshot.strings)
+    alerts.evaluate(0.0, previous)
+    clock = iter(range(1, 1 << 30))
+    suite.bench(f'alerts.evaluate[{ALERT_RULES}]', size,
+                lambda: alerts.evaluate(float(next(clock)), snapshot, delta))
+    return snapshot, engine
+
+
+def bench_render(suite, size, snapshot, engine):
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        print(f"render: пропущено ({e})")
+        return False
+    from ui.process_table import ProcessTable, PROCESS_COLUMNS
+
+    root.geometry("1000x800")
+    table = ProcessTable(root, PROCESS_COLUMNS)
+    table.pack(fill=tk.BOTH, expand=True)
+    root.update()
+    view = snapshot.view(engine.order(snapshot))
+
+    def refresh():
+        table.set_rows(view)
+        table.redraw()
+        root.update_idletasks()
+
+    def scroll():
+        table.scroll_by(1 if table.first < len(view) - table.visible_count() else -table.first)
+        table.redraw()
+        root.update_idletasks()
+
+    suite.bench('render.refresh', size, refresh)
+    suite.bench('render.scroll', size, scroll)
+    root.destroy()
+    return True
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline_path, threshold):
+    """Печатает изменения относительно прошлого JSON; возвращает число регрессий"""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = {(r['name'], r['size']): r for r in json.load(f)['results']}
+    regressions = 0
+    print(f"\nСравнение с {baseline_path}:")
+    for result in results:
+        old = baseline.get((result['name'], result['size']))
+        if not old or not old['median_ms']:
+            continue
+        ratio = result['median_ms'] / old['median_ms']
+        mark = ''
+        if ratio > 1 + threshold:
+            mark = '  <-- регрессия'
+            regressions += 1
+        print(f"{result['name']:<28} {result['size']:>7}  x{ratio:5.2f}{mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Бенчмарки GHHS Process")
+    parser.add_argument("--sizes", default=",".join(map(str, DEFAULT_SIZES)))
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--procfs-limit", type=int, default=10000,
+                        help="максимальный размер синтетического /proc (файлы создаются на диске)")
+    parser.add_argument("--no-render", action="store_true", help="не запускать замеры Tk")
+    parser.add_argument("--output", "-o", help="сохранить результаты в JSON")
+    parser.add_argument("--compare", help="JSON прошлого прогона для сравнения")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="допустимое замедление при сравнении (0.2 = 20%%)")
+    args = parser.parse_args(argv)
+
+    suite = Suite(args.repeat)
+    render = not args.no_render
+    for size in (int(s) for s in args.sizes.split(",")):
+        processes = make_processes(size)
+        following = mutate(processes)
+        bench_collection(suite, size, processes, args.procfs_limit)
+        snapshot, engine = bench_core(suite, size, processes, following)
+        if render:
+            render = bench_render(suite, size, snapshot, engine)
+
+    report = {
+        'meta': {
+            'commit': git_commit(), 'timestamp': time.time(),
+            'python': platform.python_version(), 'platform': platform.platform(),
+            'cpu_count': os.cpu_count(), 'repeat': args.repeat,
+        },
+        'results': suite.results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+    if args.compare:
+        return 1 if compare(suite.results, args.compare, args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
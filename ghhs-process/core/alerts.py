@@ -0,0 +1,557 @@
+"""Правила оповещений, проверяемые на каждом снимке процессов.
+
+Файл правил - по одному правилу в строке, # - комментарий:
+    hot-python: name~^python cpu>90 for 30s
+    java-leak:  name:java memory+>1024/5m => log; exec notify-send GHHS "$GHHS_ALERT_MESSAGE"
+    zombie:     status:zombie => highlight; webhook http://127.0.0.1:9000/alerts
+
+Условие - язык фильтра из core.search (условия через И) плюс:
+    for 30s           условие должно держаться заданное время (s, m, h)
+    поле+>N/окно      рост колонки больше N за окно: memory+>1024/5m - RSS +1 ГБ за 5 минут
+После => перечисляются действия через ';': highlight (подсветка строки в
+таблице), log (строка в журнал), exec <команда>, webhook <url>. По умолчанию
+highlight и log. Правило срабатывает один раз на процесс и снова взводится,
+когда условие перестает выполняться.
+
+Правила разбираются один раз. Числовые условия проверяются бинарным поиском
+по отсортированной колонке, строковые - по уникальным строкам таблицы имен;
+сортировки и обратные индексы строятся один раз на снимок и общие для всех
+правил. Состояние окон ограничено: фиксированное число корзин на процесс и
+не больше MAX_TRACKED процессов на правило; при переполнении вытесняются
+дольше всех не обновлявшиеся окна. Окна правила роста засеваются со всего
+снимка на первой проверке, дальше обновляются по дельте.
+"""
+import json
+import os
+import re
+import subprocess
+import urllib.request
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+from core.process_info import TRACKED_FIELDS
+from core.search import NUMERIC_FIELDS, TERM_RE, parse_query
+
+DEFAULT_ACTIONS = ('highlight', 'log')
+ACTIONS = ('highlight', 'log', 'exec', 'webhook')
+DEFAULT_LOG = 'ghhs-alerts.log'
+MAX_TRACKED = 4096      # Процессов в состоянии одного правила
+GROWTH_SLOTS = 10       # Корзин минимума на окно роста
+ACTION_TIMEOUT = 10.0   # Секунд на команду или webhook
+
+DURATION_RE = re.compile(r'^(\d+(?:\.\d+)?)([smh]?)$')
+GROWTH_RE = re.compile(r'^(\w+)\+>(\d+(?:\.\d+)?)/(\S+)$')
+UNITS = {'': 1, 's': 1, 'm': 60, 'h': 3600}
+
+AlertEvent = namedtuple('AlertEvent', ['timestamp', 'rule', 'key', 'name', 'value', 'message'])
+
+
+class RuleError(ValueError):
+    """Ошибка разбора правила оповещения"""
+
+
+def parse_duration(text):
+    match = DURATION_RE.match(text.lower())
+    if not match:
+        raise RuleError(f"Неверная длительность: {text}")
+    return float(match.group(1)) * UNITS[match.group(2)]
+
+
+def _numeric_column(field):
+    column = NUMERIC_FIELDS.get(field.lower())
+    if column is None:
+        raise RuleError(f"Неизвестное числовое поле: {field}")
+    return column
+
+
+class NumericCondition:
+    """Сравнение колонки с числом через бинарный поиск по отсортированной колонке"""
+    __slots__ = ('column', 'op', 'number')
+
+    def __init__(self, column, op, number):
+        self.column = column
+        self.op = '=' if op == '==' else op
+        self.number = number
+
+    def span(self, columns):
+        """Подходящие позиции снимка: срез(ы) массива индексов, отсортированного по колонке"""
+        order, values = columns.sorted(self.column)
+        low, high = bisect_left(values, self.number), bisect_right(values, self.number)
+        op = self.op
+        if op == '>':
+            return order[high:]
+        if op == '>=':
+            return order[low:]
+        if op == '<':
+            return order[:low]
+        if op == '<=':
+            return order[:high]
+        if op == '=':
+            return order[low:high]
+        return order[:low] + order[high:]
+
+    def test(self, value):
+        op, number = self.op, self.number
+        if op == '>':
+            return value > number
+        if op == '>=':
+            return value >= number
+        if op == '<':
+            return value < number
+        if op == '<=':
+            return value <= number
+        if op == '=':
+            return value == number
+        return value != number
+
+
+class TextCondition:
+    """Строковый Term из core.search с кешем подходящих id таблицы строк.
+
+    Таблица строк общая между поколениями и только растет, поэтому при
+    каждом снимке проверяются лишь новые строки.
+    """
+    __slots__ = ('field', 'predicate', 'matched', 'scanned', 'table')
+
+    def __init__(self, term):
+        self.field = term.field
+        self.predicate = term.test
+        self.matched = set()
+        self.scanned = 0
+        self.table = None
+
+    def ids(self, strings):
+        if strings is not self.table:
+            self.table, self.matched, self.scanned = strings, set(), 0
+        values = strings.strings
+        for string_id in range(self.scanned, len(values)):
+            if self.predicate(values[string_id]):
+                self.matched.add(string_id)
+        self.scanned = len(values)
+        return self.matched
+
+
+class SnapshotColumns:
+    """Ленивые индексы одного снимка и его дельты, общие для всех правил тика"""
+
+    def __init__(self, snapshot, delta=None):
+        self.snapshot = snapshot
+        self.delta = delta
+        self._sorted = {}
+        self._inverted = {}
+        self._touched = {}
+        self._keys = None
+
+    def keys(self):
+        """Ключи процессов по позициям снимка"""
+        if self._keys is None:
+            columns = self.snapshot.columns
+            self._keys = list(zip(columns['pid'], columns['create_time']))
+        return self._keys
+
+    def touched(self, field):
+        """Позиции новых процессов и процессов, у которых поле изменилось; None - неизвестно"""
+        if self.delta is None or field not in TRACKED_FIELDS:
+            return None
+        result = self._touched.get(field)
+        if result is None:
+            positions = self.snapshot.positions()
+            result = [positions[key] for key, (_, fields) in self.delta.changed.items()
+                      if field in fields and key in positions]
+            result.extend(positions[key] for key in self.delta.added if key in positions)
+            self._touched[field] = result
+        return result
+
+    def sorted(self, column):
+        """(индексы по возрастанию значения, значения в том же порядке)"""
+        result = self._sorted.get(column)
+        if result is None:
+            values = self.snapshot.columns[column]
+            order = self.snapshot.argsort(column)
+            result = self._sorted[column] = (order, array(values.typecode, (values[i] for i in order)))
+        return result
+
+    def positions_of(self, field, string_ids):
+        """Позиции строк, у которых строковое поле имеет один из string_ids"""
+        inverted = self._inverted.get(field)
+        if inverted is None:
+            inverted = self._inverted[field] = {}
+            for i, string_id in enumerate(self.snapshot.columns[field]):
+                inverted.setdefault(string_id, []).append(i)
+        positions = []
+        for string_id in string_ids:
+            positions.extend(inverted.get(string_id, ()))
+        return positions
+
+
+class GrowthWindow:
+    """Рост значения за окно по минимумам в фиксированном числе корзин на процесс"""
+
+    def __init__(self, field, amount, window, slots=GROWTH_SLOTS):
+        self.field = field
+        self.amount = amount
+        self.window = window
+        self.slots = slots
+        self.step = window / slots
+        self._state = OrderedDict()  # key -> [корзина, последнее значение, array минимумов], LRU
+        self.seeded = False          # Окна засеяны со всего снимка
+        self.capped = False          # Лимит MAX_TRACKED уже достигался
+
+    def update(self, key, timestamp, value):
+        """Записывает значение и возвращает рост относительно минимума окна"""
+        bucket = int(timestamp // self.step)
+        slots = self.slots
+        state = self._state.get(key)
+        if state is None:
+            if len(self._state) >= MAX_TRACKED:
+                self._state.popitem(last=False)
+                if not self.capped:
+                    self.capped = True
+                    print(f"Alert growth window ({self.field}): больше {MAX_TRACKED} процессов, "
+                          f"вытесняются давно не обновлявшиеся")
+            mins = array('d', [value]) * slots
+            self._state[key] = [bucket, value, mins]
+            return 0.0
+        self._state.move_to_end(key)
+        last_bucket, last_value, mins = state
+        if bucket != last_bucket:
+            # Между замерами значение не менялось: пропущенные корзины получают его
+            for skipped in range(last_bucket + 1, min(bucket, last_bucket + slots) + 1):
+                mins[skipped % slots] = last_value
+            state[0] = bucket
+        slot = bucket % slots
+        if value < mins[slot]:
+            mins[slot] = value
+        state[1] = value
+        return value - min(mins)
+
+    def forget(self, keys):
+        for key in keys:
+            self._state.pop(key, None)
+
+    def __contains__(self, key):
+        return key in self._state
+
+    def __len__(self):
+        return len(self._state)
+
+
+class Rule:
+    """Разобранное правило: фильтр, необязательные рост и длительность, действия"""
+
+    def __init__(self, name, text_conditions, numeric_conditions, growth=None,
+                 duration=0.0, actions=DEFAULT_ACTIONS, source=''):
+        self.name = name
+        self.text_conditions = text_conditions
+        self.numeric_conditions = numeric_conditions
+        self.growth = growth
+        self.duration = duration
+        self.actions = actions    # (('exec', команда), ('log', None), ...)
+        self.source = source
+        self.since = {}           # key -> время, с которого условие выполняется
+        self.fired = set()        # Ключи, по которым уже было оповещение
+        self.growing = {}         # key -> рост, превысивший порог (правила роста)
+
+    @property
+    def filtered(self):
+        return bool(self.text_conditions or self.numeric_conditions)
+
+    def has_action(self, kind):
+        return any(action == kind for action, _ in self.actions)
+
+    def match(self, columns):
+        """Позиции снимка, проходящие фильтр правила (без роста и длительности)"""
+        positions = None
+        for condition in self.text_conditions:
+            found = columns.positions_of(condition.field, condition.ids(columns.snapshot.strings))
+            if positions is not None:
+                previous = set(positions)
+                found = [i for i in found if i in previous]
+            positions = found
+            if not positions:
+                return []
+        numeric = self.numeric_conditions
+        if not numeric:
+            return range(len(columns.snapshot)) if positions is None else positions
+        if positions is None:
+            # Самый узкий срез - основа, остальные условия проверяются по значениям
+            spans = [(condition.span(columns), condition) for condition in numeric]
+            spans.sort(key=lambda item: len(item[0]))
+            positions, rest = spans[0][0], [condition for _, condition in spans[1:]]
+        else:
+            rest = numeric
+        data = columns.snapshot.columns
+        for condition in rest:
+            values = data[condition.column]
+            test = condition.test
+            positions = [i for i in positions if test(values[i])]
+        return positions
+
+    def forget(self, keys):
+        for key in keys:
+            self.since.pop(key, None)
+            self.growing.pop(key, None)
+        self.fired.difference_update(keys)
+        if self.growth is not None:
+            self.growth.forget(keys)
+
+
+def parse_rule(line):
+    """'имя: условие [for 30s] [=> действие; ...]' -> Rule"""
+    name, sep, body = line.partition(':')
+    name = name.strip()
+    if not sep or not name or not re.match(r'^[\w.-]+$', name):
+        raise RuleError(f"Ожидалось 'имя: условие': {line}")
+    condition, _, actions_text = body.partition('=>')
+
+    tokens = condition.split()
+    duration = 0.0
+    if 'for' in tokens:
+        position = tokens.index('for')
+        if position + 1 >= len(tokens):
+            raise RuleError(f"После for нужна длительность: {line}")
+        duration = parse_duration(tokens[position + 1])
+        del tokens[position:position + 2]
+
+    text_conditions, numeric_conditions, growth = [], [], None
+    for token in tokens:
+        match = GROWTH_RE.match(token)
+        if match:
+            if growth is not None:
+                raise RuleError(f"Допускается одно условие роста: {line}")
+            field, amount, window = match.groups()
+            growth = GrowthWindow(_numeric_column(field), float(amount), parse_duration(window))
+            continue
+        match = TERM_RE.match(token)
+        if match and match.group(1).lower() in NUMERIC_FIELDS:
+            field, op, value = match.groups()
+            if op in (':', '~'):
+                raise RuleError(f"Оператор {op} не применим к числовому полю {field}")
+            try:
+                number = float(value)
+            except ValueError:
+                raise RuleError(f"Ожидалось число: {token}")
+            numeric_conditions.append(NumericCondition(_numeric_column(field), op, number))
+            continue
+        try:
+            text_conditions.extend(TextCondition(term) for term in parse_query(token))
+        except ValueError as e:
+            raise RuleError(str(e))
+    if not (text_conditions or numeric_conditions) and growth is None:
+        raise RuleError(f"Пустое условие: {line}")
+
+    actions = []
+    for item in actions_text.split(';') if actions_text.strip() else DEFAULT_ACTIONS:
+        kind, _, argument = item.strip().partition(' ')
+        if kind not in ACTIONS:
+            raise RuleError(f"Неизвестное действие: {kind}")
+        argument = argument.strip() or None
+        if kind in ('exec', 'webhook') and argument is None:
+            raise RuleError(f"Действию {kind} нужен аргумент: {line}")
+        if kind == 'webhook' and not argument.startswith(('http://', 'https://')):
+            raise RuleError(f"webhook ожидает http(s) URL: {argument}")
+        actions.append((kind, argument))
+    return Rule(name, text_conditions, numeric_conditions, growth, duration,
+                tuple(actions), source=line.strip())
+
+
+def load_rules(path):
+    """Правила из файла; ошибка указывает номер строки"""
+    rules = []
+    with open(path, encoding='utf-8') as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            try:
+                rules.append(parse_rule(line))
+            except RuleError as e:
+                raise RuleError(f"{path}:{number}: {e}")
+    return rules
+
+
+class AlertEngine:
+    """Проверка правил на снимках и отправка оповещений.
+
+    evaluate() вызывается из потока сборщика на каждом снимке процессов;
+    журнал, команды и webhook выполняются в отдельном потоке, чтобы
+    медленный получатель не задерживал сбор. active читается окном для
+    подсветки строк и заменяется целиком, без блокировок.
+    """
+
+    def __init__(self, rules, log_path=None, history=100):
+        self.rules = list(rules)
+        self.log_path = log_path or DEFAULT_LOG
+        self.active = {}                      # key -> (имена правил) для подсветки
+        self.recent = deque(maxlen=history)   # Последние события для окна
+        self._executor = None
+
+    @classmethod
+    def from_file(cls, path, log_path=None):
+        return cls(load_rules(path), log_path)
+
+    def evaluate(self, timestamp, snapshot, delta=None):
+        """Проверяет правила на снимке; delta сужает обновление окон роста"""
+        columns = SnapshotColumns(snapshot, delta)
+        if delta is not None and delta.removed:
+            for rule in self.rules:
+                rule.forget(delta.removed)
+        events = []
+        for rule in self.rules:
+            positions = rule.match(columns)
+            if rule.growth is not None:
+                matched = self._update_growth(rule, timestamp, columns, positions)
+            else:
+                keys = columns.keys()
+                matched = {keys[i]: i for i in positions}
+            events.extend(self._advance(rule, timestamp, snapshot, matched))
+
+        active = {}
+        for rule in self.rules:
+            if rule.fired and rule.has_action('highlight'):
+                for key in rule.fired:
+                    active[key] = active.get(key, ()) + (rule.name,)
+        self.active = active
+        if events:
+            self.recent.extend(events)
+            self._dispatch(events)
+        return events
+
+    @staticmethod
+    def _update_growth(rule, timestamp, columns, positions):
+        """{key: позиция} процессов, чей рост за окно превышает порог"""
+        growth = rule.growth
+        values = columns.snapshot.columns[growth.field]
+        keys = columns.keys()
+        positions_by_key = columns.snapshot.positions()
+        allowed = set(positions) if rule.filtered else None
+        # Неизменившееся значение не может впервые превысить порог:
+        # по дельте обновляются только процессы, у которых поле изменилось
+        touched = columns.touched(growth.field) if growth.seeded else None
+        growth.seeded = True
+        if touched is not None:
+            if allowed is None:
+                positions = touched
+            else:
+                # Процессы, только что прошедшие фильтр, засеваются текущим значением,
+                # даже если поле роста не менялось
+                positions = [i for i in touched if i in allowed]
+                seen = set(positions)
+                positions.extend(i for i in allowed if i not in seen and keys[i] not in growth)
+        if rule.growing and (touched is not None or allowed is not None):
+            # Уже превысившие порог перепроверяются каждый тик: у замершего значения
+            # рост за скользящее окно падает, и правило должно снова взвестись
+            positions = list(positions)
+            evaluated = {keys[i] for i in positions}
+            for k in list(rule.growing):
+                if k in evaluated:
+                    continue
+                i = positions_by_key.get(k)
+                if i is None or (allowed is not None and i not in allowed):
+                    del rule.growing[k]
+                else:
+                    positions.append(i)
+        for i in positions:
+            k = keys[i]
+            increase = growth.update(k, timestamp, values[i])
+            if increase > growth.amount:
+                rule.growing[k] = increase
+            else:
+                rule.growing.pop(k, None)
+        return {k: positions_by_key[k] for k in rule.growing if k in positions_by_key}
+
+    def _advance(self, rule, timestamp, snapshot, matched):
+        """Длительность условия и однократное срабатывание по каждому процессу"""
+        since = rule.since
+        for key in [key for key in since if key not in matched]:
+            del since[key]
+            rule.fired.discard(key)
+        events = []
+        for key, position in matched.items():
+            started = since.get(key)
+            if started is None:
+                if len(since) >= MAX_TRACKED:
+                    continue
+                started = since[key] = timestamp
+            if key in rule.fired or timestamp - started < rule.duration:
+                continue
+            rule.fired.add(key)
+            events.append(self._event(rule, timestamp, snapshot, key, position))
+        return events
+
+    @staticmethod
+    def _event(rule, timestamp, snapshot, key, position):
+        proc = snapshot.record(position)
+        if rule.growth is not None:
+            field = rule.growth.field
+            value = rule.growing.get(key, 0.0)
+            detail = f"{field} +{value:.1f} за {rule.growth.window:g}s"
+        elif rule.numeric_conditions:
+            field = rule.numeric_conditions[0].column
+            value = proc[field]
+            detail = f"{field}={value:g}"
+        else:
+            value = None
+            detail = proc['status']
+        if rule.duration:
+            detail += f" дольше {rule.duration:g}s"
+        message = f"{rule.name}: {proc['name']} (PID {proc['pid']}, {proc['user']}) {detail}"
+        return AlertEvent(timestamp, rule.name, key, proc['name'], value, message)
+
+    # --- Действия ---
+
+    def _dispatch(self, events):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="ghhs-alerts")
+        rules = {rule.name: rule for rule in self.rules}
+        self._executor.submit(self._deliver, events, rules)
+
+    def _deliver(self, events, rules):
+        log_lines = []
+        for event in events:
+            for kind, argument in rules[event.rule].actions:
+                try:
+                    if kind == 'log':
+                        stamp = datetime.fromtimestamp(event.timestamp).strftime('%Y-%m-%d %H:%M:%S')
+                        log_lines.append(f"{stamp}  {event.message}\n")
+                    elif kind == 'exec':
+                        self._run_command(argument, event)
+                    elif kind == 'webhook':
+                        self._post(argument, event)
+                except Exception as e:
+                    print(f"Alert action error ({event.rule}, {kind}): {e}")
+        if log_lines:
+            try:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.writelines(log_lines)
+            except OSError as e:
+                print(f"Alert log error: {e}")
+
+    @staticmethod
+    def _run_command(command, event):
+        env = dict(os.environ,
+                   GHHS_ALERT_RULE=event.rule, GHHS_ALERT_PID=str(event.key[0]),
+                   GHHS_ALERT_NAME=event.name, GHHS_ALERT_VALUE=str(event.value),
+                   GHHS_ALERT_MESSAGE=event.message)
+        subprocess.run(command, shell=True, env=env, timeout=ACTION_TIMEOUT,
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+    @staticmethod
+    def _post(url, event):
+        body = json.dumps({
+            'timestamp': event.timestamp, 'rule': event.rule, 'pid': event.key[0],
+            'create_time': event.key[1], 'name': event.name, 'value': event.value,
+            'message': event.message,
+        }, ensure_ascii=False).encode('utf-8')
+        request = urllib.request.Request(url, data=body, method='POST',
+                                         headers={'Content-Type': 'application/json'})
+        with urllib.request.urlopen(request, timeout=ACTION_TIMEOUT) as response:
+            response.read()
+
+    def close(self):
+        if self._executor is not None:
+            # Окно закрывается из потока Tk: ждать зависший exec/webhook нельзя
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,70 @@
+"""Кеш медленных неизменяемых атрибутов процессов"""
+import threading
+import time
+from functools import lru_cache
+
+
+class AttributeCache:
+    """Мемоизация атрибутов по (pid, create_time) и LRU для uid -> имя.
+
+    Пользователь, путь к exe, cmdline и время запуска не меняются за время
+    жизни процесса. При переиспользовании PID меняется create_time, а значит и
+    ключ, так что старое значение не подставится чужому процессу.
+    """
+
+    def __init__(self, uid_cache_size=1024):
+        self._entries = {}  # key -> {атрибут: значение}
+        self._lock = threading.Lock()
+        self.hits = {}
+        self.misses = {}
+        self.load_time = {}  # Суммарное время загрузки на промахах, секунды
+        self.username = lru_cache(maxsize=uid_cache_size)(self._resolve_uid)
+
+    @staticmethod
+    def _resolve_uid(uid):
+        try:
+            import pwd
+            return pwd.getpwuid(uid).pw_name
+        except (ImportError, KeyError):
+            return str(uid)
+
+    def get(self, key, attr, loader):
+        """Значение из кеша или loader() с запоминанием; исключения loader не кешируются"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and attr in entry:
+                self.hits[attr] = self.hits.get(attr, 0) + 1
+                return entry[attr]
+
+        started = time.perf_counter()
+        value = loader()
+        elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self._entries.setdefault(key, {})[attr] = value
+            self.misses[attr] = self.misses.get(attr, 0) + 1
+            self.load_time[attr] = self.load_time.get(attr, 0.0) + elapsed
+        return value
+
+    def forget(self, keys):
+        """Удаляет записи завершившихся процессов"""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Счетчики попаданий/промахов и оценка сэкономленного времени"""
+        with self._lock:
+            stats = {}
+            for attr in set(self.hits) | set(self.misses):
+                hits = self.hits.get(attr, 0)
+                misses = self.misses.get(attr, 0)
+                average = self.load_time.get(attr, 0.0) / misses if misses else 0.0
+                stats[attr] = {'hits': hits, 'misses': misses, 'saved_seconds': hits * average}
+            uid = self.username.cache_info()
+            stats['uid'] = {'hits': uid.hits, 'misses': uid.misses, 'size': uid.currsize}
+            stats['entries'] = len(self._entries)
+        return stats
+
+    def __len__(self):
+        return len(self._entries)
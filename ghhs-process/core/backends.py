@@ -0,0 +1,221 @@
+"""Бэкенды сбора списка процессов для ProcessManager"""
+import os
+import sys
+
+import psutil
+
+from core.attr_cache import AttributeCache
+from core.cpu_accounting import CpuAccounting
+from core.io_monitor import IoAccounting
+
+
+class PsutilBackend:
+    """Сбор через psutil.process_iter (работает на любой платформе)"""
+
+    # username не запрашивается на каждом проходе - он берется из AttributeCache.
+    # CPU% считается из сырых cpu_times (CpuAccounting), а не cpu_percent
+    ATTRS = ['pid', 'ppid', 'name', 'cpu_times', 'memory_info', 'num_threads',
+             'status', 'create_time']
+
+    def __init__(self, attributes=None, cpu=None):
+        self.attributes = attributes or AttributeCache()
+        self.cpu = cpu or CpuAccounting()
+        self.io = False  # Скорости ввода-вывода процессов - лишний вызов на процесс, по запросу
+        self.io_accounting = IoAccounting()
+
+    def collect(self):
+        """Один проход по процессам: {(pid, create_time): proc}"""
+        processes = {}
+        accounting = self.cpu
+        accounting.start()
+        io = self.io_accounting if self.io else None
+        attrs = self.ATTRS + ['io_counters'] if io else self.ATTRS
+        if io:
+            io.start()
+        for proc in psutil.process_iter(attrs):
+            try:
+                # Быстрая проверка без детальной информации
+                info = proc.info
+                memory_mb = info['memory_info'].rss / 1024 / 1024 if info['memory_info'] else 0
+                key = (info['pid'], info['create_time'] or 0)
+                user = self.attributes.get(key, 'user', lambda: self._username(proc))
+                times = info['cpu_times']
+                cpu = accounting.rate(key, times.user + times.system) if times else 0.0
+                io_read = io_write = 0.0
+                counters = info.get('io_counters')
+                if counters:
+                    io_read, io_write = io.rate(key, counters.read_bytes, counters.write_bytes)
+                processes[key] = {
+                    'pid': info['pid'],
+                    'ppid': info['ppid'] or 0,
+                    'name': info['name'] or '',
+                    'cpu': cpu,
+                    'cpu_norm': accounting.normalized(cpu),
+                    'memory': memory_mb,
+                    'io_read': io_read,
+                    'io_write': io_write,
+                    'uss': 0.0,  # USS/PSS/swap проставляет MemorySampler, если он включен
+                    'pss': 0.0,
+                    'swap': 0.0,
+                    'threads': info['num_threads'] or 0,
+                    'user': user,
+                    'status': info['status'],
+                    'create_time': key[1]
+                }
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        accounting.finish()
+        if io:
+            io.finish()
+        return processes
+
+    @staticmethod
+    def _username(proc):
+        try:
+            return proc.username() or 'SYSTEM'
+        except psutil.AccessDenied:
+            return 'SYSTEM'
+
+
+class ProcfsBackend:
+    """Прямое чтение /proc на Linux: stat и status читаются по одному разу в общий буфер"""
+
+    # Коды состояния из /proc/<pid>/stat -> строки psutil
+    STATUSES = {
+        b'R': 'running', b'S': 'sleeping', b'D': 'disk-sleep', b'T': 'stopped',
+        b't': 'tracing-stop', b'Z': 'zombie', b'X': 'dead', b'x': 'dead',
+        b'K': 'wake-kill', b'W': 'waking', b'I': 'idle', b'P': 'parked',
+    }
+
+    def __init__(self, procfs='/proc', attributes=None, cpu=None):
+        self.procfs = procfs
+        self.attributes = attributes or AttributeCache()
+        self.cpu = cpu or CpuAccounting()
+        self.io = False  # Чтение /proc/<pid>/io - по запросу (открыта панель ввода-вывода)
+        self.io_accounting = IoAccounting()
+        self.clock_ticks = os.sysconf('SC_CLK_TCK')
+        self.page_mb = os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+        self.boot_time = psutil.boot_time()
+        self._buffer = bytearray(4096)
+        self._view = memoryview(self._buffer)
+
+    def _read(self, path):
+        """Читает файл в переиспользуемый буфер и возвращает bytes"""
+        with open(path, 'rb', buffering=0) as f:
+            size = f.readinto(self._buffer)
+            if size < len(self._buffer):
+                return bytes(self._view[:size])
+            # Файл больше буфера - дочитываем остаток
+            return bytes(self._buffer) + f.read()
+
+    def _long_name(self, pid, comm):
+        """comm обрезается ядром до 15 символов - уточняем по cmdline, как psutil"""
+        try:
+            cmdline = self._read(f"{self.procfs}/{pid}/cmdline").split(b'\0', 1)[0]
+        except OSError:
+            return comm
+        exe = os.path.basename(cmdline.decode('utf-8', 'replace'))
+        return exe if exe.startswith(comm) else comm
+
+    def _io_bytes(self, pid):
+        """(read_bytes, write_bytes) из /proc/<pid>/io; None без прав на чужой процесс"""
+        try:
+            data = self._read(f"{self.procfs}/{pid}/io")
+        except OSError:
+            return None
+        start = data.find(b'\nread_bytes:')
+        middle = data.find(b'\nwrite_bytes:')
+        if start < 0 or middle < 0:
+            return None
+        return (int(data[start + 12:data.find(b'\n', start + 12)]),
+                int(data[middle + 13:data.find(b'\n', middle + 13)]))
+
+    def collect(self):
+        """Один проход по /proc: {(pid, create_time): proc}"""
+        processes = {}
+        accounting = self.cpu
+        accounting.start()
+        io = self.io_accounting if self.io else None
+        if io:
+            io.start()
+        for entry in os.scandir(self.procfs):
+            if not entry.name.isdigit():
+                continue
+            pid = int(entry.name)
+            try:
+                stat = self._read(f"{self.procfs}/{pid}/stat")
+                status = self._read(f"{self.procfs}/{pid}/status")
+            except OSError:
+                # Процесс завершился между scandir и чтением
+                continue
+
+            lpar = stat.find(b'(')
+            rpar = stat.rfind(b')')
+            comm = stat[lpar + 1:rpar].decode('utf-8', 'replace')
+            fields = stat[rpar + 2:].split()
+
+            start = status.find(b'\nUid:')
+            uid = int(status[start + 5:status.find(b'\n', start + 5)].split()[0]) if start >= 0 else 0
+
+            create_time = int(fields[19]) / self.clock_ticks + self.boot_time
+            key = (pid, create_time)
+
+            # utime + stime в тиках; у нового процесса - средняя загрузка с запуска
+            cpu = accounting.rate(key, (int(fields[11]) + int(fields[12])) / self.clock_ticks)
+            io_read = io_write = 0.0
+            if io:
+                counters = self._io_bytes(pid)
+                if counters:
+                    io_read, io_write = io.rate(key, *counters)
+
+            processes[key] = {
+                'pid': pid,
+                'ppid': int(fields[1]),
+                'name': self._long_name(pid, comm) if len(comm) >= 15 else comm,
+                'cpu': cpu,
+                'cpu_norm': accounting.normalized(cpu),
+                'memory': int(fields[21]) * self.page_mb,
+                'io_read': io_read,
+                'io_write': io_write,
+                'uss': 0.0,
+                'pss': 0.0,
+                'swap': 0.0,
+                'threads': int(fields[17]),
+                'user': self.attributes.username(uid),
+                'status': self.STATUSES.get(fields[0], fields[0].decode()),
+                'create_time': create_time
+            }
+        accounting.finish()
+        if io:
+            io.finish()
+        return processes
+
+
+def default_backend(attributes=None):
+    """Нативный /proc на Linux, psutil на остальных платформах"""
+    if sys.platform.startswith('linux') and os.path.isdir('/proc'):
+        return ProcfsBackend(attributes=attributes)
+    return PsutilBackend(attributes=attributes)
+
+
+# Поля, не зависящие от момента прохода: CPU% считается по интервалу между проходами
+PARITY_FIELDS = ('ppid', 'name', 'memory', 'threads', 'user', 'status')
+
+
+def compare_backends(first, second, fields=PARITY_FIELDS, strict=False):
+    """Сверяет два бэкенда на одном проходе: [(key, поле, значение first, значение second)].
+
+    На живой системе процессы появляются и завершаются между проходами, поэтому
+    сравниваются только общие ключи; strict - для неизменного (синтетического)
+    /proc, где процесс, найденный одним бэкендом, тоже расхождение (поле 'key').
+    """
+    a = first.collect()
+    b = second.collect()
+    mismatches = []
+    if strict:
+        mismatches.extend((key, 'key', key in a, key in b) for key in a.keys() ^ b.keys())
+    for key in a.keys() & b.keys():
+        for field in fields:
+            if a[key][field] != b[key][field]:
+                mismatches.append((key, field, a[key][field], b[key][field]))
+    return mismatches
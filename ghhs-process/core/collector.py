@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+
+from core.process_info import merge_deltas
+from core.profiling import PROFILER
+
+
+# Неизменяемый снимок одного тика сборщика.
+# processes/snapshot/delta равны None, если в этом тике процессы не собирались
+Sample = namedtuple('Sample', ['timestamp', 'system', 'processes', 'snapshot', 'delta'],
+                    defaults=(None, None, None))
+
+
+def merge_samples(older, newer):
+    """Склеивает непрочитанный снимок с новым, не теряя дельту процессов"""
+    if newer.delta is None:
+        return newer._replace(processes=older.processes, snapshot=older.snapshot,
+                              delta=older.delta)
+    if older.delta is None:
+        return newer
+    return newer._replace(delta=merge_deltas(older.delta, newer.delta))
+
+
+class LatestQueue:
+    """Очередь на один элемент: новый снимок вытесняет непрочитанный"""
+
+    def __init__(self, merge=None):
+        self._item = None
+        self._lock = threading.Lock()
+        self._merge = merge
+        self.dropped = 0
+
+    def put(self, item):
+        with self._lock:
+            if self._item is not None:
+                self.dropped += 1
+                if self._merge:
+                    item = self._merge(self._item, item)
+            self._item = item
+
+    def get(self):
+        """Забирает последний снимок или None, не блокируя вызывающего"""
+        with self._lock:
+            item, self._item = self._item, None
+            return item
+
+
+class Collector:
+    """Фоновый поток сбора системных метрик и снимков процессов"""
+
+    def __init__(self, process_manager, system_monitor,
+                 system_interval=0.5, process_interval=2.0, recorder=None, scheduler=None,
+                 alerts=None):
+        self.process_manager = process_manager
+        self.system_monitor = system_monitor
+        self.recorder = recorder  # Необязательная запись снимков на диск (core.recorder)
+        # Адаптивные интервалы (core.scheduler); без него - фиксированные
+        self.scheduler = scheduler
+        # Правила оповещений (core.alerts) проверяются на каждом снимке, даже при свернутом окне
+        self.alerts = alerts
+        self.system_interval = system_interval
+        self.process_interval = process_interval
+        self.queue = LatestQueue(merge=merge_samples)
+
+        self._thread = None
+        self._wake = threading.Event()
+        self._stopping = False
+        self._refresh_requested = True
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="ghhs-collector", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=2.0):
+        """Останавливает поток и дожидается его завершения"""
+        self._stopping = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+        if self.recorder is not None:
+            self.recorder.close()
+        if self.alerts is not None:
+            self.alerts.close()
+
+    def request_refresh(self):
+        """Просит собрать процессы вне очереди"""
+        self._refresh_requested = True
+        self._wake.set()
+
+    def reschedule(self):
+        """Будит поток, чтобы он пересчитал интервалы (сменился режим окна)"""
+        self._wake.set()
+
+    def interval(self, name):
+        """Текущий интервал сборщика 'system' или 'processes', секунды"""
+        if self.scheduler is not None:
+            return self.scheduler.interval(name)
+        return self.system_interval if name == 'system' else self.process_interval
+
+    def _charge(self, name, started):
+        """Сообщает планировщику CPU-время, потраченное на сбор"""
+        if self.scheduler is not None:
+            self.scheduler.record_cost(name, time.thread_time() - started)
+
+    def _collect_system(self):
+        return MappingProxyType(self.system_monitor.sample())
+
+    def _run(self):
+        last_system = last_processes = float('-inf')
+        while not self._stopping:
+            # Сброс до чтения состояния: set() из request_refresh/reschedule после этой строки
+            # либо уже виден в флагах, либо прервет ожидание ниже - запрос не теряется
+            self._wake.clear()
+            now = time.monotonic()
+            try:
+                processes_due = (self._refresh_requested
+                                 or now - last_processes >= self.interval('processes'))
+                if processes_due or now - last_system >= self.interval('system'):
+                    last_system = now
+                    started = time.thread_time()
+                    system = self._collect_system()
+                    self._charge('system', started)
+                    if self.scheduler is not None:
+                        self.scheduler.observe(system)
+                if processes_due:
+                    self._refresh_requested = False
+                    last_processes = now
+                    started = time.thread_time()
+                    delta = self.process_manager.update()
+                    processes = MappingProxyType(self.process_manager.processes)
+                    snapshot = self.process_manager.snapshot()
+                    timestamp = time.time()
+                    self.system_monitor.history.record_processes(timestamp, snapshot)
+                    if self.recorder is not None:
+                        self.recorder.write(timestamp, system, processes, delta)
+                    if self.alerts is not None:
+                        with PROFILER.span('alerts'):
+                            self.alerts.evaluate(timestamp, snapshot, delta)
+                    self._charge('processes', started)
+                    self.queue.put(Sample(timestamp, system, processes, snapshot, delta))
+                elif last_system == now:
+                    self.queue.put(Sample(time.time(), system))
+            except Exception as e:
+                print(f"Collector error: {e}")
+
+            # Интервалы пересчитываются после каждого сбора и при reschedule()
+            deadline = min(last_system + self.interval('system'),
+                           last_processes + self.interval('processes'))
+            self._wake.wait(max(0.0, deadline - time.monotonic()))
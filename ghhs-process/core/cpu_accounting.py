@@ -0,0 +1,97 @@
+"""Учет CPU по сырым счетчикам времени: проценты из дельт cpu_times между тиками"""
+import time
+
+import psutil
+
+
+class CpuAccounting:
+    """Суммарное user+system время по (pid, create_time) и загрузка за интервал тика.
+
+    Тик: start() -> rate() для каждого процесса в том же проходе сбора -> finish().
+    Интервал один на весь тик (monotonic), поэтому проценты процессов сопоставимы.
+    Абсолютный процент - доля одного ядра (как в top, может быть больше 100);
+    normalized() делит его на число логических ядер. Процесс, которого не было
+    в прошлом тике, получает среднюю загрузку с момента запуска вместо 0.
+    """
+
+    def __init__(self, cpu_count=None):
+        self.cpu_count = cpu_count or psutil.cpu_count() or 1
+        self._times = {}         # key -> CPU-время прошлого тика, с
+        self._timestamp = None   # monotonic прошлого тика
+        self._next = {}
+        self._interval = 0.0
+        self._wall = 0.0
+
+    def start(self, now=None):
+        """Начало прохода: фиксирует момент замера для всех процессов тика"""
+        now = time.monotonic() if now is None else now
+        self._interval = now - self._timestamp if self._timestamp is not None else 0.0
+        self._timestamp = now
+        self._wall = time.time()
+        self._next = {}
+
+    def rate(self, key, cpu_time):
+        """Абсолютный CPU% процесса за интервал тика; cpu_time - user + system, с"""
+        self._next[key] = cpu_time
+        previous = self._times.get(key)
+        if previous is not None and self._interval > 0:
+            used, interval = cpu_time - previous, self._interval
+        else:
+            used, interval = cpu_time, self._wall - key[1]
+        if interval <= 0 or used <= 0:
+            return 0.0
+        return round(used / interval * 100, 1)
+
+    def normalized(self, percent):
+        """Доля всей машины: 100% - все логические ядра заняты"""
+        return round(percent / self.cpu_count, 1)
+
+    def finish(self):
+        """Конец прохода: завершившиеся процессы выпадают из учета"""
+        self._times = self._next
+        self._next = {}
+
+
+class SystemCpuAccounting:
+    """Загрузка системы и каждого ядра по дельтам psutil.cpu_times(percpu=True)"""
+
+    def __init__(self):
+        self._previous = None
+
+    @staticmethod
+    def _split(times):
+        """(занято, всего) в секундах; guest уже входит в user, iowait - простой"""
+        total = sum(times)
+        total -= getattr(times, 'guest', 0.0) + getattr(times, 'guest_nice', 0.0)
+        idle = times.idle + getattr(times, 'iowait', 0.0)
+        return total - idle, total
+
+    def sample(self):
+        """{'cpu': %, 'cpu_cores': (% по ядрам), 'cpu_user': %, 'cpu_system': %}"""
+        current = psutil.cpu_times(percpu=True)
+        previous, self._previous = self._previous, current
+        if previous is None or len(previous) != len(current):
+            # Первый замер: загрузка с момента загрузки системы
+            previous = [type(times)(*(0.0,) * len(times)) for times in current]
+
+        cores = []
+        busy_sum = total_sum = user_sum = system_sum = 0.0
+        for old, new in zip(previous, current):
+            old_busy, old_total = self._split(old)
+            new_busy, new_total = self._split(new)
+            busy = max(0.0, new_busy - old_busy)
+            total = new_total - old_total
+            cores.append(round(min(100.0, busy / total * 100), 1) if total > 0 else 0.0)
+            busy_sum += busy
+            total_sum += total
+            user_sum += max(0.0, new.user - old.user)
+            system_sum += max(0.0, new.system - old.system)
+
+        if total_sum <= 0:
+            return {'cpu': 0.0, 'cpu_cores': tuple(cores), 'cpu_user': 0.0, 'cpu_system': 0.0}
+        return {
+            'cpu': round(min(100.0, busy_sum / total_sum * 100), 1),
+            'cpu_cores': tuple(cores),
+            'cpu_user': round(user_sum / total_sum * 100, 1),
+            'cpu_system': round(system_sum / total_sum * 100, 1),
+        }
@@ -0,0 +1,231 @@
+"""Группировка процессов по имени, пользователю или cgroup с суммами, обновляемыми по дельтам"""
+import re
+import sys
+import time
+
+# Поля, суммируемые по группе (вместе с числом процессов)
+GROUP_FIELDS = ('cpu', 'memory', 'threads')
+CGROUP_TTL = 30.0  # Секунды до перечитывания cgroup процесса
+
+# Идентификатор контейнера в пути cgroup: docker, containerd, CRI-O, podman
+CONTAINER_RE = re.compile(r'(?:docker|cri-containerd|crio|libpod)[-/:]([0-9a-f]{12})[0-9a-f]*')
+POD_RE = re.compile(r'kubepods.*?pod([0-9a-f]{8}[-_][0-9a-f]{4})')
+
+
+def read_cgroup(pid):
+    """Путь cgroup процесса: v2 ('0::/...') или первая иерархия v1; '' - недоступно"""
+    try:
+        with open(f"/proc/{pid}/cgroup", encoding='utf-8', errors='replace') as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return ''
+    for line in lines:
+        if line.startswith('0::'):
+            return line[3:]
+    return lines[0].split(':', 2)[2] if lines else ''
+
+
+def cgroup_label(path):
+    """Короткое имя группы: контейнер, под Kubernetes или юнит systemd"""
+    if not path:
+        return '-'
+    match = CONTAINER_RE.search(path)
+    if match:
+        return f"container:{match.group(1)}"
+    match = POD_RE.search(path)
+    if match:
+        return f"pod:{match.group(1).replace('_', '-')}"
+    return path.rstrip('/').rsplit('/', 1)[-1] or '/'
+
+
+class CgroupLabeler:
+    """Метка группы по cgroup для потока сборщика.
+
+    В отличие от атрибутов AttributeCache, cgroup меняется за время жизни
+    процесса (systemd-run --scope, cgclassify, перенос в контейнер), поэтому
+    метка перечитывается через ttl секунд или сразу при смене ppid. Сроки
+    разнесены по pid, чтобы не перечитывать все процессы на одном проходе.
+    """
+
+    def __init__(self, ttl=CGROUP_TTL):
+        self.ttl = ttl
+        self.enabled = sys.platform.startswith('linux')
+        self._entries = {}  # key -> (срок, ppid, метка)
+
+    def __call__(self, key, proc, now=None):
+        if not self.enabled:
+            return '-'
+        if now is None:
+            now = time.monotonic()
+        entry = self._entries.get(key)
+        ppid = proc.get('ppid')
+        if entry is not None and now < entry[0] and entry[1] == ppid:
+            return entry[2]
+        label = cgroup_label(read_cgroup(key[0]))
+        expires = now + self.ttl * (1.0 + (key[0] % 64) / 128)
+        self._entries[key] = (expires, ppid, label)
+        return label
+
+    def forget(self, keys):
+        for key in keys:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# Режим группировки -> (метка группы по (key, proc), поля дельты, меняющие метку)
+GROUPINGS = {
+    'name': (lambda key, proc: proc['name'], ('name',)),
+    'user': (lambda key, proc: proc['user'], ('user',)),
+}
+# По cgroup: метку проставляет ProcessManager.set_cgroup_labels в потоке сборщика
+CGROUP_GROUPING = (lambda key, proc: proc.get('cgroup', '-'), ())
+
+
+class ProcessGroups:
+    """Суммы полей и состав групп процессов.
+
+    Как и ProcessTree, ведется по дельтам: изменившийся процесс меняет
+    суммы только своей группы (разница старого и нового значения), смена
+    метки (переименование, смена пользователя) переносит его между группами.
+    """
+
+    def __init__(self, label, relabel_fields=(), fields=GROUP_FIELDS):
+        self.label = label
+        self.relabel_fields = relabel_fields
+        self.fields = fields
+        self.members = {}  # key -> группа
+        self.values = {}   # key -> значения полей, внесенные в сумму группы
+        self.totals = {}   # группа -> [сумма поля, ...] в порядке fields
+        self.keys = {}     # группа -> {key}
+
+    def __len__(self):
+        return len(self.totals)
+
+    def rebuild(self, processes):
+        self.members.clear()
+        self.values.clear()
+        self.totals.clear()
+        self.keys.clear()
+        for key, proc in processes.items():
+            self._add(key, proc)
+
+    def apply(self, delta):
+        if not self.members:
+            processes = dict(delta.added)
+            processes.update((key, proc) for key, (proc, _) in delta.changed.items())
+            self.rebuild(processes)
+            return
+        for key in delta.removed:
+            self._remove(key)
+        for key, proc in delta.added.items():
+            self._remove(key)
+            self._add(key, proc)
+        relabel, fields = self.relabel_fields, self.fields
+        for key, (proc, changed) in delta.changed.items():
+            if key not in self.members or any(field in relabel for field in changed):
+                self._remove(key)
+                self._add(key, proc)
+            elif any(field in fields for field in changed):
+                self._update(key, proc)
+
+    def _add(self, key, proc):
+        group = self.label(key, proc)
+        values = tuple(proc[field] for field in self.fields)
+        self.members[key] = group
+        self.values[key] = values
+        sums = self.totals.get(group)
+        if sums is None:
+            self.totals[group] = list(values)
+            self.keys[group] = {key}
+            return
+        for i, value in enumerate(values):
+            sums[i] += value
+        self.keys[group].add(key)
+
+    def _remove(self, key):
+        group = self.members.pop(key, None)
+        if group is None:
+            return
+        values = self.values.pop(key)
+        keys = self.keys[group]
+        keys.discard(key)
+        if not keys:
+            del self.keys[group]
+            del self.totals[group]
+            return
+        sums = self.totals[group]
+        for i, value in enumerate(values):
+            sums[i] -= value
+
+    def _update(self, key, proc):
+        old = self.values[key]
+        values = tuple(proc[field] for field in self.fields)
+        self.values[key] = values
+        sums = self.totals[self.members[key]]
+        for i, (before, after) in enumerate(zip(old, values)):
+            sums[i] += after - before
+
+    def subset(self, keys):
+        """Группы только из заданных процессов (фильтр поиска): метки и значения уже посчитаны"""
+        subset = ProcessGroups(self.label, self.relabel_fields, self.fields)
+        members, values = self.members, self.values
+        totals, groups = subset.totals, subset.keys
+        for key in keys:
+            group = members.get(key)
+            if group is None:
+                continue
+            subset.members[key] = group
+            subset.values[key] = key_values = values[key]
+            sums = totals.get(group)
+            if sums is None:
+                totals[group] = list(key_values)
+                groups[group] = {key}
+                continue
+            for i, value in enumerate(key_values):
+                sums[i] += value
+            groups[group].add(key)
+        return subset
+
+    def record(self, group):
+        """Строка группы для таблицы; ключ (None, группа) не пересекается с ключами процессов"""
+        record = {'pid': None, 'create_time': group, 'group': group, 'count': len(self.keys[group])}
+        for field, total in zip(self.fields, self.totals[group]):
+            # Суммы дробных полей накапливают погрешность вычитаний
+            record[field] = max(0, round(total, 1)) if isinstance(total, float) else total
+        return record
+
+    def rows(self, column='cpu', reverse=True):
+        """Группы, упорядоченные по колонке ('group', 'count' или поле суммы)"""
+        if column == 'group':
+            order = sorted(self.totals, key=str.lower, reverse=reverse)
+        elif column == 'count':
+            keys = self.keys
+            order = sorted(self.totals, key=lambda group: (len(keys[group]), group), reverse=reverse)
+        else:
+            position = self.fields.index(column if column in self.fields else 'cpu')
+            totals = self.totals
+            order = sorted(totals, key=lambda group: (totals[group][position], group), reverse=reverse)
+        return GroupView(self, order)
+
+
+class GroupView:
+    """Строки групп для таблицы; записи собираются только для видимых строк"""
+    __slots__ = ('groups', 'order')
+
+    def __init__(self, groups, order):
+        self.groups = groups
+        self.order = order
+
+    def __len__(self):
+        return len(self.order)
+
+    def key(self, position):
+        return (None, self.order[position])
+
+    def __getitem__(self, position):
+        return self.groups.record(self.order[position])
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
@@ -0,0 +1,187 @@
+"""HTTP-экспортер метрик (Prometheus text и JSON) на asyncio.
+
+Ответы строятся из последнего снимка сборщика и кешируются до прихода
+следующего, поэтому любое число одновременных скрейперов стоит одного рендера.
+"""
+import asyncio
+import json
+
+from core.sorting import SortEngine
+from core.profiling import PROFILER
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+JSON_CONTENT_TYPE = "application/json; charset=utf-8"
+
+SYSTEM_METRICS = (
+    ('cpu', 'ghhs_cpu_percent', "System CPU usage, percent"),
+    ('cpu_user', 'ghhs_cpu_user_percent', "System CPU time in user mode, percent"),
+    ('cpu_system', 'ghhs_cpu_system_percent', "System CPU time in kernel mode, percent"),
+    ('ram', 'ghhs_memory_percent', "System memory usage, percent"),
+    ('disk', 'ghhs_disk_percent', "Disk space usage, percent"),
+    ('disk_read', 'ghhs_disk_read_bytes_per_second', "Disk read rate, all devices"),
+    ('disk_write', 'ghhs_disk_write_bytes_per_second', "Disk write rate, all devices"),
+    ('net_recv', 'ghhs_network_receive_bytes_per_second', "Network receive rate, all interfaces"),
+    ('net_sent', 'ghhs_network_transmit_bytes_per_second', "Network transmit rate, all interfaces"),
+)
+PROCESS_METRICS = (
+    ('cpu', 'ghhs_process_cpu_percent', "Process CPU usage, percent of one core", 1),
+    ('memory', 'ghhs_process_resident_memory_bytes', "Process resident memory, bytes", 1024 * 1024),
+    ('threads', 'ghhs_process_threads', "Process thread count", 1),
+)
+
+
+def _escape_label(value, max_length):
+    value = str(value)[:max_length]
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+class MetricsExporter:
+    """Отдает /metrics (Prometheus) и /metrics.json из кеша последнего снимка"""
+
+    def __init__(self, collector, host='127.0.0.1', port=9105,
+                 top_n=20, max_label_length=64, poll_interval=0.25):
+        self.collector = collector
+        self.host = host
+        self.port = port
+        self.top_n = top_n                      # Лимит кардинальности: число процессов в выдаче
+        self.max_label_length = max_label_length
+        self.poll_interval = poll_interval
+        self.sorter = SortEngine('cpu', reverse=True)
+
+        self.system = {}
+        self.snapshot = None
+        self.timestamp = 0.0
+        self._rendered = {}  # формат -> bytes, сбрасывается при новом снимке
+        self.renders = 0
+        self._server = None
+        self._poll_task = None
+
+    # --- Состояние ---
+
+    def update(self, sample):
+        """Принимает снимок сборщика и сбрасывает кеш ответов"""
+        self.system = dict(sample.system)
+        self.timestamp = sample.timestamp
+        if sample.snapshot is not None:
+            self.snapshot = sample.snapshot
+        self._rendered = {}
+
+    def _top_processes(self):
+        if self.snapshot is None:
+            return []
+        indices = self.sorter.top(self.snapshot, self.top_n)
+        return [self.snapshot.record(index) for index in indices]
+
+    # --- Рендеринг ---
+
+    def render(self, fmt):
+        body = self._rendered.get(fmt)
+        if body is None:
+            body = self.render_prometheus() if fmt == 'prometheus' else self.render_json()
+            self._rendered[fmt] = body
+            self.renders += 1
+        return body
+
+    def render_prometheus(self):
+        lines = []
+        for field, name, description in SYSTEM_METRICS:
+            if field in self.system:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {self.system[field]}")
+        cores = self.system.get('cpu_cores')
+        if cores:
+            lines.append("# HELP ghhs_cpu_core_percent Per-core CPU usage, percent")
+            lines.append("# TYPE ghhs_cpu_core_percent gauge")
+            lines.extend(f'ghhs_cpu_core_percent{{core="{i}"}} {value}' for i, value in enumerate(cores))
+        usage = PROFILER.self_usage()
+        lines.append("# HELP ghhs_self_cpu_percent CPU usage of the GHHS process itself")
+        lines.append("# TYPE ghhs_self_cpu_percent gauge")
+        lines.append(f"ghhs_self_cpu_percent {usage['cpu']}")
+        lines.append("# HELP ghhs_self_resident_memory_bytes Resident memory of the GHHS process itself")
+        lines.append("# TYPE ghhs_self_resident_memory_bytes gauge")
+        lines.append(f"ghhs_self_resident_memory_bytes {usage['rss']}")
+        if self.snapshot is not None:
+            lines.append("# HELP ghhs_processes Number of processes")
+            lines.append("# TYPE ghhs_processes gauge")
+            lines.append(f"ghhs_processes {len(self.snapshot)}")
+
+        processes = self._top_processes()
+        for field, name, description, scale in PROCESS_METRICS:
+            lines.append(f"# HELP {name} {description} (top {self.top_n} by CPU)")
+            lines.append(f"# TYPE {name} gauge")
+            for proc in processes:
+                labels = (f'pid="{proc["pid"]}",'
+                          f'name="{_escape_label(proc["name"], self.max_label_length)}",'
+                          f'user="{_escape_label(proc["user"], self.max_label_length)}"')
+                lines.append(f"{name}{{{labels}}} {proc[field] * scale}")
+        return ("\n".join(lines) + "\n").encode("utf-8")
+
+    def render_json(self):
+        data = {
+            'timestamp': self.timestamp,
+            'system': self.system,
+            'process_count': len(self.snapshot) if self.snapshot is not None else 0,
+            'processes': self._top_processes(),
+            'self': PROFILER.self_usage(),
+            'stages': PROFILER.summary(),
+        }
+        return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+    # --- Сервер ---
+
+    ROUTES = {
+        '/metrics': ('prometheus', PROMETHEUS_CONTENT_TYPE),
+        '/metrics.json': ('json', JSON_CONTENT_TYPE),
+    }
+
+    async def _handle(self, reader, writer):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            # Заголовки запроса не нужны - дочитываем до пустой строки
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            path = parts[1].split("?", 1)[0] if len(parts) >= 2 else ""
+            if len(parts) < 2 or parts[0] not in ("GET", "HEAD"):
+                status, content_type, body = "405 Method Not Allowed", "text/plain", b"method not allowed\n"
+            elif path in self.ROUTES:
+                fmt, content_type = self.ROUTES[path]
+                status, body = "200 OK", self.render(fmt)
+            else:
+                status, content_type, body = "404 Not Found", "text/plain", b"not found\n"
+
+            head = (f"HTTP/1.1 {status}\r\nContent-Type: {content_type}\r\n"
+                    f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n").encode("latin-1")
+            writer.write(head if parts and parts[0] == "HEAD" else head + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _poll(self):
+        while True:
+            sample = self.collector.queue.get()
+            if sample is not None:
+                self.update(sample)
+            await asyncio.sleep(self.poll_interval)
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._poll_task = asyncio.ensure_future(self._poll())
+
+    async def stop(self):
+        if self._poll_task is not None:
+            self._poll_task.cancel()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def serve_forever(self):
+        await self.start()
+        try:
+            await self._server.serve_forever()
+        finally:
+            await self.stop()
@@ -0,0 +1,132 @@
+"""Скорости дискового и сетевого ввода-вывода и соединения процессов.
+
+Счетчики устройств дешевые и снимаются каждый тик системных метрик.
+Соединения - дорогой обход сокетов, поэтому они запрашиваются только
+по требованию (открыта панель), выполняются в отдельном потоке и
+кешируются на ttl секунд.
+"""
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import psutil
+
+DISK_FIELDS = ('read_bytes', 'write_bytes', 'read_count', 'write_count')
+NET_FIELDS = ('bytes_sent', 'bytes_recv', 'packets_sent', 'packets_recv', 'errin', 'errout')
+
+
+def format_rate(value):
+    """Байты в секунду в короткую строку: 512 B/s, 1.5 MB/s"""
+    for unit in ('B/s', 'KB/s', 'MB/s'):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == 'B/s' else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} GB/s"
+
+
+class CounterRates:
+    """Скорости по именованным счетчикам (диски, интерфейсы) между двумя замерами"""
+
+    def __init__(self, fields):
+        self.fields = fields
+        self._previous = {}
+        self._timestamp = None
+
+    def update(self, counters, now=None):
+        """{имя: namedtuple счетчиков} -> {имя: {поле: в секунду}}"""
+        now = time.monotonic() if now is None else now
+        interval = now - self._timestamp if self._timestamp is not None else 0.0
+        rates = {}
+        for name, values in counters.items():
+            previous = self._previous.get(name)
+            if previous is None or interval <= 0:
+                rates[name] = dict.fromkeys(self.fields, 0.0)
+                continue
+            # Счетчик мог переполниться или сброситься (переподключение устройства)
+            rates[name] = {field: max(0, getattr(values, field) - getattr(previous, field)) / interval
+                           for field in self.fields}
+        self._previous = counters
+        self._timestamp = now
+        return rates
+
+
+class IoAccounting:
+    """Скорость чтения/записи процессов по сырым io_counters, тик как у CpuAccounting"""
+
+    def __init__(self):
+        self._bytes = {}        # key -> (прочитано, записано) прошлого тика
+        self._timestamp = None
+        self._next = {}
+        self._interval = 0.0
+        self._wall = 0.0
+
+    def start(self, now=None):
+        now = time.monotonic() if now is None else now
+        self._interval = now - self._timestamp if self._timestamp is not None else 0.0
+        self._timestamp = now
+        self._wall = time.time()
+        self._next = {}
+
+    def rate(self, key, read_bytes, write_bytes):
+        """(чтение, запись) в байтах в секунду; новый процесс - среднее с момента запуска"""
+        self._next[key] = (read_bytes, write_bytes)
+        previous = self._bytes.get(key)
+        if previous is not None and self._interval > 0:
+            interval = self._interval
+        else:
+            previous, interval = (0, 0), self._wall - key[1]
+        if interval <= 0:
+            return 0.0, 0.0
+        return (max(0, read_bytes - previous[0]) / interval,
+                max(0, write_bytes - previous[1]) / interval)
+
+    def finish(self):
+        self._bytes = self._next
+        self._next = {}
+
+
+class IoMonitor:
+    """Скорости по дискам и сетевым интерфейсам и ленивый список соединений процессов"""
+
+    def __init__(self, connections_ttl=2.0):
+        self.disks = CounterRates(DISK_FIELDS)
+        self.nics = CounterRates(NET_FIELDS)
+        self.connections_ttl = connections_ttl
+        self._connections = {}  # pid -> (monotonic, [соединения])
+        self._executor = None
+
+    def sample(self):
+        """Суммарные скорости и разбивка по устройствам для SystemMonitor.sample"""
+        now = time.monotonic()
+        disks = self.disks.update(psutil.disk_io_counters(perdisk=True) or {}, now)
+        nics = self.nics.update(psutil.net_io_counters(pernic=True) or {}, now)
+        return {
+            'disk_read': sum(rates['read_bytes'] for rates in disks.values()),
+            'disk_write': sum(rates['write_bytes'] for rates in disks.values()),
+            'net_sent': sum(rates['bytes_sent'] for rates in nics.values()),
+            'net_recv': sum(rates['bytes_recv'] for rates in nics.values()),
+            'disks': disks,
+            'nics': nics,
+        }
+
+    def connections(self, pid):
+        """Future со списком соединений процесса; свежий результат берется из кеша"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="ghhs-io")
+        return self._executor.submit(self._connections_of, pid)
+
+    def _connections_of(self, pid):
+        cached = self._connections.get(pid)
+        now = time.monotonic()
+        if cached is not None and now - cached[0] < self.connections_ttl:
+            return cached[1]
+        proc = psutil.Process(pid)
+        # psutil >= 6 переименовал connections() в net_connections()
+        method = getattr(proc, 'net_connections', None) or proc.connections
+        result = [(conn.type, conn.laddr, conn.raddr, conn.status) for conn in method(kind='inet')]
+        # Кеш только для последних запросов: панель показывает один процесс
+        self._connections = {pid: (now, result)}
+        return result
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
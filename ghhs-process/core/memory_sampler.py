@@ -0,0 +1,165 @@
+"""Точная память процессов (USS/PSS/swap) в пределах бюджета времени на тик.
+
+RSS учитывает разделяемые библиотеки и страницы форкнутых воркеров у
+каждого процесса, поэтому сумма RSS сильно завышена. USS (только свои
+страницы) и PSS (разделяемые страницы поровну между владельцами) точнее,
+но их чтение - обход таблиц страниц ядром, на порядки дороже RSS.
+
+На Linux значения берутся из /proc/<pid>/smaps_rollup (одна сводка вместо
+полного smaps), на остальных платформах - из psutil memory_full_info().
+За тик обновляются только те процессы, на которые хватает бюджета,
+в порядке приоритета:
+    1. видимые в таблице строки;
+    2. крупнейшие по RSS;
+    3. процессы, чей RSS заметно изменился с прошлого замера;
+    4. еще не замеренные, затем самые давние.
+Остальные получают значение из кеша вместе с временем замера.
+"""
+import heapq
+import os
+import sys
+import time
+
+import psutil
+
+FIELDS = ('uss', 'pss', 'swap')
+SMAPS_FIELDS = {b'Pss:': 'pss', b'Private_Clean:': 'uss', b'Private_Dirty:': 'uss',
+                b'Private_Hugetlb:': 'uss', b'Swap:': 'swap'}
+PROC_ROOT = '/proc'
+
+
+class MemoryEntry:
+    """Замер одного процесса; uss is None - прочитать не удалось (нет доступа)"""
+    __slots__ = ('timestamp', 'rss', 'uss', 'pss', 'swap')
+
+    def __init__(self, timestamp, rss, uss=None, pss=0.0, swap=0.0):
+        self.timestamp = timestamp
+        self.rss = rss
+        self.uss = uss
+        self.pss = pss
+        self.swap = swap
+
+
+def read_smaps_rollup(pid, root=PROC_ROOT):
+    """{'uss', 'pss', 'swap'} в MB из /proc/<pid>/smaps_rollup"""
+    values = dict.fromkeys(FIELDS, 0.0)
+    with open(f"{root}/{pid}/smaps_rollup", 'rb') as f:
+        for line in f:
+            field = SMAPS_FIELDS.get(line.split(None, 1)[0]) if line else None
+            if field is not None:
+                values[field] += int(line.split()[1]) / 1024  # kB -> MB
+    return values
+
+
+def read_full_info(pid):
+    """Запасной путь для платформ без smaps_rollup"""
+    info = psutil.Process(pid).memory_full_info()
+    uss = info.uss / 1024 / 1024
+    return {'uss': uss, 'pss': getattr(info, 'pss', info.uss) / 1024 / 1024,
+            'swap': getattr(info, 'swap', 0) / 1024 / 1024}
+
+
+def default_reader():
+    if sys.platform.startswith('linux') and os.path.exists(f"{PROC_ROOT}/self/smaps_rollup"):
+        return read_smaps_rollup
+    return read_full_info
+
+
+class MemorySampler:
+    """Кеш {key: MemoryEntry}, обновляемый по приоритетам в пределах budget секунд на тик"""
+
+    def __init__(self, budget=0.02, reader=None, top=50, visible_age=2.0, top_age=5.0,
+                 max_age=60.0, change_threshold=0.1, retry_denied=300.0):
+        self.budget = budget
+        self.enabled = True
+        self.reader = reader or default_reader()
+        self.top = top                            # Сколько крупнейших по RSS держать свежими
+        self.visible_age = visible_age            # Допустимый возраст для видимых строк, с
+        self.top_age = top_age
+        self.max_age = max_age                    # Старше - перечитать при остатке бюджета
+        self.change_threshold = change_threshold  # Доля изменения RSS, делающая замер устаревшим
+        self.retry_denied = retry_denied
+        self.entries = {}
+        self.visible = ()                         # Ключи видимых строк, задаются окном
+        self.sampled = 0                          # Замеров за последний тик
+        self.elapsed = 0.0
+
+    def prioritize(self, keys):
+        """Видимые в таблице процессы обновляются первыми; вызывается из потока UI"""
+        self.visible = tuple(keys)
+
+    def entry(self, key):
+        return self.entries.get(key)
+
+    def _stale(self, entry, now, max_age, rss=None):
+        if entry is None:
+            return True
+        if entry.uss is None:
+            return now - entry.timestamp >= self.retry_denied
+        if now - entry.timestamp >= max_age:
+            return True
+        return rss is not None and abs(rss - entry.rss) > self.change_threshold * max(entry.rss, 1.0)
+
+    def _candidates(self, processes, now):
+        """Ключи к обновлению в порядке приоритета; без повторов, лениво по уровням"""
+        entries = self.entries
+        for key in self.visible:
+            proc = processes.get(key)
+            if proc is not None and self._stale(entries.get(key), now, self.visible_age):
+                yield key
+        for key in heapq.nlargest(self.top, processes, key=lambda k: processes[k]['memory']):
+            if self._stale(entries.get(key), now, self.top_age):
+                yield key
+        never = []
+        for key, proc in processes.items():
+            entry = entries.get(key)
+            if entry is None:
+                never.append(key)
+            elif entry.uss is not None and self._stale(entry, now, float('inf'), proc['memory']):
+                yield key
+        yield from never
+        aged = [(entry.timestamp, key) for key, entry in entries.items()
+                if key in processes and self._stale(entry, now, self.max_age)]
+        aged.sort()
+        for _, key in aged:
+            yield key
+
+    def refresh(self, processes):
+        """Обновляет часть кеша в пределах бюджета и проставляет uss/pss/swap в записи"""
+        started = time.perf_counter()
+        deadline = started + self.budget
+        now = time.time()
+        entries = self.entries
+        for key in entries.keys() - processes.keys():
+            del entries[key]
+
+        done = set()
+        sampled = 0
+        for key in self._candidates(processes, now):
+            if time.perf_counter() >= deadline:
+                break
+            if key in done:
+                continue
+            done.add(key)
+            rss = processes[key]['memory']
+            try:
+                values = self.reader(key[0])
+                entries[key] = MemoryEntry(now, rss, values['uss'], values['pss'], values['swap'])
+            except (OSError, psutil.Error):
+                # Чужой процесс без прав или уже завершился: не пробуем каждый тик
+                entries[key] = MemoryEntry(now, rss)
+            sampled += 1
+
+        for key, proc in processes.items():
+            entry = entries.get(key)
+            if entry is not None and entry.uss is not None:
+                proc['uss'] = entry.uss
+                proc['pss'] = entry.pss
+                proc['swap'] = entry.swap
+        self.sampled = sampled
+        self.elapsed = time.perf_counter() - started
+        return sampled
+
+    def coverage(self):
+        """(замерено, всего в кеше) - для отображения полноты данных"""
+        return sum(1 for entry in self.entries.values() if entry.uss is not None), len(self.entries)
@@ -0,0 +1,178 @@
+"""История метрик фиксированного размера с прореживанием по разрешениям"""
+import threading
+from array import array
+from collections import OrderedDict
+
+# (шаг в секундах, число точек): 1 с за час, 10 с за 6 часов, 1 мин за сутки
+RESOLUTIONS = ((1, 3600), (10, 2160), (60, 1440))
+# Для процессов хватает более короткой истории
+PROCESS_RESOLUTIONS = ((1, 300), (10, 360), (60, 240))
+
+
+class RingBuffer:
+    """Кольцевой буфер поверх заранее выделенного array"""
+
+    def __init__(self, capacity, typecode='d'):
+        self.capacity = capacity
+        self.data = array(typecode, bytes(array(typecode).itemsize * capacity))
+        self.head = 0   # Индекс следующей записи
+        self.count = 0
+
+    def append(self, value):
+        self.data[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def last(self, default=None):
+        if not self.count:
+            return default
+        return self.data[self.head - 1]
+
+    def segments(self):
+        """Содержимое от старых к новым как memoryview-сегменты без копирования"""
+        view = memoryview(self.data)
+        if self.count < self.capacity:
+            return (view[:self.count],)
+        return (view[self.head:], view[:self.head])
+
+    def __iter__(self):
+        for segment in self.segments():
+            yield from segment
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        return self.data.itemsize * self.capacity
+
+
+class Rollup:
+    """Агрегаты min/avg/max по корзинам фиксированной длины"""
+
+    def __init__(self, step, capacity):
+        self.step = step
+        self.times = RingBuffer(capacity)
+        self.mins = RingBuffer(capacity)
+        self.avgs = RingBuffer(capacity)
+        self.maxs = RingBuffer(capacity)
+        self._bucket = None
+        self._min = self._max = self._sum = 0.0
+        self._count = 0
+
+    def add(self, timestamp, value):
+        bucket = timestamp - timestamp % self.step
+        if bucket != self._bucket:
+            self._flush()
+            self._bucket = bucket
+            self._min = self._max = value
+            self._sum = 0.0
+            self._count = 0
+        elif value < self._min:
+            self._min = value
+        elif value > self._max:
+            self._max = value
+        self._sum += value
+        self._count += 1
+
+    def _flush(self):
+        if self._count:
+            self.times.append(self._bucket)
+            self.mins.append(self._min)
+            self.avgs.append(self._sum / self._count)
+            self.maxs.append(self._max)
+
+    def query(self):
+        """(times, mins, avgs, maxs) - каждый как кортеж memoryview-сегментов"""
+        return (self.times.segments(), self.mins.segments(),
+                self.avgs.segments(), self.maxs.segments())
+
+    @property
+    def nbytes(self):
+        return 4 * self.times.nbytes
+
+
+class MetricSeries:
+    """Сырые последние значения плюс прореженные агрегаты одной метрики"""
+
+    def __init__(self, resolutions=RESOLUTIONS, raw_capacity=600):
+        self.raw_times = RingBuffer(raw_capacity)
+        self.raw = RingBuffer(raw_capacity)
+        self.rollups = {step: Rollup(step, capacity) for step, capacity in resolutions}
+
+    def add(self, timestamp, value):
+        self.raw_times.append(timestamp)
+        self.raw.append(value)
+        for rollup in self.rollups.values():
+            rollup.add(timestamp, value)
+
+    def latest(self, default=None):
+        return self.raw.last(default)
+
+    def query(self, resolution=None):
+        """Без разрешения - сырые (times, values), иначе агрегаты Rollup.query()"""
+        if resolution is None:
+            return self.raw_times.segments(), self.raw.segments()
+        return self.rollups[resolution].query()
+
+    @property
+    def nbytes(self):
+        return (self.raw_times.nbytes + self.raw.nbytes
+                + sum(rollup.nbytes for rollup in self.rollups.values()))
+
+
+class MetricHistory:
+    """Хранилище истории системных метрик и CPU/RSS топ-N процессов"""
+
+    def __init__(self, top_processes=10, max_processes=50):
+        self.series = {}
+        self.processes = OrderedDict()  # key -> {'cpu': MetricSeries, 'memory': MetricSeries}
+        self.top_processes = top_processes
+        self.max_processes = max_processes
+        self.lock = threading.Lock()  # Защищает только словари серий, не данные буферов
+
+    def record(self, name, timestamp, value):
+        series = self.series.get(name)
+        if series is None:
+            with self.lock:
+                series = self.series[name] = MetricSeries()
+        series.add(timestamp, value)
+
+    def record_processes(self, timestamp, snapshot):
+        """Пишет CPU/RSS топ-N процессов по CPU из колоночного снимка"""
+        if not self.top_processes:
+            return
+        cpu = snapshot.columns['cpu']
+        memory = snapshot.columns['memory']
+        with self.lock:
+            for index in snapshot.top_k('cpu', self.top_processes):
+                key = snapshot.key(index)
+                series = self.processes.get(key)
+                if series is None:
+                    series = self.processes[key] = {
+                        'cpu': MetricSeries(PROCESS_RESOLUTIONS, raw_capacity=120),
+                        'memory': MetricSeries(PROCESS_RESOLUTIONS, raw_capacity=120),
+                    }
+                else:
+                    self.processes.move_to_end(key)
+                series['cpu'].add(timestamp, cpu[index])
+                series['memory'].add(timestamp, memory[index])
+            # Вытесняем процессы, дольше всех не попадавшие в топ
+            while len(self.processes) > self.max_processes:
+                self.processes.popitem(last=False)
+
+    def get(self, name):
+        return self.series.get(name)
+
+    def get_process(self, key):
+        return self.processes.get(key)
+
+    @property
+    def nbytes(self):
+        """Объем буферов в байтах - ограничен заранее, не растет со временем"""
+        with self.lock:
+            total = sum(series.nbytes for series in self.series.values())
+            for series in self.processes.values():
+                total += series['cpu'].nbytes + series['memory'].nbytes
+        return total
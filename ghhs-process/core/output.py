@@ -0,0 +1,99 @@
+"""Потоковая запись снимков в NDJSON/CSV с буферизацией пачками"""
+import csv
+import io
+import json
+import time
+
+DEFAULT_FIELDS = ('pid', 'name', 'cpu', 'memory', 'threads', 'user', 'status')
+
+
+class BatchWriter:
+    """Копит строки в памяти и пишет их в поток одной операцией.
+
+    Сброс происходит, когда накопилось batch_size строк или прошло
+    flush_interval секунд с прошлого сброса, поэтому запись раз в секунду
+    стоит одного write() в несколько минут.
+    """
+
+    def __init__(self, stream, batch_size=1000, flush_interval=30.0):
+        self.stream = stream
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._lines = []
+        self._last_flush = time.monotonic()
+
+    def write_line(self, line):
+        self._lines.append(line)
+        if (len(self._lines) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval):
+            self.flush()
+
+    def flush(self):
+        if self._lines:
+            self.stream.write(''.join(self._lines))
+            self._lines = []
+        self.stream.flush()
+        self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+
+
+class NdjsonWriter(BatchWriter):
+    """Одна JSON-строка на событие: системные метрики, процессы или изменения"""
+
+    def __init__(self, stream, fields=DEFAULT_FIELDS, **kwargs):
+        super().__init__(stream, **kwargs)
+        self.fields = fields
+
+    def _emit(self, record):
+        self.write_line(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+
+    def write_system(self, timestamp, system):
+        self._emit({'type': 'system', 'ts': round(timestamp, 3), **system})
+
+    def write_process(self, timestamp, proc, event='process', changed=None):
+        record = {'type': event, 'ts': round(timestamp, 3)}
+        record.update((field, proc[field]) for field in self.fields)
+        if changed:
+            record['changed'] = list(changed)
+        self._emit(record)
+
+
+class CsvWriter(BatchWriter):
+    """CSV по процессам; системные метрики в CSV не пишутся"""
+
+    def __init__(self, stream, fields=DEFAULT_FIELDS, **kwargs):
+        super().__init__(stream, **kwargs)
+        self.fields = fields
+        self._buffer = io.StringIO()
+        self._csv = csv.writer(self._buffer, lineterminator='\n')
+        self._write_row(['ts', 'event'] + list(fields) + ['changed'])
+
+    def _write_row(self, row):
+        self._csv.writerow(row)
+        self.write_line(self._buffer.getvalue())
+        self._buffer.seek(0)
+        self._buffer.truncate()
+
+    def write_system(self, timestamp, system):
+        pass
+
+    def write_process(self, timestamp, proc, event='process', changed=None):
+        row = [round(timestamp, 3), event]
+        row.extend(proc[field] for field in self.fields)
+        row.append(' '.join(changed) if changed else '')
+        self._write_row(row)
+
+
+WRITERS = {'ndjson': NdjsonWriter, 'csv': CsvWriter}
+
+
+def write_delta(writer, timestamp, delta):
+    """Пишет дельту снимка как события added/removed/changed"""
+    for proc in delta.added.values():
+        writer.write_process(timestamp, proc, 'added')
+    for proc in delta.removed.values():
+        writer.write_process(timestamp, proc, 'removed')
+    for proc, fields in delta.changed.values():
+        writer.write_process(timestamp, proc, 'changed', fields)
@@ -0,0 +1,256 @@
+"""Детали процесса по разделам: загрузка в фоне, кеш с TTL и отмена устаревших запросов.
+
+Дешевые поля берутся из снимка сборщика и показываются сразу. Остальное
+разбито на разделы, каждый грузится отдельным запросом в пуле потоков
+только когда его раскрыли. Результат (или ошибка) кешируется по
+(pid, create_time) и разделу на TTL раздела, поэтому повторный выбор того
+же процесса ничего не запрашивает. Смена выбора отменяет еще не начатые
+запросы; уже начатые дорабатывают в фоне и пополняют кеш.
+"""
+import socket
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import psutil
+
+from core.process_manager import CREATE_TIME_TOLERANCE
+
+# Результат загрузки раздела: ровно одно из value/error не None
+DetailsEntry = namedtuple('DetailsEntry', ['timestamp', 'value', 'error'])
+
+MAX_LINES = 200  # Строк на раздел в панели
+
+
+class ProcessGone(Exception):
+    """PID свободен или занят другим процессом"""
+
+
+def describe_error(error):
+    """Понятная причина вместо общего N/A"""
+    if isinstance(error, psutil.ZombieProcess):
+        return "процесс-зомби"
+    if isinstance(error, (psutil.NoSuchProcess, ProcessGone)):
+        return "процесс завершился"
+    if isinstance(error, psutil.AccessDenied):
+        return "отказано в доступе (нужны права администратора)"
+    if isinstance(error, NotImplementedError):
+        return "не поддерживается на этой платформе"
+    return f"{error.__class__.__name__}: {error}"
+
+
+# --- Загрузчики разделов: (psutil.Process, ключ, AttributeCache) -> значение ---
+
+def _load_basic(proc, key, cache):
+    with proc.oneshot():
+        memory = proc.memory_info()
+        times = proc.cpu_times()
+        result = {
+            'ppid': proc.ppid(),
+            'started': key[1],
+            'nice': proc.nice(),
+            'rss': memory.rss,
+            'vms': memory.vms,
+            'cpu_user': times.user,
+            'cpu_system': times.system,
+        }
+        # Путь и каталог чужого процесса закрыты без прав - недоступно только это поле
+        try:
+            result['exe'] = cache.get(key, 'exe', proc.exe) or None
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            result['exe'] = None
+        try:
+            result['cwd'] = proc.cwd()
+        except (psutil.AccessDenied, psutil.ZombieProcess):
+            result['cwd'] = None
+        if hasattr(proc, 'num_fds'):
+            result['handles'] = proc.num_fds()
+        elif hasattr(proc, 'num_handles'):
+            result['handles'] = proc.num_handles()
+    return result
+
+
+def _load_cmdline(proc, key, cache):
+    return cache.get(key, 'cmdline', proc.cmdline)
+
+
+def _load_environ(proc, key, cache):
+    return sorted(proc.environ().items())
+
+
+def _load_open_files(proc, key, cache):
+    return sorted((f.path, f.fd) for f in proc.open_files())
+
+
+def _load_connections(proc, key, cache):
+    # psutil >= 6 переименовал connections() в net_connections()
+    method = getattr(proc, 'net_connections', None) or proc.connections
+    return [(conn.type, conn.laddr, conn.raddr, conn.status) for conn in method(kind='inet')]
+
+
+def _load_memory_maps(proc, key, cache):
+    maps = [(m.path or '[anon]', m.rss) for m in proc.memory_maps(grouped=True)]
+    maps.sort(key=lambda item: item[1], reverse=True)
+    return maps
+
+
+def _load_threads(proc, key, cache):
+    return sorted(((t.id, t.user_time, t.system_time) for t in proc.threads()),
+                  key=lambda item: item[1] + item[2], reverse=True)
+
+
+# --- Форматирование разделов в строки панели ---
+
+def _mb(value):
+    return f"{value / 1024 / 1024:.1f} MB"
+
+
+def _format_basic(value):
+    lines = [f"Путь: {value['exe'] or 'N/A'}",
+             f"Рабочий каталог: {value['cwd'] or 'N/A'}",
+             f"Родитель: PID {value['ppid']}",
+             f"Запущен: {datetime.fromtimestamp(value['started']).strftime('%Y-%m-%d %H:%M:%S')}",
+             f"Приоритет: {value['nice']}",
+             f"Память: RSS {_mb(value['rss'])}, виртуальная {_mb(value['vms'])}",
+             f"CPU-время: user {value['cpu_user']:.1f} с, system {value['cpu_system']:.1f} с"]
+    if 'handles' in value:
+        lines.append(f"Дескрипторы: {value['handles']}")
+    return lines
+
+
+def _format_cmdline(value):
+    return [' '.join(value) or 'N/A']
+
+
+def _format_environ(value):
+    return [f"{name}={text}" for name, text in value]
+
+
+def _format_open_files(value):
+    return [f"{fd:>5}  {path}" for path, fd in value]
+
+
+def _format_connections(value):
+    lines = []
+    for kind, laddr, raddr, status in value:
+        local = f"{laddr[0]}:{laddr[1]}" if laddr else "-"
+        remote = f"{raddr[0]}:{raddr[1]}" if raddr else "-"
+        protocol = "tcp" if kind == socket.SOCK_STREAM else "udp"
+        lines.append(f"{protocol} {local:<28} -> {remote:<28} {status}")
+    return lines
+
+
+def _format_memory_maps(value):
+    return [f"{_mb(rss):>12}  {path}" for path, rss in value]
+
+
+def _format_threads(value):
+    return [f"TID {tid:<8} user {user:8.2f} с  system {system:8.2f} с" for tid, user, system in value]
+
+
+# Раздел -> (заголовок, TTL в секундах или None - не устаревает, загрузчик, форматтер)
+SECTIONS = OrderedDict([
+    ('basic', ("Основное", 2.0, _load_basic, _format_basic)),
+    ('cmdline', ("Командная строка", None, _load_cmdline, _format_cmdline)),
+    ('environ', ("Окружение", 30.0, _load_environ, _format_environ)),
+    ('open_files', ("Открытые файлы", 5.0, _load_open_files, _format_open_files)),
+    ('connections', ("Соединения", 2.0, _load_connections, _format_connections)),
+    ('memory_maps', ("Карта памяти", 10.0, _load_memory_maps, _format_memory_maps)),
+    ('threads', ("Потоки", 2.0, _load_threads, _format_threads)),
+])
+# Ошибки доступа не исчезают сами - их перезапрос реже
+ERROR_TTL = 10.0
+
+
+def format_section(section, entry):
+    """Строки раздела для панели: значение, причина ошибки или пусто"""
+    if entry.error is not None:
+        return [f"Недоступно: {describe_error(entry.error)}"]
+    lines = SECTIONS[section][3](entry.value)
+    if not lines:
+        return ["(пусто)"]
+    if len(lines) > MAX_LINES:
+        lines = lines[:MAX_LINES] + [f"... и еще {len(lines) - MAX_LINES}"]
+    return lines
+
+
+class ProcessDetails:
+    """Кеш разделов деталей {(key, раздел): DetailsEntry} и пул их загрузки"""
+
+    def __init__(self, attributes, workers=4, max_entries=512):
+        self.attributes = attributes  # AttributeCache бэкенда: exe/cmdline уже могли быть загружены
+        self.workers = workers
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._inflight = {}           # (key, раздел) -> Future
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def lookup(self, key, section):
+        """Последний результат раздела любой давности или None"""
+        with self._lock:
+            return self._entries.get((key, section))
+
+    def is_fresh(self, section, entry):
+        if entry is None:
+            return False
+        ttl = ERROR_TTL if entry.error is not None else SECTIONS[section][1]
+        return ttl is None or time.monotonic() - entry.timestamp < ttl
+
+    def fetch(self, key, section):
+        """Future с DetailsEntry; свежий кеш и уже идущая загрузка не запрашиваются повторно"""
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="ghhs-details")
+        with self._lock:
+            future = self._inflight.get((key, section))
+            if future is not None and not future.cancelled():
+                return future
+            future = self._executor.submit(self._load, key, section)
+            self._inflight[(key, section)] = future
+        return future
+
+    def cancel_pending(self, keep=None):
+        """Отменяет не начатые загрузки всех процессов, кроме keep"""
+        with self._lock:
+            for (key, section), future in list(self._inflight.items()):
+                if key != keep and future.cancel():
+                    del self._inflight[(key, section)]
+
+    def _load(self, key, section):
+        cached = self.lookup(key, section)
+        if self.is_fresh(section, cached):
+            self._finish(key, section, None)
+            return cached
+        loader = SECTIONS[section][2]
+        try:
+            proc = psutil.Process(key[0])
+            # PID мог освободиться и достаться другому процессу
+            if abs(proc.create_time() - key[1]) > CREATE_TIME_TOLERANCE:
+                raise ProcessGone(key[0])
+            entry = DetailsEntry(time.monotonic(), loader(proc, key, self.attributes), None)
+        except Exception as e:
+            entry = DetailsEntry(time.monotonic(), None, e)
+        self._finish(key, section, entry)
+        return entry
+
+    def _finish(self, key, section, entry):
+        with self._lock:
+            self._inflight.pop((key, section), None)
+            if entry is None:
+                return
+            self._entries[(key, section)] = entry
+            self._entries.move_to_end((key, section))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def forget(self, keys):
+        """Удаляет кеш завершившихся процессов"""
+        with self._lock:
+            for cache_key in [cache_key for cache_key in self._entries if cache_key[0] in keys]:
+                del self._entries[cache_key]
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
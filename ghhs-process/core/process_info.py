@@ -0,0 +1,314 @@
+"""Структуры данных снимков процессов"""
+import heapq
+from array import array
+
+# Поля процесса, изменения которых отслеживаются между поколениями снимка
+TRACKED_FIELDS = ('ppid', 'name', 'cpu', 'memory', 'io_read', 'io_write', 'uss', 'pss', 'swap',
+                  'threads', 'user', 'status')
+
+
+def process_key(proc):
+    """Ключ процесса: (pid, create_time) не путается при переиспользовании PID"""
+    return (proc['pid'], proc['create_time'])
+
+
+# Таблица строк пересобирается, когда живые строки (имена текущих процессов)
+# составляют меньше STRING_LIVE_SHARE от нее и она длиннее STRING_COMPACT_MIN
+STRING_COMPACT_MIN = 4096
+STRING_LIVE_SHARE = 0.5
+
+
+class SnapshotDelta:
+    """Изменения между двумя поколениями снимка процессов"""
+    __slots__ = ('generation', 'added', 'removed', 'changed')
+
+    def __init__(self, generation, added, removed, changed):
+        self.generation = generation
+        self.added = added        # {key: proc}
+        self.removed = removed    # {key: proc} - записи из предыдущего поколения
+        self.changed = changed    # {key: (proc, (поле, ...))}
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def __repr__(self):
+        return (f"SnapshotDelta(generation={self.generation}, added={len(self.added)}, "
+                f"removed={len(self.removed)}, changed={len(self.changed)})")
+
+
+def diff_snapshots(previous, current, generation=0, fields=TRACKED_FIELDS):
+    """Сравнивает два поколения {key: proc} и возвращает SnapshotDelta"""
+    added = {}
+    changed = {}
+    for key, proc in current.items():
+        old = previous.get(key)
+        if old is None:
+            added[key] = proc
+            continue
+        changed_fields = tuple(field for field in fields if old[field] != proc[field])
+        if changed_fields:
+            changed[key] = (proc, changed_fields)
+
+    removed = {key: previous[key] for key in previous.keys() - current.keys()}
+    return SnapshotDelta(generation, added, removed, changed)
+
+
+def merge_deltas(older, newer):
+    """Склеивает две последовательные дельты в одну (older, затем newer)"""
+    added = dict(older.added)
+    removed = dict(older.removed)
+    changed = dict(older.changed)
+
+    for key, proc in newer.removed.items():
+        if added.pop(key, None) is None:
+            changed.pop(key, None)
+            removed[key] = proc
+
+    for key, proc in newer.added.items():
+        if key in removed:
+            # Процесс с тем же ключом вернулся - для потребителя это изменение
+            removed.pop(key)
+            changed[key] = (proc, TRACKED_FIELDS)
+        else:
+            added[key] = proc
+
+    for key, (proc, fields) in newer.changed.items():
+        if key in added:
+            added[key] = proc
+        elif key in changed:
+            old_fields = changed[key][1]
+            changed[key] = (proc, old_fields + tuple(f for f in fields if f not in old_fields))
+        else:
+            changed[key] = (proc, fields)
+
+    return SnapshotDelta(newer.generation, added, removed, changed)
+
+
+class StringTable:
+    """Интернирование строк: одна копия каждого имени/пользователя/статуса.
+
+    Таблица только растет, id строк стабильны. Освобождает место
+    ProcessSnapshot.compacted: строится новая таблица, старая не меняется,
+    поэтому снимки, уже отданные потребителям, остаются корректными.
+    """
+
+    def __init__(self):
+        self.strings = []
+        self._ids = {}
+
+    def intern(self, value):
+        string_id = self._ids.get(value)
+        if string_id is None:
+            string_id = self._ids[value] = len(self.strings)
+            self.strings.append(value)
+        return string_id
+
+    def __getitem__(self, string_id):
+        return self.strings[string_id]
+
+    def __len__(self):
+        return len(self.strings)
+
+
+class ProcessSnapshot:
+    """Колоночный снимок процессов: массивы вместо словаря на каждый процесс.
+
+    Сортировка, фильтрация и top-K возвращают массивы индексов (представления),
+    записи-словари собираются только для тех строк, которые реально показываются.
+    """
+
+    NUMERIC = {'pid': 'q', 'ppid': 'q', 'create_time': 'd', 'cpu': 'd', 'memory': 'd',
+               'io_read': 'd', 'io_write': 'd', 'uss': 'd', 'pss': 'd', 'swap': 'd', 'threads': 'l'}
+    STRINGS = ('name', 'user', 'status')
+
+    def __init__(self, strings=None):
+        self.strings = strings if strings is not None else StringTable()
+        self.columns = {name: array(code) for name, code in self.NUMERIC.items()}
+        for name in self.STRINGS:
+            self.columns[name] = array('l')
+        self._positions = None
+        self._pid_positions = None
+
+    @classmethod
+    def from_processes(cls, processes, strings=None):
+        """Строит снимок из {key: proc}; таблицу строк можно переиспользовать между тиками"""
+        snapshot = cls(strings)
+        intern = snapshot.strings.intern
+        columns = snapshot.columns
+        for field in cls.NUMERIC:
+            columns[field].extend(proc[field] for proc in processes.values())
+        for field in cls.STRINGS:
+            columns[field].extend(intern(proc[field]) for proc in processes.values())
+        return snapshot
+
+    def apply_delta(self, delta):
+        """Снимок следующего поколения по дельте к этому.
+
+        Колонки копируются целиком (memcpy) и правятся только в изменившихся,
+        завершившихся и новых строках вместо сборки из словарей процессов.
+        Сам снимок не меняется: его еще может читать поток интерфейса.
+        """
+        snapshot = ProcessSnapshot(self.strings)
+        intern = self.strings.intern
+        positions = self.positions()
+        columns = snapshot.columns
+        for field, values in self.columns.items():
+            columns[field] = values[:]
+        added = list(delta.added.items())
+        for key, (proc, fields) in delta.changed.items():
+            i = positions.get(key)
+            if i is None:
+                added.append((key, proc))
+                continue
+            for field in fields:
+                column = columns.get(field)
+                if column is not None:
+                    column[i] = intern(proc[field]) if field in self.STRINGS else proc[field]
+        new_positions = dict(positions)
+        # Завершившиеся строки замещаются последней строкой: по убыванию позиций
+        # последняя строка всегда живая, порядок строк снимка ничего не значит
+        dead = sorted((new_positions.pop(key) for key in delta.removed if key in new_positions),
+                      reverse=True)
+        pids, create_times = columns['pid'], columns['create_time']
+        last = len(self) - 1
+        for i in dead:
+            if i != last:
+                for column in columns.values():
+                    column[i] = column[last]
+                new_positions[(pids[i], create_times[i])] = i
+            for column in columns.values():
+                column.pop()
+            last -= 1
+        if added:
+            start = len(snapshot)
+            for field in self.NUMERIC:
+                columns[field].extend(proc[field] for _, proc in added)
+            for field in self.STRINGS:
+                columns[field].extend(intern(proc[field]) for _, proc in added)
+            new_positions.update((key, start + j) for j, (key, _) in enumerate(added))
+        snapshot._positions = new_positions
+        return snapshot
+
+    def live_strings(self):
+        """id строк таблицы, на которые ссылаются строки снимка"""
+        live = set()
+        for field in self.STRINGS:
+            live.update(self.columns[field])
+        return live
+
+    def needs_compaction(self, live=None):
+        strings = len(self.strings)
+        if strings <= STRING_COMPACT_MIN:
+            return False
+        if live is None:
+            live = self.live_strings()
+        return len(live) < strings * STRING_LIVE_SHARE
+
+    def compacted(self, live=None):
+        """Копия снимка с новой таблицей только из живых строк.
+
+        Числовые колонки общие с исходным снимком: опубликованные снимки не
+        меняются. Кеши по id строк (TextCondition) сбрасываются по смене таблицы.
+        """
+        if live is None:
+            live = self.live_strings()
+        strings = StringTable()
+        old = self.strings.strings
+        remap = {string_id: strings.intern(old[string_id]) for string_id in sorted(live)}
+        snapshot = ProcessSnapshot(strings)
+        snapshot.columns = dict(self.columns)
+        for field in self.STRINGS:
+            snapshot.columns[field] = array('l', map(remap.__getitem__, self.columns[field]))
+        snapshot._positions = self._positions
+        snapshot._pid_positions = self._pid_positions
+        return snapshot
+
+    def __len__(self):
+        return len(self.columns['pid'])
+
+    def key(self, index):
+        return (self.columns['pid'][index], self.columns['create_time'][index])
+
+    def positions(self):
+        """{key: индекс строки}; строится один раз на снимок при первом обращении"""
+        if self._positions is None:
+            self._positions = {key: i for i, key in enumerate(
+                zip(self.columns['pid'], self.columns['create_time']))}
+        return self._positions
+
+    def pid_positions(self):
+        """{pid: индекс строки}; в пределах одного снимка PID уникален"""
+        if self._pid_positions is None:
+            self._pid_positions = dict(zip(self.columns['pid'], range(len(self))))
+        return self._pid_positions
+
+    def record(self, index):
+        """Запись процесса в привычном виде словаря"""
+        columns = self.columns
+        proc = {field: columns[field][index] for field in self.NUMERIC}
+        for field in self.STRINGS:
+            proc[field] = self.strings[columns[field][index]]
+        return proc
+
+    def _sort_key(self, column):
+        values = self.columns[column]
+        if column in self.STRINGS:
+            strings = self.strings.strings
+            return lambda i: strings[values[i]]
+        return values.__getitem__
+
+    def all(self):
+        return array('l', range(len(self)))
+
+    def argsort(self, column, reverse=False, indices=None):
+        """Индексы строк, упорядоченные по колонке (сортировка устойчивая)"""
+        if indices is None:
+            indices = range(len(self))
+        return array('l', sorted(indices, key=self._sort_key(column), reverse=reverse))
+
+    def top_k(self, column, k, indices=None):
+        """k строк с наибольшим значением колонки без полной сортировки"""
+        if indices is None:
+            indices = range(len(self))
+        return array('l', heapq.nlargest(k, indices, key=self._sort_key(column)))
+
+    def where(self, column, predicate, indices=None):
+        """Фильтр по колонке; для строк предикат вызывается один раз на уникальное значение"""
+        values = self.columns[column]
+        if column in self.STRINGS:
+            # Только строки, которые встречаются в выборке, а не вся таблица с мертвыми именами
+            strings = self.strings.strings
+            present = set(values) if indices is None else {values[i] for i in indices}
+            if indices is None:
+                indices = range(len(self))
+            matched = {string_id for string_id in present if predicate(strings[string_id])}
+            return array('l', (i for i in indices if values[i] in matched))
+        if indices is None:
+            indices = range(len(self))
+        return array('l', (i for i in indices if predicate(values[i])))
+
+    def view(self, indices=None):
+        return SnapshotView(self, self.all() if indices is None else indices)
+
+
+class SnapshotView:
+    """Последовательность записей поверх массива индексов; словари собираются лениво"""
+    __slots__ = ('snapshot', 'indices')
+
+    def __init__(self, snapshot, indices):
+        self.snapshot = snapshot
+        self.indices = indices
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __getitem__(self, position):
+        return self.snapshot.record(self.indices[position])
+
+    def key(self, position):
+        """Ключ процесса строки без сборки записи"""
+        return self.snapshot.key(self.indices[position])
+
+    def __iter__(self):
+        record = self.snapshot.record
+        return (record(i) for i in self.indices)
@@ -1,52 +1,274 @@
+import heapq
+import time
 import psutil
 import ctypes
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
+from core.process_info import diff_snapshots, ProcessSnapshot, StringTable
+from core.backends import default_backend
+from core.memory_sampler import MemorySampler
+from core.grouping import CgroupLabeler
+from core.profiling import PROFILER
+
+# Действия над группой процессов (bulk_action)
+ACTIONS = ('kill', 'terminate', 'kill_tree', 'suspend', 'resume', 'nice')
+
+# Уровни приоритета для действия 'nice': классы приоритета на Windows, nice на POSIX
+PRIORITIES = {
+    'low': getattr(psutil, 'BELOW_NORMAL_PRIORITY_CLASS', 10),
+    'normal': getattr(psutil, 'NORMAL_PRIORITY_CLASS', 0),
+    'high': getattr(psutil, 'ABOVE_NORMAL_PRIORITY_CLASS', -5),
+}
+
+# Допуск при сверке create_time: разные способы вычисления дают расхождение в долях тика
+CREATE_TIME_TOLERANCE = 0.05
+
+# Итог действия над одним процессом: error равен None при успехе
+ActionResult = namedtuple('ActionResult', ['key', 'error'])
+
+
+class BulkResult:
+    """Результаты действия над группой процессов"""
+
+    def __init__(self, action, results, forced=(), elapsed=0.0):
+        self.action = action
+        self.results = results     # [ActionResult]
+        self.forced = list(forced)  # Ключи, добитые kill после истечения grace
+        self.elapsed = elapsed
+
+    @property
+    def succeeded(self):
+        return [result.key for result in self.results if result.error is None]
+
+    @property
+    def failed(self):
+        return [result for result in self.results if result.error is not None]
+
+    def summary(self, limit=10):
+        """Текст для одного итогового сообщения"""
+        lines = [f"{self.action}: успешно {len(self.succeeded)} из {len(self.results)} "
+                 f"за {self.elapsed:.2f} с"]
+        if self.forced:
+            lines.append(f"Принудительно завершено после ожидания: {len(self.forced)}")
+        failed = self.failed
+        for (pid, _), error in failed[:limit]:
+            lines.append(f"PID {pid}: {error}")
+        if len(failed) > limit:
+            lines.append(f"... и еще {len(failed) - limit}")
+        return "\n".join(lines)
+
+
 class ProcessManager:
-    def get_processes_fast(self):
+    def __init__(self, backend=None, workers=8):
+        self.backend = backend or default_backend()
+        self.attributes = self.backend.attributes  # Кеш неизменяемых атрибутов
+        self.processes = {}  # Текущее поколение: {(pid, create_time): proc}
+        self.generation = 0
+        self.strings = StringTable()  # Общая таблица имен между поколениями (пересобирается в snapshot)
+        self._snapshot = None         # (поколение, снимок): следующий снимок строится по дельте
+        self._delta = None            # Дельта последнего update()
+        self._strings_checked = 0     # Длина таблицы строк на последней проверке живой доли
+        self.memory = None            # MemorySampler, пока включены колонки USS/PSS
+        self.cgroups = None           # Метка cgroup по (key, proc), пока включена группировка по cgroup
+        self.workers = workers
+        self._workers = None      # Пул для действий над отдельными процессами
+        self._coordinator = None  # Поток, собирающий итог группового действия
+    
+    def collect(self):
+        """Один проход по процессам: {(pid, create_time): proc}"""
+        return self.backend.collect()
+    
+    def set_io_tracking(self, enabled):
+        """Включает скорости ввода-вывода процессов со следующего прохода сбора"""
+        self.backend.io = enabled
+    
+    def set_memory_sampling(self, enabled, budget=None):
+        """Включает USS/PSS/swap со следующего прохода; кеш замеров сохраняется между включениями"""
+        if enabled and self.memory is None:
+            self.memory = MemorySampler()
+        if self.memory is not None:
+            self.memory.enabled = enabled
+            if budget is not None:
+                self.memory.budget = budget
+    
+    def set_cgroup_labels(self, enabled):
+        """Проставляет proc['cgroup'] со следующего прохода: файл cgroup читается в потоке
+        сборщика и перечитывается по сроку CgroupLabeler"""
+        self.cgroups = CgroupLabeler() if enabled else None
+    
+    def update(self):
+        """Собирает новое поколение и возвращает дельту относительно предыдущего"""
+        with PROFILER.span('collect'):
+            current = self.collect()
+            labeler = self.cgroups
+            if labeler is not None:
+                now = time.monotonic()
+                for key, proc in current.items():
+                    proc['cgroup'] = labeler(key, proc, now)
+        if self.memory is not None and self.memory.enabled:
+            with PROFILER.span('memory'):
+                self.memory.refresh(current)
+        self.generation += 1
+        with PROFILER.span('diff'):
+            delta = diff_snapshots(self.processes, current, self.generation)
+        self.processes = current
+        self._delta = delta
+        self.attributes.forget(delta.removed)
+        if labeler is not None:
+            labeler.forget(delta.removed)
+        return delta
+    
+    def snapshot(self):
+        """Колоночный снимок текущего поколения.
+
+        Колонки живут между тиками: если предыдущий снимок построен для
+        прошлого поколения, новый получается из него по дельте, а не
+        собирается заново из словарей процессов.
+        """
+        with PROFILER.span('snapshot'):
+            previous = self._snapshot
+            if previous is not None and previous[0] == self.generation:
+                return previous[1]
+            if previous is not None and previous[0] == self.generation - 1 and self._delta is not None:
+                snapshot = previous[1].apply_delta(self._delta)
+            else:
+                snapshot = ProcessSnapshot.from_processes(self.processes, self.strings)
+            if len(self.strings) > self._strings_checked:
+                # Имена завершившихся процессов остаются в таблице: пересобираем ее,
+                # когда живых строк становится меньше порога
+                live = snapshot.live_strings()
+                if snapshot.needs_compaction(live):
+                    snapshot = snapshot.compacted(live)
+                    self.strings = snapshot.strings
+                self._strings_checked = len(self.strings)
+            self._snapshot = (self.generation, snapshot)
+            return snapshot
+    
+    def get_processes_fast(self, limit=1000):
         """Быстрое получение списка процессов"""
-        processes = []
-        for proc in psutil.process_iter(['pid', 'name', 'cpu_percent', 'memory_info', 
-                                        'num_threads', 'username', 'status']):
-            try:
-                # Быстрая проверка без детальной информации
-                memory_mb = proc.info['memory_info'].rss / 1024 / 1024 if proc.info['memory_info'] else 0
-                processes.append({
-                    'pid': proc.info['pid'],
-                    'name': proc.info['name'],
-                    'cpu': proc.info['cpu_percent'] or 0,
-                    'memory': memory_mb,
-                    'threads': proc.info['num_threads'],
-                    'user': proc.info['username'] or 'SYSTEM',
-                    'status': proc.info['status']
-                })
-            except (psutil.NoSuchProcess, psutil.AccessDenied):
-                continue
-        
-        # Сортируем по использованию CPU
-        return sorted(processes, key=lambda x: x['cpu'], reverse=True)[:1000]  # Лимит
+        self.update()
+        # Топ по использованию CPU без полной сортировки
+        return heapq.nlargest(limit, self.processes.values(), key=lambda x: x['cpu'])
     
     def get_process_details_fast(self, pid):
         """Быстрая детальная информация"""
         try:
             proc = psutil.Process(pid)
             with proc.oneshot():  # Оптимизация - получаем все сразу
+                # Неизменяемые атрибуты берем из кеша по (pid, create_time)
+                key = (pid, proc.create_time())
+                cache = self.attributes
+                # Свежий psutil.Process.cpu_percent() всегда 0 - берем значение из учета сборщика
+                current = self.processes.get(key)
+                cpu = current['cpu'] if current else 0.0
                 return {
                     'pid': pid,
                     'name': proc.name(),
-                    'user': proc.username(),
-                    'exe': proc.exe() or 'N/A',
-                    'cpu': proc.cpu_percent(),
+                    'user': cache.get(key, 'user', proc.username),
+                    'exe': cache.get(key, 'exe', proc.exe) or 'N/A',
+                    'cmdline': ' '.join(cache.get(key, 'cmdline', proc.cmdline)) or 'N/A',
+                    'cpu': cpu,
+                    'cpu_norm': self.backend.cpu.normalized(cpu),
                     'memory': proc.memory_info().rss / 1024 / 1024,
                     'threads': proc.num_threads(),
                     'status': proc.status()
                 }
         except:
-            return {'pid': pid, 'name': 'N/A', 'user': 'N/A', 'exe': 'N/A', 
-                   'cpu': 0, 'memory': 0, 'threads': 0, 'status': 'N/A'}
+            return {'pid': pid, 'name': 'N/A', 'user': 'N/A', 'exe': 'N/A', 'cmdline': 'N/A',
+                   'cpu': 0, 'cpu_norm': 0, 'memory': 0, 'threads': 0, 'status': 'N/A'}
     
     def kill_process(self, pid):
         try:
             psutil.Process(pid).kill()
         except Exception as e:
-            raise Exception(f"Не удалось завершить процесс: {str(e)}")
\ No newline at end of file
+            raise Exception(f"Не удалось завершить процесс: {str(e)}")
+    
+    # --- Групповые действия ---
+    
+    def bulk_action(self, action, keys, value=None, grace=3.0):
+        """Запускает действие над процессами {(pid, create_time)} в пуле потоков.
+        
+        Возвращает Future с BulkResult; вызывающий поток не блокируется.
+        value - уровень приоритета для 'nice' (ключ PRIORITIES или число),
+        grace - сколько секунд 'terminate' ждет выхода перед kill.
+        """
+        if action not in ACTIONS:
+            raise ValueError(f"Неизвестное действие: {action}")
+        if self._workers is None:
+            self._workers = ThreadPoolExecutor(self.workers, thread_name_prefix="ghhs-action")
+            self._coordinator = ThreadPoolExecutor(1, thread_name_prefix="ghhs-bulk")
+        return self._coordinator.submit(self._run_bulk, action, list(keys), value, grace)
+    
+    def descendants(self, keys):
+        """Ключи вместе со всеми потомками по ppid из текущего поколения"""
+        children = {}
+        for key, proc in self.processes.items():
+            children.setdefault(proc['ppid'], []).append(key)
+        result = dict.fromkeys(keys)
+        stack = list(result)
+        while stack:
+            pid, create_time = stack.pop()
+            for child in children.get(pid, ()):
+                # Потомок не может быть старше родителя - иначе это чужой процесс с тем же PID
+                if child not in result and child[1] >= create_time:
+                    result[child] = None
+                    stack.append(child)
+        return list(result)
+    
+    def _run_bulk(self, action, keys, value, grace):
+        started = time.perf_counter()
+        if action == 'kill_tree':
+            keys = self.descendants(keys)
+        if action == 'nice':
+            value = PRIORITIES.get(value, value)
+        outcomes = list(self._workers.map(lambda key: self._apply_one(action, key, value), keys))
+        results = [result for result, _ in outcomes]
+        
+        forced = []
+        if action == 'terminate':
+            # Одно общее ожидание на все процессы вместо grace на каждый
+            signalled = {proc: result.key for result, proc in outcomes
+                         if result.error is None and proc is not None}
+            _, alive = psutil.wait_procs(list(signalled), timeout=grace)
+            killed = list(self._workers.map(
+                lambda proc: self._apply_one('kill', signalled[proc], None), alive))
+            forced = [result.key for result, _ in killed if result.error is None]
+            errors = {result.key: result.error for result, _ in killed if result.error is not None}
+            results = [ActionResult(result.key, errors.get(result.key)) for result in results]
+        return BulkResult(action, results, forced, time.perf_counter() - started)
+    
+    def _apply_one(self, action, key, value):
+        """(ActionResult, psutil.Process или None) для одного процесса"""
+        pid, create_time = key
+        try:
+            proc = psutil.Process(pid)
+            # Защита от гонки: PID мог освободиться и достаться другому процессу
+            if abs(proc.create_time() - create_time) > CREATE_TIME_TOLERANCE:
+                return ActionResult(key, "PID занят другим процессом"), None
+            if action in ('kill', 'kill_tree'):
+                proc.kill()
+            elif action == 'terminate':
+                proc.terminate()
+            elif action == 'suspend':
+                proc.suspend()
+            elif action == 'resume':
+                proc.resume()
+            elif action == 'nice':
+                proc.nice(value)
+            return ActionResult(key, None), proc
+        except psutil.NoSuchProcess:
+            # Для завершения цель уже достигнута
+            error = None if action in ('kill', 'kill_tree', 'terminate') else "процесс завершился"
+            return ActionResult(key, error), None
+        except psutil.AccessDenied:
+            return ActionResult(key, "отказано в доступе"), None
+        except Exception as e:
+            return ActionResult(key, str(e)), None
+    
+    def close(self):
+        """Останавливает пулы групповых действий"""
+        for executor in (self._coordinator, self._workers):
+            if executor is not None:
+                executor.shutdown(wait=False)
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""Дерево процессов: индекс родитель -> дети и суммы по поддеревьям, обновляемые по дельтам"""
+from core.sorting import sort_value
+
+# Состояние узла в развернутом дереве
+LEAF, EXPANDED, COLLAPSED = 0, 1, 2
+
+
+class ProcessTree:
+    """Связи ppid -> дети и суммы полей по поддеревьям.
+
+    Дельта снимка меняет только затронутые узлы: изменение собственного
+    значения процесса добавляется к суммам его предков (O(глубины)),
+    перенос поддерева вычитает его сумму из старой цепочки предков и
+    добавляет к новой. Родитель ищется по PID среди живых процессов и
+    должен быть запущен не позже потомка - так переиспользованный PID
+    не становится чужим родителем.
+    """
+
+    def __init__(self, fields=('cpu', 'memory')):
+        self.fields = fields
+        self.records = {}     # key -> proc из последнего поколения
+        self.parent = {}      # key -> key родителя или None для корня
+        self.children = {}    # key -> {key}
+        self.pids = {}        # pid -> key живого процесса
+        self.totals = {}      # key -> [сумма поля по поддереву, ...] в порядке fields
+        self.roots = set()
+
+    def __len__(self):
+        return len(self.records)
+
+    def __contains__(self, key):
+        return key in self.records
+
+    # --- Обновление ---
+
+    def rebuild(self, processes):
+        """Полное построение за O(n): связи, затем суммы снизу вверх в обратном порядке обхода"""
+        self.records.clear()
+        self.parent.clear()
+        self.children.clear()
+        self.pids.clear()
+        self.totals.clear()
+        self.roots.clear()
+        for key, proc in processes.items():
+            self._insert(key, proc)
+        for key in processes:
+            parent = self._find_parent(key)
+            if parent is not None:
+                self.parent[key] = parent
+                self.children[parent].add(key)
+                self.roots.discard(key)
+
+        order = self._walk(self.roots)
+        if len(order) < len(self.records):
+            # Узлы, недостижимые от корней, замкнуты в цикл - разрываем их связи
+            for key in self.records.keys() - set(order):
+                self.children[self.parent[key]].discard(key)
+                self.parent[key] = None
+                self.roots.add(key)
+            order = self._walk(self.roots)
+        totals = self.totals
+        for key in reversed(order):
+            parent = self.parent[key]
+            if parent is not None:
+                sums = totals[parent]
+                for i, value in enumerate(totals[key]):
+                    sums[i] += value
+
+    def _walk(self, roots):
+        order = []
+        stack = list(roots)
+        children = self.children
+        while stack:
+            key = stack.pop()
+            order.append(key)
+            stack.extend(children[key])
+        return order
+
+    def apply(self, delta):
+        """Применяет SnapshotDelta; новые и сменившие родителя узлы привязываются в конце"""
+        if not self.records:
+            # Первый снимок: полное построение дешевле поштучной привязки
+            processes = dict(delta.added)
+            processes.update((key, proc) for key, (proc, _) in delta.changed.items())
+            self.rebuild(processes)
+            return
+        for key in delta.removed:
+            self._remove(key)
+        pending = []
+        for key, proc in delta.added.items():
+            self._remove(key)
+            self._insert(key, proc)
+            pending.append(key)
+        for key, (proc, fields) in delta.changed.items():
+            old = self.records.get(key)
+            if old is None:
+                self._insert(key, proc)
+                pending.append(key)
+                continue
+            if old['ppid'] != proc['ppid']:
+                self._detach(key)
+                pending.append(key)
+            self.records[key] = proc
+            self._update_totals(key, old, proc)
+        for key in pending:
+            self._attach(key)
+
+    def _insert(self, key, proc):
+        self.records[key] = proc
+        self.parent[key] = None
+        self.children.setdefault(key, set())
+        self.totals[key] = [proc[field] for field in self.fields]
+        self.pids[key[0]] = key
+        self.roots.add(key)
+
+    def _remove(self, key):
+        if key not in self.records:
+            return
+        self._detach(key)
+        # Потомки становятся корнями, пока следующая дельта не сообщит их нового родителя
+        for child in self.children.pop(key, ()):
+            self.parent[child] = None
+            self.roots.add(child)
+        del self.records[key]
+        del self.parent[key]
+        del self.totals[key]
+        self.roots.discard(key)
+        if self.pids.get(key[0]) == key:
+            del self.pids[key[0]]
+
+    def _find_parent(self, key):
+        parent = self.pids.get(self.records[key]['ppid'])
+        if parent is None or parent == key or parent[1] > key[1]:
+            return None
+        return parent
+
+    def _attach(self, key):
+        parent = self._find_parent(key)
+        if parent is None:
+            return
+        chain = list(self.ancestors(parent, include_self=True))
+        if key in chain:
+            return  # Цикл из-за переиспользованного PID
+        totals = self.totals[key]
+        for ancestor in chain:
+            sums = self.totals[ancestor]
+            for i, value in enumerate(totals):
+                sums[i] += value
+        self.parent[key] = parent
+        self.children[parent].add(key)
+        self.roots.discard(key)
+
+    def _detach(self, key):
+        parent = self.parent.get(key)
+        if parent is None:
+            return
+        totals = self.totals[key]
+        for ancestor in self.ancestors(parent, include_self=True):
+            sums = self.totals[ancestor]
+            for i, value in enumerate(totals):
+                sums[i] -= value
+        self.children[parent].discard(key)
+        self.parent[key] = None
+        self.roots.add(key)
+
+    def _update_totals(self, key, old, proc):
+        diffs = [proc[field] - old[field] for field in self.fields]
+        if not any(diffs):
+            return
+        for ancestor in self.ancestors(key, include_self=True):
+            sums = self.totals[ancestor]
+            for i, diff in enumerate(diffs):
+                sums[i] += diff
+
+    # --- Запросы ---
+
+    def ancestors(self, key, include_self=False):
+        if not include_self:
+            key = self.parent.get(key)
+        while key is not None:
+            yield key
+            key = self.parent.get(key)
+
+    def total(self, key, field):
+        """Сумма поля по поддереву процесса (включая его самого)"""
+        return max(0.0, self.totals[key][self.fields.index(field)])
+
+    def with_ancestors(self, keys):
+        """Ключи вместе со всеми предками - чтобы найденные процессы были видны в дереве"""
+        result = set()
+        for key in keys:
+            for node in self.ancestors(key, include_self=True):
+                if node in result:
+                    break
+                result.add(node)
+        return result
+
+    def _sort_key(self, column):
+        if column in self.fields:
+            position = self.fields.index(column)
+            totals = self.totals
+            return lambda key: (totals[key][position], key)
+        records = self.records
+        return lambda key: (sort_value(records[key], column), key)
+
+    def flatten(self, collapsed=(), column='cpu', reverse=True, include=None):
+        """Видимые узлы в порядке обхода: [(key, глубина, состояние)].
+
+        В свернутые поддеревья обход не заходит, поэтому стоимость зависит от
+        числа видимых строк. Братья упорядочены по column; для полей дерева -
+        по сумме поддерева. include ограничивает обход (результат фильтра с
+        предками), при этом пути к найденным процессам раскрываются.
+        """
+        sort_key = self._sort_key(column)
+        children = self.children
+        rows = []
+        append = rows.append
+
+        roots = self.roots if include is None else [key for key in self.roots if key in include]
+        # Стек в обратном порядке, чтобы первым извлекался первый по сортировке
+        stack = [(key, 0) for key in sorted(roots, key=sort_key, reverse=not reverse)]
+        pop = stack.pop
+        while stack:
+            key, depth = pop()
+            kids = children[key]
+            if include is not None and kids:
+                kids = [child for child in kids if child in include]
+            if not kids:
+                append((key, depth, LEAF))
+                continue
+            if include is None and key in collapsed:
+                append((key, depth, COLLAPSED))
+                continue
+            append((key, depth, EXPANDED))
+            depth += 1
+            if len(kids) == 1:
+                stack.extend([(child, depth) for child in kids])
+            else:
+                stack.extend([(child, depth) for child in
+                              sorted(kids, key=sort_key, reverse=not reverse)])
+        return rows
+
+    def view(self, snapshot, rows):
+        return TreeView(self, snapshot, rows)
+
+
+class TreeView:
+    """Строки дерева для таблицы: запись снимка + глубина, состояние и суммы поддерева.
+
+    Дерево и снимок одного поколения; запись собирается только для запрошенной строки.
+    """
+    __slots__ = ('tree', 'snapshot', 'rows', 'positions')
+
+    def __init__(self, tree, snapshot, rows):
+        self.tree = tree
+        self.snapshot = snapshot
+        self.rows = rows
+        self.positions = snapshot.positions()
+
+    def __len__(self):
+        return len(self.rows)
+
+    def key(self, position):
+        return self.rows[position][0]
+
+    def __getitem__(self, position):
+        key, depth, state = self.rows[position]
+        proc = self.snapshot.record(self.positions[key])
+        proc['depth'] = depth
+        proc['state'] = state
+        for field in self.tree.fields:
+            proc[f'tree_{field}'] = self.tree.total(key, field)
+        return proc
+
+    def __iter__(self):
+        return (self[position] for position in range(len(self)))
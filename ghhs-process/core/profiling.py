@@ -0,0 +1,106 @@
+"""Замеры стадий цикла обновления и собственное потребление ресурсов"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import psutil
+
+from core.metric_history import RingBuffer
+
+# Порядок стадий в отчетах: сбор -> дельта -> снимок -> фильтр -> сортировка -> отрисовка -> Tk
+STAGES = ('collect', 'memory', 'diff', 'snapshot', 'alerts', 'filter', 'sort', 'render', 'layout')
+
+
+def percentile(values, fraction):
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(fraction * len(values))) - 1))
+    return values[index]
+
+
+class Profiler:
+    """Длительности стадий в кольцевых буферах с p50/p95/p99"""
+
+    def __init__(self, capacity=512):
+        self.capacity = capacity
+        self.enabled = True
+        self._spans = {}  # имя -> RingBuffer длительностей, секунды
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._process = psutil.Process(os.getpid())
+        self._process.cpu_percent()  # Первый замер cpu_percent всегда 0
+
+    @contextmanager
+    def span(self, name):
+        if not self.enabled:
+            yield
+            return
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        with self._lock:
+            buffer = self._spans.get(name)
+            if buffer is None:
+                buffer = self._spans[name] = RingBuffer(self.capacity)
+            buffer.append(seconds)
+            self._counts[name] = self._counts.get(name, 0) + 1
+
+    def summary(self):
+        """{стадия: count/last/p50/p95/p99/max в миллисекундах}"""
+        with self._lock:
+            spans = {name: (sorted(buffer), buffer.last(0.0), self._counts[name])
+                     for name, buffer in self._spans.items()}
+        order = {name: i for i, name in enumerate(STAGES)}
+        summary = {}
+        for name in sorted(spans, key=lambda n: (order.get(n, len(order)), n)):
+            values, last, count = spans[name]
+            summary[name] = {
+                'count': count,
+                'last': last * 1000,
+                'p50': percentile(values, 0.50) * 1000,
+                'p95': percentile(values, 0.95) * 1000,
+                'p99': percentile(values, 0.99) * 1000,
+                'max': values[-1] * 1000,
+            }
+        return summary
+
+    def self_usage(self):
+        """CPU% и память самого GHHS - сколько стоит наблюдение"""
+        with self._process.oneshot():
+            return {
+                'cpu': self._process.cpu_percent(),
+                'rss': self._process.memory_info().rss,
+                'threads': self._process.num_threads(),
+            }
+
+    def format(self):
+        """Текст для оверлея"""
+        lines = [f"{'stage':<9}{'p50':>8}{'p95':>8}{'p99':>8}{'max':>8}"]
+        for name, stats in self.summary().items():
+            lines.append(f"{name:<9}{stats['p50']:>8.1f}{stats['p95']:>8.1f}"
+                         f"{stats['p99']:>8.1f}{stats['max']:>8.1f}")
+        usage = self.self_usage()
+        lines.append(f"self: CPU {usage['cpu']:.1f}%  RSS {usage['rss'] / 1024 / 1024:.1f} MB"
+                     f"  threads {usage['threads']}")
+        return "\n".join(lines)
+
+    def dump(self, path):
+        """Сохраняет сводку и сырые длительности в JSON для офлайн-анализа"""
+        with self._lock:
+            raw = {name: [value * 1000 for value in buffer] for name, buffer in self._spans.items()}
+        data = {'timestamp': time.time(), 'summary': self.summary(),
+                'self': self.self_usage(), 'samples_ms': raw}
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2)
+        return path
+
+
+# Общий профилировщик процесса: сборщик и UI пишут в один набор стадий
+PROFILER = Profiler()
@@ -0,0 +1,233 @@
+"""Компактная бинарная запись снимков процессов и их воспроизведение.
+
+Формат файла:
+    MAGIC
+    кадр*: заголовок FRAME (тип, timestamp, длина) + payload, сжатый zlib
+
+Ключевой кадр (KEYFRAME) самодостаточен: таблица строк и все процессы.
+Дельта-кадр (DELTA) содержит только новые строки, удаленные ключи и
+добавленные/изменившиеся процессы относительно предыдущего кадра.
+Таблица строк начинается заново с каждым ключевым кадром, поэтому
+перемотка читает не больше одного ключевого кадра и хвоста дельт за ним.
+Индекс ключевых кадров строится при открытии по заголовкам кадров - так
+недописанный после аварии файл читается так же, как закрытый штатно.
+"""
+import mmap
+import os
+import struct
+import zlib
+from bisect import bisect_right
+
+from core.collector import LatestQueue, Sample, merge_samples
+from core.process_info import ProcessSnapshot, StringTable, diff_snapshots
+
+MAGIC = b'GHHSREC2'
+MAGIC_V1 = b'GHHSREC1'                 # Записи без ppid читаются с ppid = 0
+
+KEYFRAME, DELTA = 1, 2
+
+FRAME = struct.Struct('<BdI')          # тип, timestamp, длина payload
+SYSTEM = struct.Struct('<fff')         # cpu, ram, disk
+COUNTS = struct.Struct('<IIII')        # новые строки, удаленные, записанные процессы, резерв
+STRING = struct.Struct('<H')           # длина строки в байтах
+KEY = struct.Struct('<Id')             # pid, create_time
+PROCESS = struct.Struct('<IdIffIIII')  # pid, create_time, ppid, cpu, memory, threads, name, user, status
+PROCESS_V1 = struct.Struct('<IdffIIII')
+
+
+class RecordingError(Exception):
+    """Файл записи поврежден или имеет неизвестный формат"""
+
+
+class Recorder:
+    """Пишет снимки ProcessManager в файл: ключевой кадр раз в keyframe_interval секунд"""
+
+    def __init__(self, path, keyframe_interval=60.0, level=6):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.level = level
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._strings = None
+        self._last_keyframe = None
+        self.frames = 0
+        self.bytes_written = len(MAGIC)
+
+    def _intern(self, value, new_strings):
+        before = len(self._strings)
+        string_id = self._strings.intern(value)
+        if string_id == before:
+            new_strings.append(value)
+        return string_id
+
+    def _pack_process(self, proc, new_strings, out):
+        out.append(PROCESS.pack(
+            proc['pid'], proc['create_time'], proc['ppid'], proc['cpu'], proc['memory'], proc['threads'],
+            self._intern(proc['name'], new_strings),
+            self._intern(proc['user'], new_strings),
+            self._intern(proc['status'] or '', new_strings)))
+
+    def write(self, timestamp, system, processes, delta):
+        """Пишет один снимок; delta - изменения относительно предыдущего записанного"""
+        keyframe = (self._last_keyframe is None
+                    or timestamp - self._last_keyframe >= self.keyframe_interval)
+        if keyframe:
+            self._strings = StringTable()
+            self._last_keyframe = timestamp
+            removed = ()
+            written = processes.values()
+        else:
+            removed = delta.removed.keys()
+            written = list(delta.added.values())
+            written.extend(proc for proc, _ in delta.changed.values())
+
+        new_strings = []
+        body = []
+        for proc in written:
+            self._pack_process(proc, new_strings, body)
+
+        payload = [SYSTEM.pack(system.get('cpu', 0), system.get('ram', 0), system.get('disk', 0)),
+                   COUNTS.pack(len(new_strings), len(removed), len(body), 0)]
+        for value in new_strings:
+            encoded = value.encode('utf-8')[:0xFFFF]
+            payload.append(STRING.pack(len(encoded)))
+            payload.append(encoded)
+        payload.extend(KEY.pack(*key) for key in removed)
+        payload.extend(body)
+
+        self._write_frame(KEYFRAME if keyframe else DELTA, timestamp, b''.join(payload))
+        if keyframe:
+            self._file.flush()
+
+    def _write_frame(self, frame_type, timestamp, payload):
+        compressed = zlib.compress(payload, self.level)
+        offset = self._file.tell()
+        self._file.write(FRAME.pack(frame_type, timestamp, len(compressed)))
+        self._file.write(compressed)
+        self.frames += 1
+        self.bytes_written = offset + FRAME.size + len(compressed)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+
+class Player:
+    """Чтение записи через mmap с перемоткой к любому моменту времени"""
+
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        if os.fstat(self._file.fileno()).st_size < len(MAGIC):
+            raise RecordingError(f"{path}: пустой файл")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self._map[:len(MAGIC)]
+        if magic not in (MAGIC, MAGIC_V1):
+            raise RecordingError(f"{path}: не файл записи GHHS")
+        self._unpack = self._unpack_v1 if magic == MAGIC_V1 else PROCESS.iter_unpack
+        self._process_size = PROCESS_V1.size if magic == MAGIC_V1 else PROCESS.size
+        # Все кадры: (timestamp, offset, тип) - читаются только заголовки по 13 байт
+        self.frames = self._scan()
+        self.keyframes = [i for i, frame in enumerate(self.frames) if frame[2] == KEYFRAME]
+        self._keyframe_times = [self.frames[i][0] for i in self.keyframes]
+        if not self.keyframes:
+            raise RecordingError(f"{path}: нет ни одного ключевого кадра")
+
+    def _scan(self):
+        frames = []
+        data = self._map
+        offset = len(MAGIC)
+        end = len(data)
+        while offset + FRAME.size <= end:
+            frame_type, timestamp, length = FRAME.unpack_from(data, offset)
+            if offset + FRAME.size + length > end:
+                break  # Недописанный хвост после аварийного завершения
+            frames.append((timestamp, offset, frame_type))
+            offset += FRAME.size + length
+        return frames
+
+    @staticmethod
+    def _unpack_v1(data):
+        for pid, create_time, *values in PROCESS_V1.iter_unpack(data):
+            yield (pid, create_time, 0, *values)
+
+    @property
+    def start_time(self):
+        return self.frames[0][0]
+
+    @property
+    def end_time(self):
+        return self.frames[-1][0]
+
+    def _decode(self, offset, strings, processes):
+        """Применяет кадр к processes на месте, возвращает системные метрики"""
+        _, _, length = FRAME.unpack_from(self._map, offset)
+        start = offset + FRAME.size
+        payload = zlib.decompress(self._map[start:start + length])
+
+        cpu, ram, disk = SYSTEM.unpack_from(payload, 0)
+        new_strings, removed, written, _ = COUNTS.unpack_from(payload, SYSTEM.size)
+        position = SYSTEM.size + COUNTS.size
+        for _ in range(new_strings):
+            (size,) = STRING.unpack_from(payload, position)
+            position += STRING.size
+            strings.intern(payload[position:position + size].decode('utf-8', 'replace'))
+            position += size
+        for _ in range(removed):
+            processes.pop(KEY.unpack_from(payload, position), None)
+            position += KEY.size
+        for values in self._unpack(payload[position:position + written * self._process_size]):
+            pid, create_time, ppid, cpu_value, memory, threads, name, user, status = values
+            processes[(pid, create_time)] = {
+                'pid': pid, 'ppid': ppid, 'name': strings[name], 'cpu': round(cpu_value, 1),
+                'memory': memory, 'io_read': 0.0, 'io_write': 0.0,
+                'uss': 0.0, 'pss': 0.0, 'swap': 0.0, 'threads': threads, 'user': strings[user],
+                'status': strings[status], 'create_time': create_time
+            }
+        return {'cpu': round(cpu, 1), 'ram': round(ram, 1), 'disk': round(disk, 1)}
+
+    def state_at(self, timestamp):
+        """(timestamp кадра, системные метрики, {key: proc}) на момент timestamp"""
+        position = max(0, bisect_right(self._keyframe_times, timestamp) - 1)
+        first = self.keyframes[position]
+        strings = StringTable()
+        processes = {}
+        system = {}
+        frame_time = self.frames[first][0]
+        for index in range(first, len(self.frames)):
+            frame_time, offset, frame_type = self.frames[index]
+            if index > first and (frame_time > timestamp or frame_type == KEYFRAME):
+                break
+            system = self._decode(offset, strings, processes)
+        return frame_time, system, processes
+
+    def close(self):
+        self._map.close()
+        self._file.close()
+
+
+class ReplaySource:
+    """Источник снимков для MainWindow вместо Collector: отдает запись по перемотке"""
+
+    def __init__(self, player):
+        self.player = player
+        self.queue = LatestQueue(merge=merge_samples)
+        self.processes = {}
+        self.strings = StringTable()
+        self.position = player.start_time
+
+    def start(self):
+        self.seek(self.player.start_time)
+
+    def stop(self, timeout=None):
+        self.player.close()
+
+    def request_refresh(self):
+        self.seek(self.position)
+
+    def seek(self, timestamp):
+        frame_time, system, processes = self.player.state_at(timestamp)
+        delta = diff_snapshots(self.processes, processes)
+        self.processes = processes
+        self.position = frame_time
+        snapshot = ProcessSnapshot.from_processes(processes, self.strings)
+        self.queue.put(Sample(frame_time, system, processes, snapshot, delta))
@@ -0,0 +1,147 @@
+"""Адаптивные интервалы сбора: стоимость сбора, бюджет CPU и состояние окна.
+
+Интервал каждого сборщика считается заново перед каждым ожиданием:
+    базовый интервал x множитель режима окна,
+    не реже базового при всплеске метрик,
+    не чаще, чем позволяет бюджет CPU (стоимость / доля бюджета),
+    в пределах [минимум, максимум] сборщика.
+"""
+import threading
+import time
+
+# Режимы окна в порядке убывания частоты обновления
+ACTIVE, VISIBLE, IDLE, HIDDEN = 'active', 'visible', 'idle', 'hidden'
+
+# Сборщик -> (базовый интервал, минимум, максимум, доля бюджета CPU), секунды
+COLLECTORS = {
+    'system': (0.5, 0.25, 10.0, 0.2),
+    'processes': (2.0, 1.0, 60.0, 0.8),
+}
+
+# Множитель базового интервала по режиму окна
+MODE_FACTORS = {
+    ACTIVE: {'system': 1.0, 'processes': 1.0},
+    VISIBLE: {'system': 2.0, 'processes': 2.0},    # Окно видно, но фокус в другом приложении
+    IDLE: {'system': 2.0, 'processes': 3.0},       # Фокус есть, пользователь давно бездействует
+    HIDDEN: {'system': 10.0, 'processes': 15.0},   # Свернуто: сбор только ради истории
+}
+
+# Во время всплеска интервал не больше базового x множитель
+SPIKE_FACTORS = {'system': 0.5, 'processes': 1.0}
+
+# Опрос очереди окном, мс: свернутому окну нечего перерисовывать
+POLL_INTERVALS = {HIDDEN: 1000}
+DEFAULT_POLL_INTERVAL = 100
+
+
+class RefreshScheduler:
+    """Интервалы сборщиков по измеренной стоимости, бюджету CPU и активности пользователя.
+
+    Состояние окна и активность приходят из потока UI, стоимость и метрики -
+    из потока сборщика. Методы, меняющие режим, возвращают True, если интервалы
+    могли сократиться - тогда вызывающий будит сборщик (Collector.reschedule).
+    """
+
+    def __init__(self, cpu_budget=0.05, idle_after=60.0, spike_threshold=20.0,
+                 spike_hold=10.0, busy_threshold=90.0, intervals=None):
+        self.cpu_budget = cpu_budget            # Доля одного ядра на весь сбор
+        self.idle_after = idle_after
+        self.spike_threshold = spike_threshold  # Скачок метрики за тик, п.п.
+        self.spike_hold = spike_hold
+        self.busy_threshold = busy_threshold    # Загрузка хоста, выше которой не шумим в фоне
+        self.intervals = dict(intervals or {})  # Переопределение базовых интервалов
+        self.costs = {}                         # Сборщик -> сглаженная стоимость, CPU-секунды
+
+        self.visible = True
+        self.focused = True
+        self.last_activity = time.monotonic()
+        self.spike_until = 0.0
+        self.busy = False
+        self._levels = {}                       # Метрика -> сглаженное значение
+        self._lock = threading.Lock()
+
+    # --- Входные данные ---
+
+    def record_cost(self, name, seconds, alpha=0.3):
+        with self._lock:
+            previous = self.costs.get(name)
+            self.costs[name] = seconds if previous is None else previous + alpha * (seconds - previous)
+
+    def observe(self, system, alpha=0.2):
+        """Системные метрики тика: всплески сокращают интервалы, загрузка хоста - растягивает"""
+        now = time.monotonic()
+        with self._lock:
+            for name in ('cpu', 'ram'):
+                value = system.get(name)
+                if value is None:
+                    continue
+                level = self._levels.get(name, value)
+                if abs(value - level) >= self.spike_threshold:
+                    self.spike_until = now + self.spike_hold
+                self._levels[name] = level + alpha * (value - level)
+            self.busy = self._levels.get('cpu', 0.0) >= self.busy_threshold
+
+    def touch(self):
+        """Действие пользователя (мышь, клавиатура)"""
+        now = time.monotonic()
+        was_idle = now - self.last_activity >= self.idle_after
+        self.last_activity = now
+        return was_idle
+
+    def set_window(self, visible=None, focused=None):
+        before = self.mode
+        if visible is not None:
+            self.visible = visible
+        if focused is not None:
+            self.focused = focused
+        if focused:
+            self.last_activity = time.monotonic()
+        return self._rank(self.mode) < self._rank(before)
+
+    # --- Решения ---
+
+    @staticmethod
+    def _rank(mode):
+        return (ACTIVE, VISIBLE, IDLE, HIDDEN).index(mode)
+
+    @property
+    def mode(self):
+        if not self.visible:
+            return HIDDEN
+        if not self.focused:
+            return VISIBLE
+        if time.monotonic() - self.last_activity >= self.idle_after:
+            return IDLE
+        return ACTIVE
+
+    @property
+    def spiking(self):
+        return time.monotonic() < self.spike_until
+
+    def interval(self, name):
+        default, low, high, share = COLLECTORS[name]
+        base = self.intervals.get(name, default)
+        mode = self.mode
+        interval = base * MODE_FACTORS[mode][name]
+        if self.spiking and mode != HIDDEN:
+            interval = min(interval, base * SPIKE_FACTORS[name])
+        elif self.busy and mode != ACTIVE:
+            # Хост загружен, а на нас не смотрят: не отнимаем у него CPU
+            interval *= 2
+        cost = self.costs.get(name, 0.0)
+        if self.cpu_budget > 0:
+            interval = max(interval, cost / (self.cpu_budget * share))
+        return min(high, max(low, interval))
+
+    def poll_interval(self):
+        """Период опроса очереди окном, мс"""
+        return POLL_INTERVALS.get(self.mode, DEFAULT_POLL_INTERVAL)
+
+    def describe(self):
+        flags = [self.mode]
+        if self.spiking:
+            flags.append('spike')
+        if self.busy:
+            flags.append('busy')
+        intervals = "  ".join(f"{name} {self.interval(name):.1f}s" for name in COLLECTORS)
+        return f"refresh: {intervals}  ({', '.join(flags)})"
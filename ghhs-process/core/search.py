@@ -0,0 +1,173 @@
+"""Поиск по снимку процессов: индекс строковых полей и язык фильтров.
+
+Примеры запросов (условия объединяются через И):
+    python                  подстрока в имени
+    cpu>5 mem>=100          числовые сравнения (cpu, mem/memory/rss, uss, pss, swap, threads, pid, ppid)
+    user:www-data           точное совпадение строкового поля без учета регистра
+    name~^python            регулярное выражение
+"""
+import operator
+import re
+from array import array
+from collections import namedtuple
+
+TEXT_FIELDS = ('name', 'user', 'status')
+NUMERIC_FIELDS = {
+    'cpu': 'cpu', 'mem': 'memory', 'memory': 'memory', 'rss': 'memory',
+    'uss': 'uss', 'pss': 'pss', 'swap': 'swap',
+    'threads': 'threads', 'pid': 'pid', 'ppid': 'ppid',
+}
+OPERATORS = {
+    '>': operator.gt, '>=': operator.ge, '<': operator.lt, '<=': operator.le,
+    '=': operator.eq, '==': operator.eq, '!=': operator.ne,
+}
+TERM_RE = re.compile(r'^(\w+)(>=|<=|!=|==|>|<|=|:|~)(.+)$')
+
+# kind: 'text' - предикат по уникальным строкам индекса, 'numeric' - по колонке снимка
+Term = namedtuple('Term', ['kind', 'field', 'test'])
+
+
+class QueryError(ValueError):
+    """Ошибка разбора запроса фильтра"""
+
+
+def _text_test(op, value):
+    if op == '~':
+        try:
+            return re.compile(value, re.IGNORECASE).search
+        except re.error as e:
+            raise QueryError(f"Неверное регулярное выражение {value!r}: {e}")
+    needle = value.lower()
+    if op == ':':
+        return lambda text: text.lower() == needle
+    if op in ('=', '=='):
+        return lambda text: text == value
+    if op == '!=':
+        return lambda text: text != value
+    raise QueryError(f"Оператор {op} не применим к текстовому полю")
+
+
+def parse_query(text):
+    """Разбирает строку запроса в список Term"""
+    terms = []
+    for token in text.split():
+        match = TERM_RE.match(token)
+        if not match:
+            needle = token.lower()
+            terms.append(Term('text', 'name', lambda name, needle=needle: needle in name.lower()))
+            continue
+
+        field, op, value = match.groups()
+        field = field.lower()
+        if field in TEXT_FIELDS:
+            terms.append(Term('text', field, _text_test(op, value)))
+        elif field in NUMERIC_FIELDS:
+            if op not in OPERATORS:
+                raise QueryError(f"Оператор {op} не применим к числовому полю {field}")
+            try:
+                number = float(value)
+            except ValueError:
+                raise QueryError(f"Ожидалось число: {token}")
+            compare = OPERATORS[op]
+            terms.append(Term('numeric', NUMERIC_FIELDS[field],
+                              lambda x, compare=compare, number=number: compare(x, number)))
+        else:
+            raise QueryError(f"Неизвестное поле: {field}")
+    return terms
+
+
+class SearchIndex:
+    """Инвертированный индекс {поле: {значение: множество ключей}}, обновляемый по дельтам"""
+
+    def __init__(self, fields=TEXT_FIELDS):
+        self.fields = fields
+        self.values = {field: {} for field in fields}
+        self._entries = {}  # key -> значения полей, под которыми ключ лежит в индексе
+
+    def _add(self, key, proc):
+        entry = tuple(proc.get(field) or '' for field in self.fields)
+        self._entries[key] = entry
+        for field, value in zip(self.fields, entry):
+            self.values[field].setdefault(value, set()).add(key)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        for field, value in zip(self.fields, entry):
+            keys = self.values[field].get(value)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self.values[field][value]
+
+    def apply(self, delta):
+        for key in delta.removed:
+            self._remove(key)
+        for key, proc in delta.added.items():
+            self._remove(key)
+            self._add(key, proc)
+        for key, (proc, fields) in delta.changed.items():
+            if any(field in self.fields for field in fields):
+                self._remove(key)
+                self._add(key, proc)
+
+    def rebuild(self, processes):
+        self.values = {field: {} for field in self.fields}
+        self._entries = {}
+        for key, proc in processes.items():
+            self._add(key, proc)
+
+    def match(self, field, test):
+        """Ключи процессов, у которых значение поля проходит test (test - на уникальное значение)"""
+        keys = set()
+        for value, value_keys in self.values[field].items():
+            if test(value):
+                keys |= value_keys
+        return keys
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class ProcessSearch:
+    """Фильтрация текущего снимка без повторного сбора процессов"""
+
+    def __init__(self, fields=TEXT_FIELDS):
+        self.index = SearchIndex(fields)
+        self._parsed = (None, [])
+        self._result = (None, None, None)  # (запрос, снимок, индексы)
+
+    def apply_delta(self, delta):
+        self.index.apply(delta)
+
+    def parse(self, text):
+        """Разбор с кешем последней строки: повторные нажатия не парсят заново"""
+        if self._parsed[0] != text:
+            self._parsed = (text, parse_query(text))
+        return self._parsed[1]
+
+    def filter(self, text, snapshot):
+        """Индексы строк снимка, подходящих под запрос; None - фильтра нет"""
+        terms = self.parse(text)
+        if not terms:
+            return None
+        cached_text, cached_snapshot, cached = self._result
+        if cached_text == text and cached_snapshot is snapshot:
+            return cached
+
+        indices = None
+        text_terms = [term for term in terms if term.kind == 'text']
+        if text_terms:
+            keys = None
+            for term in text_terms:
+                matched = self.index.match(term.field, term.test)
+                keys = matched if keys is None else keys & matched
+            positions = snapshot.positions()
+            indices = array('l', sorted(positions[key] for key in keys if key in positions))
+        for term in terms:
+            if term.kind == 'numeric':
+                indices = snapshot.where(term.field, term.test, indices)
+
+        self._result = (text, snapshot, indices)
+        return indices
@@ -0,0 +1,99 @@
+"""Сортировка процессов по колонке с инкрементальным обновлением по дельтам"""
+import heapq
+from array import array
+from bisect import bisect_left, insort
+from operator import itemgetter
+
+# Строковые колонки сравниваются без учета регистра
+TEXT_COLUMNS = ('name', 'user', 'status')
+
+
+def sort_value(proc, column):
+    value = proc[column]
+    return value.lower() if column in TEXT_COLUMNS else value
+
+
+class SortEngine:
+    """Держит упорядоченный список (значение, pid, create_time) по всем процессам.
+
+    Равные значения упорядочены по ключу процесса, поэтому строки не прыгают
+    между обновлениями. Дельта снимка переставляет только те записи,
+    у которых поменялось значение колонки сортировки.
+    """
+
+    def __init__(self, column='cpu', reverse=True):
+        self.column = column
+        self.reverse = reverse
+        self._entries = []  # Отсортированы по возрастанию
+        self._by_key = {}   # key -> entry
+
+    def set_column(self, column, reverse, processes):
+        """Меняет колонку/направление; полная сортировка только при смене колонки"""
+        if column != self.column:
+            self.column = column
+            self.rebuild(processes)
+        self.reverse = reverse
+
+    def rebuild(self, processes):
+        column = self.column
+        self._by_key = {key: (sort_value(proc, column),) + key for key, proc in processes.items()}
+        self._entries = sorted(self._by_key.values())
+
+    def _remove(self, key):
+        entry = self._by_key.pop(key, None)
+        if entry is not None:
+            position = bisect_left(self._entries, entry)
+            if position < len(self._entries) and self._entries[position] == entry:
+                del self._entries[position]
+
+    def _insert(self, key, proc):
+        entry = (sort_value(proc, self.column),) + key
+        self._by_key[key] = entry
+        insort(self._entries, entry)
+
+    def apply(self, delta):
+        """Переставляет только добавленные, удаленные и изменившиеся по колонке записи"""
+        for key in delta.removed:
+            self._remove(key)
+        for key, proc in delta.added.items():
+            self._remove(key)
+            self._insert(key, proc)
+        for key, (proc, fields) in delta.changed.items():
+            if self.column in fields:
+                self._remove(key)
+                self._insert(key, proc)
+
+    def order(self, snapshot, indices=None):
+        """Индексы строк снимка в порядке сортировки; indices ограничивает выборку"""
+        if indices is not None and len(indices) * 8 < len(self._entries):
+            # Маленькая выборка (например, после фильтра) - проще отсортировать ее саму
+            by_key = self._by_key
+            keyed = [(by_key.get(snapshot.key(i)), i) for i in indices]
+            keyed = [(entry, i) for entry, i in keyed if entry is not None]
+            keyed.sort(reverse=self.reverse)
+            return array('l', (i for _, i in keyed))
+
+        # Движок и снимок одного поколения, поэтому достаточно сопоставления по PID
+        entries = reversed(self._entries) if self.reverse else self._entries
+        ordered = map(snapshot.pid_positions().get, map(itemgetter(1), entries))
+        if indices is None:
+            return array('l', (i for i in ordered if i is not None))
+        wanted = set(indices)
+        return array('l', (i for i in ordered if i in wanted))
+
+    def top(self, snapshot, count, indices=None):
+        """Первые count строк без полной сортировки (heapq)"""
+        if indices is None:
+            indices = range(len(snapshot))
+        column = self.column
+        values = snapshot.columns[column]
+        if column in TEXT_COLUMNS:
+            strings = snapshot.strings.strings
+            value = lambda i: (strings[values[i]].lower(), snapshot.key(i))
+        else:
+            value = lambda i: (values[i], snapshot.key(i))
+        select = heapq.nlargest if self.reverse else heapq.nsmallest
+        return array('l', select(count, indices, key=value))
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,113 @@
+"""Время запуска окна и последний снимок процессов для первого кадра.
+
+Модуль импортируется в main.py до тяжелых модулей, поэтому на уровне модуля
+использует только стандартную библиотеку; psutil и запись снимков
+подгружаются внутри функций, уже после первого кадра.
+"""
+import os
+import sys
+import time
+
+# Цели по времени от старта main.py, секунды
+STARTUP_TARGETS = {
+    'first_frame': 0.3,      # Окно с заставкой нарисовано
+    'window': 1.0,           # Главное окно построено (с сохраненным снимком, если он есть)
+    'first_live_data': 3.0,  # Применен первый живой проход сборщика
+}
+STAGE_TITLES = {
+    'first_frame': "первый кадр",
+    'imports': "импорт модулей окна",
+    'window': "окно построено",
+    'cached_frame': "сохраненный снимок показан",
+    'first_live_data': "первые живые данные",
+}
+LAST_FRAME_MAX_AGE = 24 * 3600  # Более старый снимок вводит в заблуждение больше, чем пустая таблица
+
+
+def default_cache_path():
+    """Файл последнего снимка в пользовательском каталоге кеша"""
+    if sys.platform == 'win32':
+        base = os.environ.get('LOCALAPPDATA') or os.path.expanduser('~')
+    else:
+        base = os.environ.get('XDG_CACHE_HOME') or os.path.expanduser('~/.cache')
+    return os.path.join(base, 'ghhs', 'last-frame.ghhs')
+
+
+class StartupTimer:
+    """Отметки этапов запуска от момента старта main.py (perf_counter)"""
+
+    def __init__(self, started=None, started_wall=None):
+        self.started = time.perf_counter() if started is None else started
+        self.started_wall = time.time() if started_wall is None else started_wall
+        self.marks = {}       # этап -> секунды от старта; повторная отметка не перезаписывает
+        self._listeners = {}  # этап -> [callback()]
+
+    def mark(self, stage):
+        if stage in self.marks:
+            return
+        self.marks[stage] = time.perf_counter() - self.started
+        for callback in self._listeners.pop(stage, ()):
+            callback()
+
+    def when(self, stage, callback):
+        """Вызывает callback при отметке этапа (сразу, если он уже отмечен)"""
+        if stage in self.marks:
+            callback()
+        else:
+            self._listeners.setdefault(stage, []).append(callback)
+
+    def interpreter_time(self):
+        """Время от запуска процесса до первой строки main.py (интерпретатор, site)"""
+        try:
+            import psutil
+            return max(0.0, self.started_wall - psutil.Process(os.getpid()).create_time())
+        except Exception:
+            return None
+
+    def exceeded(self, targets=STARTUP_TARGETS):
+        return [stage for stage, target in targets.items()
+                if stage in self.marks and self.marks[stage] > target]
+
+    def report(self, targets=STARTUP_TARGETS):
+        lines = ["Запуск GHHS Process:"]
+        interpreter = self.interpreter_time()
+        if interpreter is not None:
+            lines.append(f"  {'интерпретатор (до main.py)':<32} {interpreter * 1000:8.0f} ms")
+        for stage, seconds in sorted(self.marks.items(), key=lambda item: item[1]):
+            target = targets.get(stage)
+            verdict = ""
+            if target is not None:
+                verdict = f"  цель {target * 1000:.0f} ms - {'OK' if seconds <= target else 'ПРЕВЫШЕНО'}"
+            lines.append(f"  {STAGE_TITLES.get(stage, stage):<32} {seconds * 1000:8.0f} ms{verdict}")
+        return "\n".join(lines)
+
+
+def save_last_frame(path, timestamp, system, processes):
+    """Пишет снимок одним ключевым кадром формата записи; файл заменяется атомарно"""
+    from core.recorder import Recorder
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    recorder = Recorder(temporary)
+    try:
+        recorder.write(timestamp, system, processes, None)
+    finally:
+        recorder.close()
+    os.replace(temporary, path)
+
+
+def load_last_frame(path, max_age=LAST_FRAME_MAX_AGE):
+    """(timestamp, системные метрики, {key: proc}) или None - снимка нет, он старый или поврежден"""
+    from core.recorder import Player, RecordingError
+    try:
+        player = Player(path)
+    except (OSError, RecordingError, ValueError):
+        return None
+    try:
+        timestamp, system, processes = player.state_at(player.end_time)
+    except Exception:
+        return None
+    finally:
+        player.close()
+    if time.time() - timestamp > max_age:
+        return None
+    return timestamp, system, processes
@@ -1,6 +1,22 @@
+import os
+import time
 import psutil
 
+from core.cpu_accounting import SystemCpuAccounting
+from core.io_monitor import IoMonitor
+from core.metric_history import MetricHistory
+
 class SystemMonitor:
+    # Скалярные метрики, которые пишутся в историю
+    HISTORY_METRICS = ('cpu', 'ram', 'disk', 'disk_read', 'disk_write', 'net_sent', 'net_recv')
+    
+    def __init__(self, history=None, disk_path=None):
+        self.history = history or MetricHistory()
+        self.cpu = SystemCpuAccounting()
+        self.io = IoMonitor()
+        # Корень системного диска: C:\ на Windows, / на остальных системах
+        self.disk_path = disk_path or os.path.abspath(os.sep)
+    
     def get_cpu_usage(self):
         return psutil.cpu_percent(interval=0)
     
@@ -9,6 +25,18 @@ class SystemMonitor:
     
     def get_disk_usage(self):
         try:
-            return psutil.disk_usage('C:').percent
-        except:
-            return 0
\ No newline at end of file
+            return psutil.disk_usage(self.disk_path).percent
+        except OSError:
+            return 0
+    
+    def sample(self):
+        """Снимает все системные метрики и пишет их в историю"""
+        timestamp = time.time()
+        # Общая загрузка и разбивка по ядрам из одной пары замеров cpu_times
+        metrics = self.cpu.sample()
+        metrics['ram'] = self.get_ram_usage()
+        metrics['disk'] = self.get_disk_usage()
+        metrics.update(self.io.sample())
+        for name in self.HISTORY_METRICS:
+            self.history.record(name, timestamp, metrics[name])
+        return metrics
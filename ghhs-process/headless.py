@@ -0,0 +1,163 @@
+"""Безоконный режим: поток снимков процессов в NDJSON/CSV.
+
+    python headless.py --interval 1 --top 20 --format ndjson
+    python headless.py --deltas --format csv --output log.csv --fields pid,name,cpu
+    python headless.py --serve 9105 --top 50    # /metrics и /metrics.json
+    python headless.py --rules alerts.rules --alert-log alerts.log -o /dev/null
+
+Не импортирует tkinter и не требует прав администратора.
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from core.process_manager import ProcessManager
+from core.process_info import ProcessSnapshot
+from core.system_monitor import SystemMonitor
+from core.sorting import SortEngine
+from core.output import WRITERS, DEFAULT_FIELDS, write_delta
+from core.collector import Collector
+from core.http_exporter import MetricsExporter
+from core.recorder import Recorder
+from core.alerts import AlertEngine, RuleError
+
+# Поля записи процесса, доступные для --fields: колонки снимка
+PROCESS_FIELDS = tuple(ProcessSnapshot.NUMERIC) + ProcessSnapshot.STRINGS
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="GHHS Process - безоконный сбор метрик")
+    parser.add_argument("--format", choices=sorted(WRITERS), default="ndjson")
+    parser.add_argument("--output", "-o", help="файл вывода (по умолчанию stdout)")
+    parser.add_argument("--interval", "-i", type=float, default=2.0, help="период сбора, секунды")
+    parser.add_argument("--count", "-n", type=int, default=0, help="число тиков (0 - бесконечно)")
+    parser.add_argument("--fields", default=",".join(DEFAULT_FIELDS),
+                        help="поля процессов через запятую")
+    parser.add_argument("--top", type=int, default=0, help="только N первых процессов (0 - все)")
+    parser.add_argument("--sort", default="cpu",
+                        choices=("pid", "name", "cpu", "memory", "uss", "pss", "io_read", "io_write",
+                                 "threads", "user"),
+                        help="колонка для --top")
+    parser.add_argument("--io", action="store_true",
+                        help="считать скорости ввода-вывода процессов (поля io_read, io_write)")
+    parser.add_argument("--memory", action="store_true",
+                        help="замерять USS/PSS/swap процессов (поля uss, pss, swap)")
+    parser.add_argument("--memory-budget", type=float, default=0.02,
+                        help="время на замеры памяти за тик, секунды")
+    parser.add_argument("--deltas", action="store_true",
+                        help="писать только изменения между снимками")
+    parser.add_argument("--batch", type=int, default=1000, help="строк в одной записи на диск")
+    parser.add_argument("--flush-interval", type=float, default=30.0,
+                        help="максимальная задержка записи, секунды")
+    parser.add_argument("--record", metavar="FILE",
+                        help="дополнительно писать снимки в бинарный файл записи")
+    parser.add_argument("--serve", type=int, metavar="PORT",
+                        help="вместо вывода поднять HTTP-экспортер метрик на порту")
+    parser.add_argument("--bind", default="127.0.0.1", help="адрес HTTP-экспортера")
+    parser.add_argument("--max-label-length", type=int, default=64,
+                        help="обрезать метки name/user экспортера до N символов")
+    parser.add_argument("--rules", metavar="FILE", help="файл правил оповещений (core.alerts)")
+    parser.add_argument("--alert-log", metavar="FILE", help="журнал оповещений для действия log")
+    args = parser.parse_args(argv)
+    # Неизвестное поле иначе упадет KeyError посреди потока, после заголовка и части строк
+    args.fields = tuple(field.strip() for field in args.fields.split(",") if field.strip())
+    unknown = [field for field in args.fields if field not in PROCESS_FIELDS]
+    if unknown or not args.fields:
+        parser.error(f"--fields: неизвестные поля {', '.join(unknown) or '(пусто)'}; "
+                     f"доступны: {', '.join(PROCESS_FIELDS)}")
+    if args.max_label_length < 1:
+        parser.error("--max-label-length: нужно не меньше 1")
+    return args
+
+
+def load_alerts(args):
+    if not args.rules:
+        return None
+    try:
+        return AlertEngine.from_file(args.rules, args.alert_log)
+    except (OSError, RuleError) as e:
+        sys.exit(f"Правила оповещений: {e}")
+
+
+def run(args, stream, alerts=None):
+    writer = WRITERS[args.format](stream, fields=args.fields, batch_size=args.batch,
+                                  flush_interval=args.flush_interval)
+    process_manager = ProcessManager()
+    process_manager.set_io_tracking(args.io)
+    if args.memory:
+        process_manager.set_memory_sampling(True, args.memory_budget)
+    system_monitor = SystemMonitor()
+    sorter = SortEngine(args.sort, reverse=True)
+    recorder = Recorder(args.record) if args.record else None
+
+    ticks = 0
+    next_tick = time.monotonic()
+    try:
+        while not args.count or ticks < args.count:
+            timestamp = time.time()
+            system = system_monitor.sample()
+            writer.write_system(timestamp, system)
+            delta = process_manager.update()
+            if recorder is not None:
+                recorder.write(timestamp, system, process_manager.processes, delta)
+            snapshot = process_manager.snapshot() if alerts is not None or not args.deltas else None
+            if alerts is not None:
+                alerts.evaluate(timestamp, snapshot, delta)
+            if args.deltas:
+                write_delta(writer, timestamp, delta)
+            else:
+                # Снимок ведется по дельтам и не хранит порядок обхода /proc - выводим по PID
+                indices = sorter.top(snapshot, args.top) if args.top else snapshot.argsort('pid')
+                for index in indices:
+                    writer.write_process(timestamp, snapshot.record(index))
+
+            ticks += 1
+            if args.count and ticks >= args.count:
+                break
+            next_tick += args.interval
+            time.sleep(max(0.0, next_tick - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        writer.close()
+        if recorder is not None:
+            recorder.close()
+        if alerts is not None:
+            alerts.close()
+
+
+def serve(args, alerts=None):
+    """Режим экспортера: фоновый сборщик + asyncio HTTP-сервер"""
+    recorder = Recorder(args.record) if args.record else None
+    process_manager = ProcessManager()
+    process_manager.set_io_tracking(args.io)
+    if args.memory:
+        process_manager.set_memory_sampling(True, args.memory_budget)
+    collector = Collector(process_manager, SystemMonitor(), system_interval=min(args.interval, 1.0),
+                          process_interval=args.interval, recorder=recorder, alerts=alerts)
+    exporter = MetricsExporter(collector, host=args.bind, port=args.serve, top_n=args.top or 20,
+                               max_label_length=args.max_label_length)
+    collector.start()
+    try:
+        asyncio.run(exporter.serve_forever())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        collector.stop()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    alerts = load_alerts(args)
+    if args.serve is not None:
+        serve(args, alerts)
+        return
+    if args.output:
+        with open(args.output, "a", encoding="utf-8", newline="", buffering=1 << 16) as stream:
+            run(args, stream, alerts)
+    else:
+        run(args, sys.stdout, alerts)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,8 @@
+import time
+# Отсчет времени запуска - до любых импортов; окно и psutil импортируются после первого кадра
+STARTED = time.perf_counter(), time.time()
 import tkinter as tk
-from ui.main_window import MainWindow
+import argparse
 import ctypes
 import sys
 import os
@@ -10,13 +13,57 @@ def is_admin():
     except:
         return False
 
+def parse_args():
+    parser = argparse.ArgumentParser(description="GHHS Process")
+    parser.add_argument("--record", metavar="FILE", help="записывать снимки процессов в файл")
+    parser.add_argument("--replay", metavar="FILE", help="воспроизвести запись вместо живых данных")
+    parser.add_argument("--rules", metavar="FILE", help="файл правил оповещений")
+    parser.add_argument("--alert-log", metavar="FILE", help="журнал оповещений для действия log")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="не показывать сохраненный снимок до первого живого прохода")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="вывести время этапов запуска после первых живых данных")
+    parser.add_argument("--exit-after-startup", action="store_true",
+                        help="выйти после первых живых данных (замер запуска); код 1 - цель превышена")
+    return parser.parse_args()
+
+def create_alerts(args):
+    """Движок оповещений по файлу правил или None"""
+    if not args.rules:
+        return None
+    from core.alerts import AlertEngine
+    return AlertEngine.from_file(args.rules, args.alert_log)
+
+def create_collector(args, alerts=None):
+    """Источник снимков для окна: None - живой сборщик по умолчанию"""
+    if args.replay:
+        from core.recorder import Player, ReplaySource
+        return ReplaySource(Player(args.replay))
+    if args.record:
+        from core.collector import Collector
+        from core.process_manager import ProcessManager
+        from core.recorder import Recorder
+        from core.scheduler import RefreshScheduler
+        from core.system_monitor import SystemMonitor
+        return Collector(ProcessManager(), SystemMonitor(), recorder=Recorder(args.record),
+                         scheduler=RefreshScheduler(), alerts=alerts)
+    return None
+
 if __name__ == "__main__":
-    if not is_admin():
-        ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
-        sys.exit(0)
+    args = parse_args()
+    
+    # Повышение прав и DPI - только Windows; для воспроизведения записи права администратора не нужны
+    if sys.platform == "win32":
+        if not args.replay and not is_admin():
+            ctypes.windll.shell32.ShellExecuteW(None, "runas", sys.executable, " ".join(sys.argv), None, 1)
+            sys.exit(0)
 
-    # Настройка DPI для правильного масштабирования
-    ctypes.windll.shcore.SetProcessDpiAwareness(1)
+        # Настройка DPI для правильного масштабирования
+        ctypes.windll.shcore.SetProcessDpiAwareness(1)
+    
+    from core.startup import StartupTimer, default_cache_path
+    from ui.styles import COLOR_SCHEME, FONT_SCHEME
+    timer = StartupTimer(*STARTED)
     
     root = tk.Tk()
     root.title("GHHS Process Hacker")
@@ -26,5 +73,34 @@ if __name__ == "__main__":
     # Убираем стандартное меню Windows
     root.overrideredirect(False)
     
-    app = MainWindow(root)
-    root.mainloop()
\ No newline at end of file
+    # Первый кадр - заставка; модули окна, psutil и обход процессов - после нее
+    splash = tk.Label(root, text="GHHS Process - загрузка...", bg=COLOR_SCHEME["bg_darkest"],
+                      fg=COLOR_SCHEME["text_dark"], font=FONT_SCHEME["title"])
+    splash.pack(expand=True)
+    root.update()
+    timer.mark('first_frame')
+    
+    exit_code = 0
+    
+    def finish_startup(app):
+        global exit_code
+        if args.startup_report or args.exit_after_startup:
+            print(timer.report(), file=sys.stderr)
+        if args.exit_after_startup:
+            exit_code = 1 if timer.exceeded() else 0
+            root.after_idle(app.close)
+    
+    def build_window():
+        from ui.main_window import MainWindow
+        timer.mark('imports')
+        alerts = create_alerts(args)
+        collector = create_collector(args, alerts)
+        splash.destroy()
+        last_frame = None if args.no_cache or args.replay else default_cache_path()
+        app = MainWindow(root, collector=collector, alerts=alerts, startup=timer,
+                         last_frame=last_frame)
+        timer.when('first_live_data', lambda: finish_startup(app))
+    
+    root.after_idle(build_window)
+    root.mainloop()
+    sys.exit(exit_code)
\ No newline at end of file
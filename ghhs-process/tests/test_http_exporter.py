@@ -0,0 +1,96 @@
+"""HTTP-экспортер на loopback: маршруты, лимит длины меток и 404.
+
+    python -m unittest discover -s tests -t .     # из каталога ghhs-process
+"""
+import asyncio
+import json
+import unittest
+
+from benchmarks.fixtures import make_processes
+from core.collector import LatestQueue, Sample
+from core.http_exporter import MetricsExporter
+from core.process_info import ProcessSnapshot
+
+LONG_NAME = "very-long-process-name-" * 4
+
+
+class FakeCollector:
+    """Источник снимков с очередью, как у Collector, без фонового потока"""
+
+    def __init__(self):
+        self.queue = LatestQueue()
+
+
+class MetricsExporterTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        processes = make_processes(50)
+        # Самый загруженный процесс с длинным именем попадает в топ и в метки
+        proc = max(processes.values(), key=lambda p: p['cpu'])
+        proc['name'] = LONG_NAME
+        proc['cpu'] = 99.0
+        self.collector = FakeCollector()
+        self.collector.queue.put(Sample(1700000000.0, {'cpu': 12.5, 'ram': 40.0, 'disk': 70.0},
+                                        processes, ProcessSnapshot.from_processes(processes)))
+        # Порт 0 - ephemeral: тест не конфликтует с запущенным экспортером
+        self.exporter = MetricsExporter(self.collector, port=0, top_n=5, max_label_length=16,
+                                        poll_interval=0.01)
+        await self.exporter.start()
+        for _ in range(100):
+            if self.exporter.snapshot is not None:
+                break
+            await asyncio.sleep(0.01)
+
+    async def asyncTearDown(self):
+        await self.exporter.stop()
+
+    async def request(self, path, method="GET"):
+        reader, writer = await asyncio.open_connection('127.0.0.1', self.exporter.port)
+        writer.write(f"{method} {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        head, _, body = response.partition(b"\r\n\r\n")
+        lines = head.decode("latin-1").split("\r\n")
+        headers = dict(line.split(": ", 1) for line in lines[1:])
+        return int(lines[0].split()[1]), headers, body
+
+    async def test_prometheus(self):
+        status, headers, body = await self.request("/metrics")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("text/plain; version=0.0.4"))
+        self.assertEqual(int(headers["Content-Length"]), len(body))
+        text = body.decode("utf-8")
+        self.assertIn("ghhs_cpu_percent 12.5\n", text)
+        self.assertIn("ghhs_processes 50\n", text)
+        self.assertIn(f'name="{LONG_NAME[:16]}"', text)
+        self.assertNotIn(LONG_NAME[:17], text)
+        samples = [line for line in text.splitlines() if line.startswith("ghhs_process_cpu_percent{")]
+        self.assertEqual(len(samples), 5)
+
+    async def test_json(self):
+        status, headers, body = await self.request("/metrics.json?pretty=0")
+        self.assertEqual(status, 200)
+        self.assertTrue(headers["Content-Type"].startswith("application/json"))
+        data = json.loads(body)
+        self.assertEqual(data['process_count'], 50)
+        self.assertEqual(data['system']['cpu'], 12.5)
+        self.assertEqual(len(data['processes']), 5)
+        self.assertEqual(data['processes'][0]['name'], LONG_NAME)
+
+    async def test_not_found(self):
+        status, _, body = await self.request("/nope")
+        self.assertEqual(status, 404)
+        self.assertEqual(body, b"not found\n")
+
+    async def test_method_not_allowed(self):
+        status, _, _ = await self.request("/metrics", method="POST")
+        self.assertEqual(status, 405)
+
+    async def test_cached_until_next_sample(self):
+        await self.request("/metrics")
+        await self.request("/metrics")
+        self.assertEqual(self.exporter.renders, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,12 +1,46 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 import psutil
+import socket
 import threading
 import time
 import math
+import os
+from collections import deque
+from datetime import datetime
 from ui.styles import COLOR_SCHEME, FONT_SCHEME, DarkTheme
 from core.process_manager import ProcessManager
 from core.system_monitor import SystemMonitor
+from core.collector import Collector
+from core.process_info import ProcessSnapshot, diff_snapshots, process_key
+from core.process_tree import ProcessTree
+from core.grouping import CGROUP_GROUPING, GROUPINGS, ProcessGroups
+from core.search import ProcessSearch, QueryError
+from core.sorting import SortEngine
+from core.profiling import PROFILER
+from core.scheduler import RefreshScheduler
+from core.io_monitor import format_rate
+from core.process_details import ProcessDetails, SECTIONS, format_section
+from core.startup import StartupTimer, default_cache_path, load_last_frame, save_last_frame
+from ui.process_table import (ProcessTable, PROCESS_COLUMNS, TREE_COLUMNS, IO_COLUMNS, MEMORY_COLUMNS,
+                              GROUP_COLUMNS)
+
+# Контекстное меню таблицы: (подпись, действие ProcessManager.bulk_action, значение); None - разделитель
+PROCESS_ACTIONS = [
+    ("Завершить", 'terminate', None),
+    ("Завершить немедленно", 'kill', None),
+    ("Завершить с дочерними", 'kill_tree', None),
+    None,
+    ("Приостановить", 'suspend', None),
+    ("Возобновить", 'resume', None),
+    None,
+    ("Приоритет: низкий", 'nice', 'low'),
+    ("Приоритет: обычный", 'nice', 'normal'),
+    ("Приоритет: высокий", 'nice', 'high'),
+]
+# Действия, требующие подтверждения
+CONFIRM_ACTIONS = {'terminate': "Завершить", 'kill': "Завершить немедленно",
+                   'kill_tree': "Завершить вместе с дочерними"}
 
 class ModernButton(tk.Canvas):
     def __init__(self, parent, text, command, width=100, height=30, 
@@ -20,6 +54,7 @@ class ModernButton(tk.Canvas):
         self.accent_color = accent_color
         self.width = width
         self.height = height
+        self.text = text
         
         self.bind("<Enter>", self._on_enter)
         self.bind("<Leave>", self._on_leave)
@@ -28,13 +63,31 @@ class ModernButton(tk.Canvas):
         
         self.is_pressed = False
         self.is_hovered = False
+        self.color = None  # Текущая заливка фигур кнопки
         
+        self._create_items()
         self._draw_button()
-        self._draw_text(text)
     
-    def _draw_button(self):
-        self.delete("all")
+    def _create_items(self):
+        """Фигуры создаются один раз; наведение и нажатие меняют только их заливку"""
+        # Скругленный прямоугольник
+        radius = 6
+        self.create_rectangle(radius, 0, self.width-radius, self.height, outline="", tags="button")
+        self.create_rectangle(0, radius, self.width, self.height-radius, outline="", tags="button")
+        self.create_oval(0, 0, radius*2, radius*2, outline="", tags="button")
+        self.create_oval(self.width-radius*2, 0, self.width, radius*2, outline="", tags="button")
+        self.create_oval(0, self.height-radius*2, radius*2, self.height, outline="", tags="button")
+        self.create_oval(self.width-radius*2, self.height-radius*2, self.width, self.height,
+                         outline="", tags="button")
+        
+        # Акцентная полоса сверху
+        self.create_rectangle(0, 0, self.width, 2, fill=self.accent_color, outline="", tags="accent")
         
+        self.text_item = self.create_text(self.width//2, self.height//2, text=self.text,
+                                          fill=self.fg_color, font=FONT_SCHEME["normal"],
+                                          tags="text")
+    
+    def _draw_button(self):
         # Градиентный эффект
         if self.is_pressed:
             color = self._darken_color(self.bg_color, 20)
@@ -42,30 +95,14 @@ class ModernButton(tk.Canvas):
             color = self._lighten_color(self.bg_color, 10)
         else:
             color = self.bg_color
-        
-        # Скругленный прямоугольник
-        radius = 6
-        self.create_rectangle(
-            radius, 0, self.width-radius, self.height,
-            fill=color, outline="", tags="button"
-        )
-        self.create_rectangle(
-            0, radius, self.width, self.height-radius,
-            fill=color, outline="", tags="button"
-        )
-        self.create_oval(0, 0, radius*2, radius*2, fill=color, outline="", tags="button")
-        self.create_oval(self.width-radius*2, 0, self.width, radius*2, fill=color, outline="", tags="button")
-        self.create_oval(0, self.height-radius*2, radius*2, self.height, fill=color, outline="", tags="button")
-        self.create_oval(self.width-radius*2, self.height-radius*2, self.width, self.height, 
-                        fill=color, outline="", tags="button")
-        
-        # Акцентная полоса сверху
-        self.create_rectangle(0, 0, self.width, 2, fill=self.accent_color, outline="", tags="accent")
+        if color != self.color:
+            self.color = color
+            self.itemconfig("button", fill=color)
     
-    def _draw_text(self, text):
-        self.create_text(self.width//2, self.height//2, text=text, 
-                        fill=self.fg_color, font=FONT_SCHEME["normal"],
-                        tags="text")
+    def set_text(self, text):
+        if text != self.text:
+            self.text = text
+            self.itemconfig(self.text_item, text=text)
     
     def _on_enter(self, event):
         self.is_hovered = True
@@ -101,50 +138,143 @@ class CircularProgress(tk.Canvas):
                         highlightthickness=0, bg=bg_color)
         self.size = size
         self.value = 0
-        self._draw_progress()
-    
-    def set_value(self, value):
-        self.value = max(0, min(100, value))
-        self._draw_progress()
-    
-    def _draw_progress(self):
-        self.delete("all")
+        self.shown = None        # (проценты на дуге и в тексте) последней отрисовки
+        self.redraw_job = None
         
         center = self.size // 2
         radius = self.size // 2 - 5
         
-        # Фоновая окружность
+        # Элементы создаются один раз, set_value меняет только дугу и текст
         self.create_oval(center-radius, center-radius, center+radius, center+radius,
                         outline=COLOR_SCHEME["bg_light"], width=3, fill="")
+        self.arc = self.create_arc(center-radius, center-radius, center+radius, center+radius,
+                                   start=90, extent=0, state=tk.HIDDEN,
+                                   outline=COLOR_SCHEME["accent_blue"], width=3, style=tk.ARC)
+        self.label = self.create_text(center, center, text="0%",
+                                      fill=COLOR_SCHEME["text_white"], font=FONT_SCHEME["metric"])
+        self._draw_progress()
+    
+    def set_value(self, value):
+        """Запоминает значение; несколько вызовов за кадр дают одну перерисовку"""
+        self.value = max(0, min(100, value))
+        if self.redraw_job is None:
+            self.redraw_job = self.after_idle(self._draw_progress)
+    
+    def _draw_progress(self):
+        self.redraw_job = None
+        # Дуга в 80 px различает полпроцента, текст - целые проценты
+        shown = (round(self.value * 2) / 2, int(self.value))
+        if shown == self.shown:
+            return
+        self.shown = shown
         
-        # Прогресс
         if self.value > 0:
-            start_angle = 90
-            end_angle = 90 - (360 * self.value / 100)
-            
-            self.create_arc(center-radius, center-radius, center+radius, center+radius,
-                          start=start_angle, extent=end_angle-start_angle,
-                          outline=COLOR_SCHEME["accent_blue"], width=3, style=tk.ARC)
-        
-        # Текст
-        self.create_text(center, center, text=f"{int(self.value)}%", 
-                        fill=COLOR_SCHEME["text_white"], font=FONT_SCHEME["metric"])
+            self.itemconfig(self.arc, extent=-360 * self.value / 100, state=tk.NORMAL)
+        else:
+            self.itemconfig(self.arc, state=tk.HIDDEN)
+        self.itemconfig(self.label, text=f"{shown[1]}%")
+
+
+class Sparkline(tk.Canvas):
+    """График истории метрики: за тик добавляется один отрезок, остальные сдвигаются одним move"""
+    def __init__(self, parent, width=260, height=28, step=3, maximum=100,
+                 color=COLOR_SCHEME["accent_blue"], bg_color=COLOR_SCHEME["bg_darkest"]):
+        super().__init__(parent, width=width, height=height,
+                        highlightthickness=0, bg=bg_color)
+        self.width = width
+        self.height = height
+        self.step = step
+        self.maximum = maximum
+        self.color = color
+        self.segments = deque()   # id отрезков от старых к новым
+        self.capacity = width // step
+        self.last_y = None
+    
+    def _y(self, value):
+        value = max(0, min(self.maximum, value))
+        return self.height - 1 - (self.height - 2) * value / self.maximum
+    
+    def append(self, value):
+        y = self._y(value)
+        if self.last_y is not None:
+            self.move("segment", -self.step, 0)
+            self.segments.append(self.create_line(self.width - 1 - self.step, self.last_y,
+                                                  self.width - 1, y, fill=self.color,
+                                                  tags="segment"))
+            if len(self.segments) > self.capacity:
+                self.delete(self.segments.popleft())
+        self.last_y = y
+    
+    def extend(self, values):
+        """Начальное заполнение из истории: нужна только последняя ширина графика"""
+        for value in list(values)[-(self.capacity + 1):]:
+            self.append(value)
 
 class MainWindow:
-    def __init__(self, master):
+    def __init__(self, master, collector=None, alerts=None, startup=None, last_frame=None):
         self.master = master
+        self.startup = startup or StartupTimer()
+        # Файл последнего снимка: показывается до первого живого прохода и обновляется при закрытии
+        self.last_frame = last_frame
+        self.showing_cached = False
         self.theme = DarkTheme(master)
         
         self.process_manager = ProcessManager()
         self.system_monitor = SystemMonitor()
         self.selected_pid = None
-        self.update_thread = None
+        # Источник снимков: живой сборщик или воспроизведение записи (ReplaySource)
+        self.collector = collector or Collector(self.process_manager, self.system_monitor,
+                                                scheduler=RefreshScheduler(), alerts=alerts)
+        # Действия над процессами используют поколение, которое видит окно
+        self.process_manager = getattr(self.collector, 'process_manager', self.process_manager)
+        self.io_monitor = getattr(self.collector, 'system_monitor', self.system_monitor).io
+        self.io_panel = None          # Панель "Сеть и диски", пока открыта
+        self.connections_job = None   # Future списка соединений выбранного процесса
+        self.connections_lines = []
+        # Детали выбранного процесса: разделы грузятся в фоне только раскрытыми
+        self.details = ProcessDetails(self.process_manager.attributes)
+        self.details_proc = None      # Запись выбранного процесса из снимка
+        self.details_expanded = {'basic', 'cmdline'}
+        self.details_jobs = {}        # раздел -> Future загрузки для выбранного процесса
+        self.details_watch = None
+        # У воспроизведения записи планировщика нет - опрос с постоянной частотой
+        self.scheduler = getattr(self.collector, 'scheduler', None)
+        # Правила проверяет сборщик; окно только подсвечивает сработавшие процессы
+        self.alerts = getattr(self.collector, 'alerts', None)
+        self.seek_job = None
         self.running = True
         self.process_cache = {}
-        self.last_update = 0
+        self.processes = {}  # Последний полученный снимок процессов
+        self.system = {}     # Последние системные метрики
+        self.snapshot = ProcessSnapshot()
+        self.search = ProcessSearch()
+        self.sorter = SortEngine('cpu', reverse=True)
+        self.tree = ProcessTree()  # Ведется по дельтам всегда, чтобы режим дерева включался мгновенно
+        self.tree_mode = False
+        self.memory_columns = False  # Колонки USS/PSS/swap; пока выключены, замеров нет
+        # Группы по имени и пользователю ведутся по дельтам всегда, по cgroup - с первого включения
+        self.groups = {mode: ProcessGroups(label, fields) for mode, (label, fields) in GROUPINGS.items()}
+        self.group_by = None         # None - без группировки, иначе ключ self.groups
+        self.cgroup_pending = False  # Группы по cgroup ждут снимка с метками от сборщика
+        self.group_sort = ('cpu', True)
+        self.collapsed = set()     # Ключи свернутых узлов дерева
+        self.search_job = None
+        self.profile_overlay = None
+        self.profile_status = ""   # Результат последнего Ctrl+F12 для оверлея
+        self.label_texts = {}      # Метка -> последний установленный текст
         
         self._create_ui()
-        self._start_updates()
+        if self.last_frame is not None:
+            self._show_cached_frame()
+        # Сборщик стартует после отрисовки окна: первый обход процессов не задерживает кадр
+        self.master.after_idle(self._start_updates)
+        self.master.protocol("WM_DELETE_WINDOW", self.close)
+        self.master.bind("<F12>", self._toggle_profile_overlay)
+        self.master.bind("<Control-F12>", self._dump_profile)
+        self.master.bind("<Control-t>", self._toggle_tree_mode)
+        self.master.bind("<Control-m>", self._toggle_memory_columns)
+        self.master.bind("<Control-g>", self._cycle_grouping)
+        self._bind_window_state()
         
     def _create_ui(self):
         """Создает современный интерфейс"""
@@ -167,6 +297,10 @@ class MainWindow:
         
         # Нижняя панель - детали
         self._create_details_panel(main_container)
+        
+        # Шкала времени - только при воспроизведении записи
+        if hasattr(self.collector, 'seek'):
+            self._create_timeline(main_container)
     
     def _create_header(self, parent):
         """Создает заголовок приложения"""
@@ -193,12 +327,12 @@ class MainWindow:
         search_frame.pack(side=tk.LEFT, padx=20, pady=20)
         
         self.search_var = tk.StringVar()
-        search_entry = tk.Entry(search_frame, textvariable=self.search_var,
+        self.search_entry = tk.Entry(search_frame, textvariable=self.search_var,
                               bg=COLOR_SCHEME["bg_light"], fg=COLOR_SCHEME["text_white"],
                               insertbackground=COLOR_SCHEME["text_white"],
                               width=30, relief="flat")
-        search_entry.pack(side=tk.LEFT)
-        search_entry.bind("<KeyRelease>", self._on_search_changed)
+        self.search_entry.pack(side=tk.LEFT)
+        self.search_entry.bind("<KeyRelease>", self._on_search_changed)
         
         # Кнопки управления
         control_frame = tk.Frame(header, bg=COLOR_SCHEME["bg_dark"])
@@ -207,6 +341,19 @@ class MainWindow:
         ModernButton(control_frame, "Обновить", self._refresh_processes, 
                     width=100, height=32).pack(side=tk.LEFT, padx=5)
         
+        ModernButton(control_frame, "Дерево", self._toggle_tree_mode,
+                    width=100, height=32).pack(side=tk.LEFT, padx=5)
+        
+        self.group_button = ModernButton(control_frame, "Группы", self._cycle_grouping,
+                                         width=100, height=32)
+        self.group_button.pack(side=tk.LEFT, padx=5)
+        
+        ModernButton(control_frame, "Сеть/диски", self._toggle_io_panel,
+                    width=100, height=32).pack(side=tk.LEFT, padx=5)
+        
+        ModernButton(control_frame, "USS/PSS", self._toggle_memory_columns,
+                    width=100, height=32).pack(side=tk.LEFT, padx=5)
+        
         ModernButton(control_frame, "Завершить", self._kill_selected_process,
                     width=100, height=32, accent_color=COLOR_SCHEME["warning_red"]).pack(side=tk.LEFT, padx=5)
     
@@ -235,6 +382,18 @@ class MainWindow:
         self.cpu_label = tk.Label(cpu_info, text="0%", fg=COLOR_SCHEME["accent_blue"],
                                  bg=COLOR_SCHEME["bg_darkest"], font=FONT_SCHEME["metric"])
         self.cpu_label.pack(anchor="w")
+        self.cpu_split_label = tk.Label(cpu_info, text="", fg=COLOR_SCHEME["text_dark"],
+                                        bg=COLOR_SCHEME["bg_darkest"], font=FONT_SCHEME["small"])
+        self.cpu_split_label.pack(anchor="w")
+        
+        self.cpu_sparkline = self._create_sparkline(sys_frame, 'cpu', COLOR_SCHEME["accent_blue"])
+        
+        # Загрузка по ядрам: столбики создаются один раз, дальше меняются только их координаты
+        self.cores_canvas = tk.Canvas(sys_frame, height=40, bg=COLOR_SCHEME["bg_darkest"],
+                                      highlightthickness=0)
+        self.cores_canvas.pack(fill=tk.X, padx=10)
+        self.core_bars = []
+        self.core_values = []
         
         # RAM
         ram_frame = tk.Frame(sys_frame, bg=COLOR_SCHEME["bg_darkest"])
@@ -252,6 +411,8 @@ class MainWindow:
                                  bg=COLOR_SCHEME["bg_darkest"], font=FONT_SCHEME["metric"])
         self.ram_label.pack(anchor="w")
         
+        self.ram_sparkline = self._create_sparkline(sys_frame, 'ram', COLOR_SCHEME["warning_red"])
+        
         # Диск
         disk_frame = tk.Frame(sys_frame, bg=COLOR_SCHEME["bg_darkest"])
         disk_frame.pack(fill=tk.X, padx=10, pady=10)
@@ -267,45 +428,42 @@ class MainWindow:
         self.disk_label = tk.Label(disk_info, text="0%", fg=COLOR_SCHEME["success_green"],
                                   bg=COLOR_SCHEME["bg_darkest"], font=FONT_SCHEME["metric"])
         self.disk_label.pack(anchor="w")
+        
+        self.disk_sparkline = self._create_sparkline(sys_frame, 'disk', COLOR_SCHEME["success_green"])
+    
+    def _create_sparkline(self, parent, metric, color):
+        """График истории метрики, заполненный из MetricHistory сборщика"""
+        sparkline = Sparkline(parent, color=color)
+        sparkline.pack(anchor="w", padx=10)
+        history = getattr(self.collector, 'system_monitor', self.system_monitor).history
+        series = history.get(metric)
+        if series is not None:
+            _, values = series.query()
+            sparkline.extend(value for segment in values for value in segment)
+        return sparkline
     
     def _create_process_panel(self, parent):
         """Создает панель списка процессов"""
-        process_frame = tk.Frame(parent, bg=COLOR_SCHEME["bg_darkest"])
-        process_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        
-        # Заголовок таблицы
-        header_frame = tk.Frame(process_frame, bg=COLOR_SCHEME["bg_light"], height=30)
-        header_frame.pack(fill=tk.X)
-        header_frame.pack_propagate(False)
-        
-        columns = [
-            ("PID", 80), ("Процесс", 200), ("CPU%", 80), 
-            ("Память", 100), ("Потоки", 80), ("Пользователь", 150)
-        ]
-        
-        for i, (text, width) in enumerate(columns):
-            label = tk.Label(header_frame, text=text, bg=COLOR_SCHEME["bg_light"],
-                           fg=COLOR_SCHEME["accent_blue"], font=FONT_SCHEME["small"])
-            label.place(x=sum(w for _, w in columns[:i]), y=0, width=width, height=30)
-        
-        # Список процессов (Canvas-based для лучшей производительности)
-        self.process_canvas = tk.Canvas(process_frame, bg=COLOR_SCHEME["bg_darkest"],
-                                      highlightthickness=0)
-        self.scrollbar = tk.Scrollbar(process_frame, orient=tk.VERTICAL,
-                                    command=self.process_canvas.yview)
-        self.process_canvas.configure(yscrollcommand=self.scrollbar.set)
-        
-        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.process_canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        # Виртуализированная таблица: рисуются только видимые строки
+        self.process_table = ProcessTable(parent, PROCESS_COLUMNS, on_select=self._on_process_select,
+                                          on_sort=self._on_sort_column,
+                                          on_activate=self._on_process_activate,
+                                          on_context=self._show_process_menu)
+        self.process_table.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.process_table.set_sort_indicator(self.sorter.column, self.sorter.reverse)
+        self.process_table.canvas.bind("<Delete>", lambda e: self._kill_selected_process())
         
-        # Фрейм для элементов процессов
-        self.process_items_frame = tk.Frame(self.process_canvas, bg=COLOR_SCHEME["bg_darkest"])
-        self.canvas_window = self.process_canvas.create_window((0, 0), 
-                                                             window=self.process_items_frame, 
-                                                             anchor="nw")
-        
-        self.process_canvas.bind("<Configure>", self._on_canvas_configure)
-        self.process_items_frame.bind("<Configure>", self._on_frame_configure)
+        # Ctrl/Shift+клик выделяет несколько строк, действия применяются ко всем сразу
+        self.process_menu = tk.Menu(self.master, tearoff=0, bg=COLOR_SCHEME["bg_light"],
+                                    fg=COLOR_SCHEME["text_white"],
+                                    activebackground=COLOR_SCHEME["highlight_light"])
+        for item in PROCESS_ACTIONS:
+            if item is None:
+                self.process_menu.add_separator()
+                continue
+            label, action, value = item
+            self.process_menu.add_command(label=label,
+                                          command=lambda a=action, v=value: self._run_bulk_action(a, v))
         
     def _create_details_panel(self, parent):
         """Создает панель деталей процесса"""
@@ -316,6 +474,7 @@ class MainWindow:
                                      relief="flat", bd=1, height=150)
         details_frame.pack(fill=tk.X, pady=(5, 0))
         details_frame.pack_propagate(False)
+        self.details_frame = details_frame
         
         self.details_text = tk.Text(details_frame, bg=COLOR_SCHEME["bg_light"],
                                    fg=COLOR_SCHEME["text_white"], font=FONT_SCHEME["monospace"],
@@ -326,150 +485,637 @@ class MainWindow:
         
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         self.details_text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        
+        # Заголовки разделов раскрываются кликом
+        self.details_text.tag_configure("section", foreground=COLOR_SCHEME["accent_blue"])
+        self.details_text.tag_bind("section", "<Button-1>", self._on_details_click)
+        self.details_text.tag_bind("section", "<Enter>",
+                                   lambda e: self.details_text.config(cursor="hand2"))
+        self.details_text.tag_bind("section", "<Leave>",
+                                   lambda e: self.details_text.config(cursor=""))
     
-    def _on_canvas_configure(self, event):
-        self.process_canvas.itemconfig(self.canvas_window, width=event.width)
+    def _create_timeline(self, parent):
+        """Создает шкалу перемотки записи"""
+        player = self.collector.player
+        timeline_frame = tk.Frame(parent, bg=COLOR_SCHEME["bg_dark"])
+        timeline_frame.pack(fill=tk.X, pady=(5, 0))
+        
+        self.timeline_label = tk.Label(timeline_frame, fg=COLOR_SCHEME["accent_blue"],
+                                      bg=COLOR_SCHEME["bg_dark"], font=FONT_SCHEME["monospace"],
+                                      width=20)
+        self.timeline_label.pack(side=tk.LEFT, padx=10)
+        
+        self.timeline = tk.Scale(timeline_frame, orient=tk.HORIZONTAL, showvalue=False,
+                                from_=player.start_time, to=player.end_time, resolution=1,
+                                bg=COLOR_SCHEME["bg_dark"], troughcolor=COLOR_SCHEME["bg_light"],
+                                highlightthickness=0, command=self._on_timeline_moved)
+        self.timeline.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=10, pady=5)
+        self._show_timeline_position(player.start_time)
+    
+    def _show_timeline_position(self, timestamp):
+        self.timeline_label.config(text=datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S"))
+    
+    def _on_timeline_moved(self, value):
+        # Перемотка с дебаунсингом: при перетаскивании декодируется только последняя позиция
+        self._show_timeline_position(float(value))
+        if self.seek_job is not None:
+            self.master.after_cancel(self.seek_job)
+        self.seek_job = self.master.after(50, self._seek_recording)
+    
+    def _seek_recording(self):
+        self.seek_job = None
+        self.collector.seek(float(self.timeline.get()))
     
-    def _on_frame_configure(self, event):
-        self.process_canvas.configure(scrollregion=self.process_canvas.bbox("all"))
+    def _toggle_profile_overlay(self, event=None):
+        """F12: оверлей с p50/p95/p99 стадий обновления и потреблением самого GHHS"""
+        if self.profile_overlay is not None:
+            self.profile_overlay.destroy()
+            self.profile_overlay = None
+            return
+        self.profile_overlay = tk.Label(self.master, justify=tk.LEFT, anchor="nw",
+                                       bg=COLOR_SCHEME["bg_dark"], fg=COLOR_SCHEME["success_green"],
+                                       font=FONT_SCHEME["monospace"], padx=10, pady=8,
+                                       relief="solid", bd=1)
+        self.profile_overlay.place(relx=1.0, x=-20, y=80, anchor="ne")
+        self._update_profile_overlay()
+    
+    def _update_profile_overlay(self):
+        if self.profile_overlay is None:
+            return
+        self._render_profile_overlay()
+        self.master.after(1000, self._update_profile_overlay)
+    
+    def _render_profile_overlay(self):
+        text = "Профиль, мс (F12 - скрыть, Ctrl+F12 - сохранить)\n" + PROFILER.format()
+        if self.scheduler is not None:
+            text += "\n" + self.scheduler.describe()
+        if self.profile_status:
+            text += "\n" + self.profile_status
+        self.profile_overlay.config(text=text)
+    
+    def _dump_profile(self, event=None):
+        """Ctrl+F12: сохраняет замеры в JSON в текущий каталог, при отказе - в каталог кеша.
+
+        У оконного приложения (pythonw, перезапуск с повышением прав) нет консоли,
+        поэтому результат показывается в оверлее профиля.
+        """
+        name = f"ghhs-profile-{datetime.now():%Y%m%d-%H%M%S}.json"
+        errors = []
+        for directory in (os.curdir, os.path.dirname(default_cache_path())):
+            try:
+                os.makedirs(directory, exist_ok=True)
+                path = PROFILER.dump(os.path.join(directory, name))
+            except OSError as e:
+                errors.append(f"{os.path.abspath(directory)}: {e.strerror or e}")
+                continue
+            self.profile_status = f"Сохранено: {os.path.abspath(path)}"
+            break
+        else:
+            self.profile_status = "Не удалось сохранить профиль: " + "; ".join(errors)
+        if self.profile_overlay is None:
+            self._toggle_profile_overlay()
+        else:
+            self._render_profile_overlay()
+    
+    def _bind_window_state(self):
+        """Сообщает планировщику о сворачивании, фокусе и действиях пользователя"""
+        if self.scheduler is None:
+            return
+        self.master.bind("<Map>", self._on_window_mapped, add="+")
+        self.master.bind("<Unmap>", self._on_window_mapped, add="+")
+        self.master.bind("<Visibility>", self._on_window_visibility, add="+")
+        for sequence in ("<FocusIn>", "<FocusOut>"):
+            # Фокус переходит между виджетами через FocusOut/FocusIn - проверяем после них
+            self.master.bind(sequence, lambda event: self.master.after_idle(self._on_focus_changed),
+                             add="+")
+        for sequence in ("<Motion>", "<KeyPress>", "<ButtonPress>", "<MouseWheel>"):
+            self.master.bind(sequence, self._on_user_activity, add="+")
+    
+    def _set_window_state(self, **state):
+        if self.scheduler.set_window(**state):
+            self.collector.reschedule()
+    
+    def _on_window_mapped(self, event):
+        # Map/Unmap приходят и от дочерних виджетов через тег toplevel
+        if event.widget is self.master:
+            self._set_window_state(visible=str(event.type) == 'Map')
+    
+    def _on_window_visibility(self, event):
+        if event.widget is self.master:
+            self._set_window_state(visible=event.state != 'VisibilityFullyObscured')
+    
+    def _on_focus_changed(self):
+        try:
+            focused = self.master.focus_get() is not None
+        except KeyError:
+            focused = True  # Фокус во всплывающем окне Tk
+        self._set_window_state(focused=focused)
+    
+    def _on_user_activity(self, event):
+        if self.scheduler.touch():
+            self.collector.reschedule()
+    
+    def _show_cached_frame(self):
+        """Показывает сохраненный при прошлом закрытии снимок, пока идет первый живой проход"""
+        cached = load_last_frame(self.last_frame)
+        if cached is None:
+            return
+        timestamp, system, processes = cached
+        self.showing_cached = True
+        self.processes = processes
+        self.snapshot = ProcessSnapshot.from_processes(processes)
+        self._apply_system_metrics(system)
+        self._apply_process_delta(diff_snapshots({}, processes))
+        saved = datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')
+        self.master.title(f"GHHS Process Hacker - снимок {saved}, обновление...")
+        self.startup.mark('cached_frame')
     
     def _start_updates(self):
-        """Запускает обновление данных"""
+        """Запускает фоновый сбор данных и опрос его результатов"""
+        self.startup.mark('window')
+        self.collector.start()
         self._update_data()
     
     def _update_data(self):
-        """Обновляет данные (вызывается периодически)"""
+        """Забирает последний снимок сборщика (вызывается периодически)"""
         if not self.running:
             return
             
         try:
-            # Системная информация
-            cpu_usage = self.system_monitor.get_cpu_usage()
-            ram_usage = self.system_monitor.get_ram_usage()
-            disk_usage = self.system_monitor.get_disk_usage()
-            
-            self.cpu_progress.set_value(cpu_usage)
-            self.ram_progress.set_value(ram_usage)
-            self.disk_progress.set_value(disk_usage)
-            
-            self.cpu_label.config(text=f"{cpu_usage}%")
-            self.ram_label.config(text=f"{ram_usage}%")
-            self.disk_label.config(text=f"{disk_usage}%")
-            
-            # Процессы (обновляем реже для производительности)
-            current_time = time.time()
-            if current_time - self.last_update > 2.0:  # Раз в 2 секунды
-                self._refresh_processes()
-                self.last_update = current_time
-                
+            sample = self.collector.queue.get()
+            if sample is not None:
+                self._apply_system_metrics(sample.system)
+                if sample.delta is not None:
+                    delta = sample.delta
+                    if self.showing_cached:
+                        # Первая дельта сборщика - от пустого поколения; таблица же показывает снимок
+                        delta = diff_snapshots(self.processes, sample.processes, delta.generation)
+                        self.showing_cached = False
+                        self.master.title("GHHS Process Hacker")
+                    self.processes = sample.processes
+                    self.snapshot = sample.snapshot
+                    self._apply_process_delta(delta)
+                    self.startup.mark('first_live_data')
+                    if self.memory_columns:
+                        # Следующий проход сборщика замерит видимые строки первыми
+                        self.process_manager.memory.prioritize(self.process_table.visible_keys())
+                # Отрисовка и раскладка Tk сразу, чтобы их стоимость попала в замер
+                with PROFILER.span('layout'):
+                    self.master.update_idletasks()
         except Exception as e:
             print(f"Update error: {e}")
         
-        # Следующее обновление через 500мс
-        self.master.after(500, self._update_data)
+        # Опрос очереди дешевый, поэтому чаще, чем тик сборщика; свернутое окно опрашивает реже
+        poll = self.scheduler.poll_interval() if self.scheduler is not None else 100
+        self.master.after(poll, self._update_data)
+    
+    def _apply_system_metrics(self, system):
+        """Обновляет системные метрики"""
+        self.system = system
+        cpu_usage = system['cpu']
+        ram_usage = system['ram']
+        disk_usage = system['disk']
+        
+        self.cpu_progress.set_value(cpu_usage)
+        self.ram_progress.set_value(ram_usage)
+        self.disk_progress.set_value(disk_usage)
+        
+        self.cpu_sparkline.append(cpu_usage)
+        self.ram_sparkline.append(ram_usage)
+        self.disk_sparkline.append(disk_usage)
+        
+        self._set_label(self.cpu_label, f"{cpu_usage}%")
+        self._set_label(self.ram_label, f"{ram_usage}%")
+        self._set_label(self.disk_label, f"{disk_usage}%")
+        if 'cpu_user' in system:
+            self._set_label(self.cpu_split_label,
+                            f"user {system['cpu_user']}%  sys {system['cpu_system']}%")
+        self._draw_cores(system.get('cpu_cores', ()))
+        if self.io_panel is not None:
+            self._update_io_panel(system)
+    
+    def _set_label(self, label, text):
+        """Меняет текст метки, только если он изменился: config - круговой вызов в Tcl"""
+        if self.label_texts.get(label) != text:
+            self.label_texts[label] = text
+            label.config(text=text)
+    
+    def _draw_cores(self, cores):
+        """Столбики загрузки каждого логического ядра"""
+        canvas = self.cores_canvas
+        if len(self.core_bars) != len(cores):
+            canvas.delete("all")
+            self.core_bars = [canvas.create_rectangle(0, 0, 0, 0, outline="",
+                                                      fill=COLOR_SCHEME["accent_blue"])
+                              for _ in cores]
+            self.core_values = [None] * len(cores)
+        if not cores:
+            return
+        width = max(canvas.winfo_width(), 1)
+        height = int(canvas.cget("height"))
+        step = width / len(cores)
+        for i, (bar, value) in enumerate(zip(self.core_bars, cores)):
+            # Столбик перерисовывается при смене значения или ширины холста
+            if self.core_values[i] == (value, width):
+                continue
+            self.core_values[i] = (value, width)
+            top = height - height * min(value, 100) / 100
+            color = COLOR_SCHEME["warning_red"] if value >= 90 else COLOR_SCHEME["accent_blue"]
+            canvas.coords(bar, i * step + 1, top, (i + 1) * step - 1, height)
+            canvas.itemconfig(bar, fill=color)
     
     def _refresh_processes(self):
-        """Обновляет список процессов (оптимизированно)"""
-        search_term = self.search_var.get().lower()
-        
-        # Очищаем старые элементы
-        for widget in self.process_items_frame.winfo_children():
-            widget.destroy()
-        
-        # Получаем процессы
-        processes = self.process_manager.get_processes_fast()
-        displayed_count = 0
-        
-        for i, proc in enumerate(processes):
-            if displayed_count >= 1000:  # Лимит для производительности
-                break
-                
-            if not search_term or search_term in proc['name'].lower():
-                self._create_process_row(i, proc)
-                displayed_count += 1
-        
-        # Обновляем скролл регион
-        self.process_items_frame.update_idletasks()
-        self.process_canvas.configure(scrollregion=self.process_canvas.bbox("all"))
-    
-    def _create_process_row(self, index, proc):
-        """Создает строку процесса"""
-        row_frame = tk.Frame(self.process_items_frame, 
-                           bg=COLOR_SCHEME["bg_light"] if index % 2 == 0 else COLOR_SCHEME["bg_medium"],
-                           height=25)
-        row_frame.pack(fill=tk.X)
-        row_frame.pack_propagate(False)
-        
-        # Привязываем события
-        row_frame.bind("<Enter>", lambda e, f=row_frame: self._on_row_enter(f))
-        row_frame.bind("<Leave>", lambda e, f=row_frame: self._on_row_leave(f, index))
-        row_frame.bind("<Button-1>", lambda e, p=proc: self._on_process_select(p))
-        
-        # Колонки
-        columns = [
-            (proc['pid'], 80),
-            (proc['name'], 200),
-            (f"{proc['cpu']:.1f}%", 80),
-            (f"{proc['memory']:.1f} MB", 100),
-            (proc['threads'], 80),
-            (proc['user'][:15], 150)
-        ]
-        
-        for i, (text, width) in enumerate(columns):
-            label = tk.Label(row_frame, text=text, 
-                           bg=row_frame.cget('bg'),
-                           fg=COLOR_SCHEME["text_white"], 
-                           font=FONT_SCHEME["small"],
-                           anchor="w")
-            label.place(x=sum(w for _, w in columns[:i]), y=0, width=width, height=25)
-            label.bind("<Button-1>", lambda e, p=proc: self._on_process_select(p))
-    
-    def _on_row_enter(self, row):
-        row.config(bg=COLOR_SCHEME["highlight_light"])
-        for child in row.winfo_children():
-            child.config(bg=COLOR_SCHEME["highlight_light"])
-    
-    def _on_row_leave(self, row, index):
-        bg_color = COLOR_SCHEME["bg_light"] if index % 2 == 0 else COLOR_SCHEME["bg_medium"]
-        row.config(bg=bg_color)
-        for child in row.winfo_children():
-            child.config(bg=bg_color)
+        """Просит сборщик обновить список процессов вне очереди"""
+        self.collector.request_refresh()
+    
+    def _apply_process_delta(self, delta):
+        """Применяет новый снимок: обновляет индекс поиска и таблицу"""
+        self.search.apply_delta(delta)
+        self.sorter.apply(delta)
+        self.tree.apply(delta)
+        for groups in self.groups.values():
+            groups.apply(delta)
+        if self.cgroup_pending and any('cgroup' in proc for proc in self.processes.values()):
+            # Первый снимок с метками cgroup: дальше группы ведутся по дельтам
+            self.cgroup_pending = False
+            self.groups['cgroup'] = ProcessGroups(*CGROUP_GROUPING)
+            self.groups['cgroup'].rebuild(self.processes)
+        self.collapsed.difference_update(delta.removed)
+        self.process_table.discard_keys(delta.removed)
+        self.details.forget(delta.removed)
+        if self.alerts is not None:
+            self.process_table.alerted_keys = self.alerts.active
+        self._render_processes()
+    
+    def _render_processes(self):
+        """Фильтрует и сортирует текущий снимок в памяти, без нового сбора"""
+        snapshot = self.snapshot
+        try:
+            with PROFILER.span('filter'):
+                indices = self.search.filter(self.search_var.get(), snapshot)
+            self.search_entry.config(fg=COLOR_SCHEME["text_white"])
+        except QueryError:
+            # Недописанный запрос: подсвечиваем и оставляем прежний результат
+            self.search_entry.config(fg=COLOR_SCHEME["warning_red"])
+            return
+        
+        # Таблица получает представление по индексам и собирает записи только для видимых строк
+        if self.group_by is not None:
+            with PROFILER.span('sort'):
+                groups = self.groups.get(self.group_by)
+                if groups is None:
+                    groups = ProcessGroups(*CGROUP_GROUPING)  # Метки cgroup еще не пришли
+                if indices is not None:
+                    # Суммы по отфильтрованным процессам - из уже посчитанных меток и значений
+                    groups = groups.subset(snapshot.key(i) for i in indices)
+                rows = groups.rows(*self.group_sort)
+            self.process_table.set_rows(rows)
+            return
+        if self.tree_mode:
+            with PROFILER.span('sort'):
+                include = None
+                if indices is not None:
+                    include = self.tree.with_ancestors(snapshot.key(i) for i in indices)
+                rows = self.tree.flatten(self.collapsed, self.sorter.column, self.sorter.reverse,
+                                         include)
+            self.process_table.set_rows(self.tree.view(snapshot, rows))
+            return
+        with PROFILER.span('sort'):
+            indices = self.sorter.order(snapshot, indices)
+        self.process_table.set_rows(snapshot.view(indices))
+    
+    def _table_columns(self):
+        if self.group_by is not None:
+            return GROUP_COLUMNS
+        columns = TREE_COLUMNS if self.tree_mode else PROCESS_COLUMNS
+        if self.memory_columns:
+            columns = columns + MEMORY_COLUMNS
+        return columns + IO_COLUMNS if self.io_panel is not None else columns
+    
+    def _update_table_columns(self):
+        self.process_table.set_columns(self._table_columns())
+        if self.group_by is not None:
+            self.process_table.set_sort_indicator(*self.group_sort)
+        else:
+            self.process_table.set_sort_indicator(self.sorter.column, self.sorter.reverse)
+        self._render_processes()
+    
+    def _cycle_grouping(self, event=None):
+        """Ctrl+G: без группировки -> по имени -> по пользователю -> по cgroup/контейнеру"""
+        modes = [None, 'name', 'user', 'cgroup']
+        self._set_grouping(modes[(modes.index(self.group_by) + 1) % len(modes)])
+    
+    def _set_grouping(self, mode):
+        """Переключение мгновенное: суммы групп уже посчитаны, сортируются только сами группы"""
+        self.group_by = mode
+        if mode == 'cgroup' and 'cgroup' not in self.groups and not self.cgroup_pending:
+            if hasattr(self.collector, 'seek'):
+                # В записи cgroup нет - все процессы в одной группе '-'
+                self.groups['cgroup'] = ProcessGroups(*CGROUP_GROUPING)
+                self.groups['cgroup'].rebuild(self.processes)
+            else:
+                # Файлы cgroup читает сборщик в своем потоке; до его прохода таблица пуста
+                self.cgroup_pending = True
+                self.process_manager.set_cgroup_labels(True)
+                self.collector.request_refresh()
+        labels = {None: "Группы", 'name': "По имени", 'user': "По польз.", 'cgroup': "По cgroup"}
+        self.group_button.set_text(labels[self.group_by])
+        self.process_table.selected_keys = set()
+        self._update_table_columns()
+    
+    def _toggle_tree_mode(self, event=None):
+        """Ctrl+T: плоский список или дерево процессов с суммами по поддеревьям"""
+        self.tree_mode = not self.tree_mode
+        self._update_table_columns()
+    
+    def _toggle_memory_columns(self, event=None):
+        """Ctrl+M: колонки USS/PSS/swap; замеры идут в фоне в пределах бюджета на тик"""
+        self.memory_columns = not self.memory_columns
+        self.process_manager.set_memory_sampling(self.memory_columns)
+        if self.memory_columns:
+            self.process_manager.memory.prioritize(self.process_table.visible_keys())
+            self.collector.request_refresh()
+        self._update_table_columns()
+    
+    def _toggle_io_panel(self):
+        """Панель дисков, сети и соединений; пока она закрыта, дорогие замеры не выполняются"""
+        if self.io_panel is not None:
+            self.io_panel.destroy()
+            self.io_panel = None
+            self.process_manager.set_io_tracking(False)
+            self._update_table_columns()
+            return
+        self.io_panel = tk.LabelFrame(self.details_frame.master, text="Сеть и диски",
+                                      bg=COLOR_SCHEME["bg_darkest"], fg=COLOR_SCHEME["accent_blue"],
+                                      font=FONT_SCHEME["heading"], relief="flat", bd=1, height=150)
+        self.io_panel.pack(fill=tk.X, pady=(5, 0), after=self.details_frame)
+        self.io_panel.pack_propagate(False)
+        self.io_text = tk.Text(self.io_panel, bg=COLOR_SCHEME["bg_light"], fg=COLOR_SCHEME["text_white"],
+                               font=FONT_SCHEME["monospace"], relief="flat", padx=10, pady=5,
+                               wrap=tk.NONE)
+        self.io_text.pack(fill=tk.BOTH, expand=True)
+        self.io_rendered = None  # Текст панели последней отрисовки
+        self.connections_lines = []
+        # Скорости процессов появятся со следующего прохода сборщика
+        self.process_manager.set_io_tracking(True)
+        self.collector.request_refresh()
+        self._update_table_columns()
+    
+    def _update_io_panel(self, system):
+        lines = []
+        for title, devices, fields in (("Диски", system.get('disks', {}), ('read_bytes', 'write_bytes')),
+                                       ("Сеть", system.get('nics', {}), ('bytes_recv', 'bytes_sent'))):
+            active = [(name, rates) for name, rates in devices.items()
+                      if any(rates[field] for field in fields)]
+            if not active:
+                lines.append(f"{title}: нет активности")
+            for name, rates in active:
+                first, second = fields
+                lines.append(f"{title}: {name:<12} {format_rate(rates[first]):>12} вх."
+                             f" {format_rate(rates[second]):>12} исх.")
+        lines.extend(self.connections_lines)
+        # Text перестраивается только при смене содержимого: без активности оно не меняется тиками
+        text = "\n".join(lines)
+        if text != self.io_rendered:
+            self.io_rendered = text
+            self.io_text.delete(1.0, tk.END)
+            self.io_text.insert(1.0, text)
+        self._request_connections()
+    
+    def _request_connections(self):
+        """Соединения выбранного процесса - в фоне, не чаще TTL кеша IoMonitor"""
+        if self.selected_pid is None or self.connections_job is not None:
+            return
+        self.connections_job = (self.selected_pid, self.io_monitor.connections(self.selected_pid))
+        self._watch_connections()
+    
+    def _watch_connections(self):
+        pid, future = self.connections_job
+        if not future.done():
+            self.master.after(100, self._watch_connections)
+            return
+        self.connections_job = None
+        try:
+            connections = future.result()
+        except Exception as e:
+            self.connections_lines = [f"Соединения PID {pid}: недоступны ({e.__class__.__name__})"]
+            return
+        lines = [f"Соединения PID {pid}: {len(connections)}"]
+        for kind, laddr, raddr, status in connections:
+            local = f"{laddr[0]}:{laddr[1]}" if laddr else "-"
+            remote = f"{raddr[0]}:{raddr[1]}" if raddr else "-"
+            protocol = "tcp" if kind == socket.SOCK_STREAM else "udp"
+            lines.append(f"  {protocol} {local:<28} -> {remote:<28} {status}")
+        self.connections_lines = lines
+    
+    def _on_process_activate(self, proc):
+        """Двойной клик в дереве сворачивает или разворачивает поддерево"""
+        if proc['pid'] is None:
+            self._open_group(proc['group'])
+            return
+        if not self.tree_mode:
+            return
+        key = process_key(proc)
+        if key in self.collapsed:
+            self.collapsed.discard(key)
+        else:
+            self.collapsed.add(key)
+        self._render_processes()
+    
+    def _open_group(self, group):
+        """Двойной клик по группе имени или пользователя: плоский список ее процессов"""
+        if self.group_by not in ('name', 'user') or not group or ' ' in group:
+            return
+        self.search_var.set(f"{self.group_by}:{group}")
+        self._set_grouping(None)
+    
+    def _group_keys(self, keys):
+        """Ключи процессов: выделенные строки групп (None, группа) заменяются их составом"""
+        result = set()
+        groups = self.groups.get(self.group_by)
+        for key in keys:
+            if key[0] is None:
+                if groups is not None:
+                    result |= groups.keys.get(key[1], set())
+            else:
+                result.add(key)
+        return result
+    
+    def _show_group_details(self, record):
+        self.details_proc = None
+        self.details.cancel_pending()
+        self.details_jobs = {}
+        members = sorted((self.processes[key] for key in self._group_keys([process_key(record)])
+                          if key in self.processes), key=lambda proc: proc['cpu'], reverse=True)
+        lines = [f"Группа: {record['group']}   Процессов: {record['count']}",
+                 f"CPU: {record['cpu']:.1f}%   Память: {record['memory']:.1f} MB   "
+                 f"Потоки: {record['threads']}", ""]
+        lines.extend(f"PID {proc['pid']:<8} {proc['name'][:30]:<30} {proc['cpu']:6.1f}% "
+                     f"{proc['memory']:9.1f} MB" for proc in members[:50])
+        if len(members) > 50:
+            lines.append(f"... и еще {len(members) - 50}")
+        self.details_text.delete(1.0, tk.END)
+        self.details_text.insert(1.0, "\n".join(lines))
     
     def _on_process_select(self, proc):
+        if proc['pid'] is None:
+            self._show_group_details(proc)
+            return
         self.selected_pid = proc['pid']
-        self._show_process_details(proc['pid'])
+        self.connections_lines = []
+        self._show_process_details(proc)
+    
+    def _on_sort_column(self, field):
+        """Клик по заголовку: новая колонка сортируется по убыванию, повторный клик меняет направление"""
+        if self.group_by is not None:
+            column, reverse = self.group_sort
+            self.group_sort = (field, not reverse if field == column else True)
+            self.process_table.set_sort_indicator(*self.group_sort)
+            self._render_processes()
+            return
+        reverse = not self.sorter.reverse if field == self.sorter.column else True
+        self.sorter.set_column(field, reverse, self.processes)
+        self.process_table.set_sort_indicator(field, reverse)
+        self._render_processes()
     
     def _on_search_changed(self, event):
-        self.master.after(300, self._refresh_processes)  # Дебаунсинг
+        # Дебаунсинг: отменяем запрос, вытесненный новым нажатием
+        if self.search_job is not None:
+            self.master.after_cancel(self.search_job)
+        self.search_job = self.master.after(150, self._run_search)
     
-    def _show_process_details(self, pid):
-        """Показывает детали процесса"""
-        try:
-            details = self.process_manager.get_process_details_fast(pid)
-            self.details_text.delete(1.0, tk.END)
-            
-            info_text = f"""PID: {details['pid']}
-Имя: {details['name']}
-Пользователь: {details['user']}
-Путь: {details['exe']}
-CPU: {details['cpu']}%
-Память: {details['memory']:.1f} MB
-Потоки: {details['threads']}
-Статус: {details['status']}"""
-            
-            self.details_text.insert(1.0, info_text)
-        except:
-            self.details_text.delete(1.0, tk.END)
-            self.details_text.insert(1.0, "Информация недоступна")
+    def _run_search(self):
+        self.search_job = None
+        self._render_processes()
+    
+    def _show_process_details(self, proc):
+        """Показывает поля из снимка сразу, раскрытые разделы - из кеша или по мере загрузки"""
+        key = process_key(proc)
+        self.details_proc = proc
+        # Быстрый проход по строкам: незапущенные загрузки прошлых процессов не нужны
+        self.details.cancel_pending(keep=key)
+        self.details_jobs = {}
+        for section in self.details_expanded:
+            self._request_details(section)
+        self._render_details()
+    
+    def _request_details(self, section):
+        key = process_key(self.details_proc)
+        if self.details.is_fresh(section, self.details.lookup(key, section)):
+            return
+        self.details_jobs[section] = self.details.fetch(key, section)
+        if self.details_watch is None:
+            self.details_watch = self.master.after(50, self._watch_details)
+    
+    def _watch_details(self):
+        """Опрос загрузок выбранного процесса; результаты прошлых выборов сюда не попадают"""
+        self.details_watch = None
+        done = [section for section, future in self.details_jobs.items() if future.done()]
+        for section in done:
+            del self.details_jobs[section]
+        if done:
+            self._render_details()
+        if self.details_jobs:
+            self.details_watch = self.master.after(50, self._watch_details)
+    
+    def _on_details_click(self, event):
+        index = self.details_text.index(f"@{event.x},{event.y}")
+        for tag in self.details_text.tag_names(index):
+            if tag.startswith("section:"):
+                section = tag.split(":", 1)[1]
+                if section in self.details_expanded:
+                    self.details_expanded.discard(section)
+                else:
+                    self.details_expanded.add(section)
+                    self._request_details(section)
+                self._render_details()
+                return
+    
+    def _render_details(self):
+        proc = self.details_proc
+        text = self.details_text
+        top = text.yview()[0]
+        text.delete(1.0, tk.END)
+        if proc is None:
+            return
+        key = process_key(proc)
+        cpu_norm = self.process_manager.backend.cpu.normalized(proc['cpu'])
+        text.insert(tk.END, f"PID: {proc['pid']}   Имя: {proc['name']}   Пользователь: {proc['user']}\n"
+                            f"CPU: {proc['cpu']}% ядра ({cpu_norm}% всех ядер)   "
+                            f"Память: {proc['memory']:.1f} MB   Потоки: {proc['threads']}   "
+                            f"Статус: {proc['status']}\n")
+        memory = self.process_manager.memory
+        entry = memory.entry(key) if memory is not None else None
+        if entry is not None and entry.uss is not None:
+            age = max(0.0, time.time() - entry.timestamp)
+            text.insert(tk.END, f"USS: {entry.uss:.1f} MB   PSS: {entry.pss:.1f} MB   "
+                                f"Swap: {entry.swap:.1f} MB   (замер {age:.0f} с назад)\n")
+        for section, (title, _, _, _) in SECTIONS.items():
+            expanded = section in self.details_expanded
+            loading = "  загрузка..." if section in self.details_jobs else ""
+            text.insert(tk.END, f"{'▼' if expanded else '▶'} {title}{loading}\n",
+                        ("section", f"section:{section}"))
+            entry = self.details.lookup(key, section)
+            if expanded and entry is not None:
+                text.insert(tk.END, "".join(f"    {line}\n" for line in format_section(section, entry)))
+        text.yview_moveto(top)
     
     def _kill_selected_process(self):
-        if self.selected_pid:
-            if messagebox.askyesno("Подтверждение", f"Завершить процесс {self.selected_pid}?"):
-                try:
-                    self.process_manager.kill_process(self.selected_pid)
-                    self._refresh_processes()
-                except Exception as e:
-                    messagebox.showerror("Ошибка", str(e))
-    
-    def __del__(self):
-        self.running = False
\ No newline at end of file
+        self._run_bulk_action('terminate')
+    
+    def _show_process_menu(self, event):
+        self.process_menu.tk_popup(event.x_root, event.y_root)
+    
+    def _run_bulk_action(self, action, value=None):
+        """Одно действие над всеми выделенными процессами в фоне, один итоговый отчет"""
+        keys = list(self._group_keys(self.process_table.selected_keys))
+        if not keys:
+            return
+        title = CONFIRM_ACTIONS.get(action)
+        if title:
+            names = ", ".join(str(pid) for pid, _ in keys[:5]) + (" ..." if len(keys) > 5 else "")
+            if not messagebox.askyesno("Подтверждение", f"{title}: {len(keys)} процесс(ов)?\nPID: {names}"):
+                return
+        try:
+            future = self.process_manager.bulk_action(action, keys, value)
+        except Exception as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+        self._watch_bulk_action(future)
+    
+    def _watch_bulk_action(self, future):
+        """Опрашивает результат без блокировки главного цикла Tk"""
+        if not self.running:
+            return
+        if not future.done():
+            self.master.after(50, self._watch_bulk_action, future)
+            return
+        self._refresh_processes()
+        try:
+            result = future.result()
+        except Exception as e:
+            messagebox.showerror("Ошибка", str(e))
+            return
+        show = messagebox.showwarning if result.failed else messagebox.showinfo
+        show("Результат", result.summary())
+    
+    def _save_last_frame(self):
+        """Сохраняет живой снимок для первого кадра следующего запуска"""
+        if self.last_frame is None or self.showing_cached or not self.processes:
+            return
+        if hasattr(self.collector, 'seek'):
+            return  # Воспроизведение записи - не текущее состояние системы
+        try:
+            save_last_frame(self.last_frame, time.time(), self.system, self.processes)
+        except OSError as e:
+            print(f"Last frame save error: {e}")
+    
+    def close(self):
+        """Останавливает сбор данных и закрывает окно"""
+        self.running = False
+        self.collector.stop()
+        self._save_last_frame()
+        self.process_manager.close()
+        self.io_monitor.close()
+        self.details.close()
+        self.master.destroy()
\ No newline at end of file
@@ -0,0 +1,365 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from ui.styles import COLOR_SCHEME, FONT_SCHEME
+from core.io_monitor import format_rate
+from core.process_info import process_key
+from core.process_tree import COLLAPSED, EXPANDED
+from core.profiling import PROFILER
+
+# Колонки таблицы процессов: (заголовок, ширина, форматтер, поле сортировки)
+PROCESS_COLUMNS = [
+    ("PID", 80, lambda p: str(p['pid']), 'pid'),
+    ("Процесс", 200, lambda p: p['name'], 'name'),
+    ("CPU%", 80, lambda p: f"{p['cpu']:.1f}%", 'cpu'),
+    ("Память", 100, lambda p: f"{p['memory']:.1f} MB", 'memory'),
+    ("Потоки", 80, lambda p: str(p['threads']), 'threads'),
+    ("Пользователь", 150, lambda p: p['user'][:15], 'user')
+]
+
+# Колонки скоростей ввода-вывода: добавляются, пока открыта панель "Сеть и диски"
+IO_COLUMNS = [
+    ("Чтение", 90, lambda p: format_rate(p['io_read']), 'io_read'),
+    ("Запись", 90, lambda p: format_rate(p['io_write']), 'io_write'),
+]
+
+# Точная память (MemorySampler): 0 - процесс еще не замерен или недоступен
+MEMORY_COLUMNS = [
+    ("USS", 90, lambda p: f"{p['uss']:.1f} MB" if p['uss'] else "-", 'uss'),
+    ("PSS", 90, lambda p: f"{p['pss']:.1f} MB" if p['pss'] else "-", 'pss'),
+    ("Swap", 80, lambda p: f"{p['swap']:.1f} MB" if p['swap'] else "-", 'swap'),
+]
+
+# Колонки режима групп: строки - GroupView с суммами по группе
+GROUP_COLUMNS = [
+    ("Группа", 280, lambda p: p['group'], 'group'),
+    ("Процессов", 100, lambda p: str(p['count']), 'count'),
+    ("Σ CPU%", 90, lambda p: f"{p['cpu']:.1f}%", 'cpu'),
+    ("Σ Память", 110, lambda p: f"{p['memory']:.1f} MB", 'memory'),
+    ("Σ Потоки", 90, lambda p: str(p['threads']), 'threads'),
+]
+
+TREE_MARKERS = {EXPANDED: "▾ ", COLLAPSED: "▸ "}
+
+CELL_PADDING = 4         # Отступ текста от левой и правой границы ячейки
+FIT_CACHE_SIZE = 4096    # Запомненных обрезок (текст, ширина колонки)
+
+# Колонки режима дерева: строки - TreeView с глубиной и суммами по поддереву
+TREE_COLUMNS = [
+    ("PID", 70, lambda p: str(p['pid']), 'pid'),
+    ("Процесс", 280, lambda p: f"{'   ' * p['depth']}{TREE_MARKERS.get(p['state'], '  ')}{p['name']}", 'name'),
+    ("CPU%", 70, lambda p: f"{p['cpu']:.1f}%", 'cpu'),
+    ("Σ CPU%", 80, lambda p: f"{p['tree_cpu']:.1f}%", 'cpu'),
+    ("Память", 90, lambda p: f"{p['memory']:.1f} MB", 'memory'),
+    ("Σ Память", 100, lambda p: f"{p['tree_memory']:.1f} MB", 'memory'),
+    ("Потоки", 70, lambda p: str(p['threads']), 'threads'),
+    ("Пользователь", 150, lambda p: p['user'][:15], 'user')
+]
+
+
+class ProcessTable(tk.Frame):
+    """Виртуализированная таблица: рисуются только видимые строки из пула canvas-элементов"""
+
+    ROW_HEIGHT = 25
+    HEADER_HEIGHT = 30
+
+    def __init__(self, parent, columns, on_select=None, on_sort=None, on_activate=None,
+                 on_context=None, bg=COLOR_SCHEME["bg_darkest"]):
+        super().__init__(parent, bg=bg)
+        self.columns = columns  # [(заголовок, ширина, форматтер proc -> str, поле сортировки)]
+        self.on_select = on_select
+        self.on_sort = on_sort
+        self.on_activate = on_activate  # Двойной клик по строке
+        self.on_context = on_context    # Правый клик: (event) для контекстного меню
+
+        self.rows = []          # Текущий список записей (окно отображения берется из него)
+        self.first = 0          # Индекс первой видимой строки
+        self.selected_key = None     # Текущая строка (детали процесса)
+        self.selected_keys = set()   # Все выделенные строки для групповых действий
+        self._anchor = None          # Начало диапазона для Shift+клик
+        self.alerted_keys = {}       # key -> сработавшие правила оповещений (подсветка)
+        self.hover_slot = None
+        self._slots = []        # Пул строк: {'rect': id, 'texts': [id], 'values': [...], 'bg': ...}
+        self._redraw_pending = False
+        self._font = tkfont.Font(font=FONT_SCHEME["small"])
+        self._fitted = {}       # (текст, ширина колонки) -> текст, обрезанный с многоточием
+
+        self._create_header()
+
+        self.canvas = tk.Canvas(self, bg=bg, highlightthickness=0)
+        self.scrollbar = tk.Scrollbar(self, orient=tk.VERTICAL, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.canvas.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.canvas.bind("<Configure>", self._on_configure)
+        self.canvas.bind("<MouseWheel>", self._on_mousewheel)
+        self.canvas.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.canvas.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.canvas.bind("<Motion>", self._on_motion)
+        self.canvas.bind("<Leave>", self._on_leave)
+        self.canvas.bind("<Button-1>", self._on_click)
+        self.canvas.bind("<Control-Button-1>", self._on_ctrl_click)
+        self.canvas.bind("<Shift-Button-1>", self._on_shift_click)
+        self.canvas.bind("<Double-Button-1>", self._on_double_click)
+        self.canvas.bind("<Button-3>", self._on_right_click)
+
+    def _create_header(self):
+        self.header_frame = tk.Frame(self, bg=COLOR_SCHEME["bg_light"], height=self.HEADER_HEIGHT)
+        self.header_frame.pack(side=tk.TOP, fill=tk.X)
+        self.header_frame.pack_propagate(False)
+        self._create_header_labels()
+
+    def _create_header_labels(self):
+        self.header_labels = []
+        x = 0
+        for text, width, _, field in self.columns:
+            label = tk.Label(self.header_frame, text=text, bg=COLOR_SCHEME["bg_light"],
+                           fg=COLOR_SCHEME["accent_blue"], font=FONT_SCHEME["small"],
+                           cursor="hand2")
+            label.place(x=x, y=0, width=width, height=self.HEADER_HEIGHT)
+            label.bind("<Button-1>", lambda e, f=field: self.on_sort and self.on_sort(f))
+            self.header_labels.append(label)
+            x += width
+
+    def set_sort_indicator(self, field, reverse):
+        """Стрелка направления сортировки в заголовке активной колонки"""
+        for label, (text, _, _, column_field) in zip(self.header_labels, self.columns):
+            if column_field == field:
+                text = f"{text} {'▼' if reverse else '▲'}"
+            label.config(text=text)
+
+    def set_columns(self, columns):
+        """Меняет набор колонок: заголовки и пул строк создаются заново"""
+        self.columns = columns
+        for label in self.header_labels:
+            label.destroy()
+        self._create_header_labels()
+        count = len(self._slots)
+        self._ensure_pool(0)
+        self._ensure_pool(count)
+        self._layout_slots(self.canvas.winfo_width())
+        self.schedule_redraw()
+
+    # --- Данные ---
+
+    def set_rows(self, rows):
+        """Подменяет список строк; перерисовка откладывается до idle"""
+        self.rows = rows
+        self.first = max(0, min(self.first, len(rows) - self.visible_count()))
+        self.schedule_redraw()
+
+    def row_at(self, slot):
+        index = self.first + slot
+        return self.rows[index] if 0 <= index < len(self.rows) else None
+
+    def visible_count(self):
+        return len(self._slots)
+
+    def visible_keys(self):
+        """Ключи строк, которые сейчас на экране"""
+        if not self.rows:
+            return []
+        last = min(self.first + self.visible_count(), len(self.rows))
+        return [self.rows.key(position) for position in range(self.first, last)]
+
+    def discard_keys(self, keys):
+        """Снимает выделение с завершившихся процессов"""
+        if self.selected_keys:
+            self.selected_keys.difference_update(keys)
+        if self.selected_key in keys:
+            self.selected_key = None
+
+    # --- Отрисовка ---
+
+    def schedule_redraw(self):
+        if not self._redraw_pending:
+            self._redraw_pending = True
+            self.after_idle(self.redraw)
+
+    def _ensure_pool(self, count):
+        """Подгоняет пул canvas-элементов под высоту окна"""
+        while len(self._slots) < count:
+            y = len(self._slots) * self.ROW_HEIGHT
+            rect = self.canvas.create_rectangle(0, y, 0, y + self.ROW_HEIGHT, outline="",
+                                                fill=COLOR_SCHEME["bg_darkest"])
+            texts = []
+            x = 0
+            for _, width, _, _ in self.columns:
+                texts.append(self.canvas.create_text(x + CELL_PADDING, y + self.ROW_HEIGHT // 2, anchor="w",
+                                                     text="", fill=COLOR_SCHEME["text_white"],
+                                                     font=FONT_SCHEME["small"]))
+                x += width
+            self._slots.append({'rect': rect, 'texts': texts,
+                                'values': [None] * len(texts), 'bg': None})
+        while len(self._slots) > count:
+            slot = self._slots.pop()
+            self.canvas.delete(slot['rect'], *slot['texts'])
+
+    def _fit(self, text, width):
+        """Обрезает текст с многоточием по ширине колонки: canvas сам текст не обрезает"""
+        cache_key = (text, width)
+        fitted = self._fitted.get(cache_key)
+        if fitted is not None:
+            return fitted
+        available = width - 2 * CELL_PADDING
+        measure = self._font.measure
+        if not text or measure(text) <= available:
+            fitted = text
+        else:
+            # Самый длинный префикс, который вместе с многоточием помещается в колонку
+            low, high = 0, len(text)
+            while low < high:
+                middle = (low + high + 1) // 2
+                if measure(text[:middle] + "…") <= available:
+                    low = middle
+                else:
+                    high = middle - 1
+            fitted = text[:low].rstrip() + "…"
+        if len(self._fitted) >= FIT_CACHE_SIZE:
+            self._fitted.clear()
+        self._fitted[cache_key] = fitted
+        return fitted
+
+    def _slot_bg(self, slot_index, proc):
+        if proc is None:
+            return COLOR_SCHEME["bg_darkest"]
+        if self.selected_keys and process_key(proc) in self.selected_keys:
+            return COLOR_SCHEME["highlight"]
+        if self.alerted_keys and process_key(proc) in self.alerted_keys:
+            return COLOR_SCHEME["alert"]
+        if slot_index == self.hover_slot:
+            return COLOR_SCHEME["highlight_light"]
+        return COLOR_SCHEME["bg_light"] if (self.first + slot_index) % 2 == 0 else COLOR_SCHEME["bg_medium"]
+
+    def redraw(self):
+        """Обновляет текст видимых ячеек на месте, только если он изменился"""
+        self._redraw_pending = False
+        with PROFILER.span('render'):
+            self._redraw()
+
+    def _redraw(self):
+        for slot_index, slot in enumerate(self._slots):
+            proc = self.row_at(slot_index)
+            bg = self._slot_bg(slot_index, proc)
+            if slot['bg'] != bg:
+                self.canvas.itemconfig(slot['rect'], fill=bg)
+                slot['bg'] = bg
+            values = slot['values']
+            for i, (_, width, formatter, _) in enumerate(self.columns):
+                text = formatter(proc) if proc is not None else ""
+                if values[i] != text:
+                    self.canvas.itemconfig(slot['texts'][i], text=self._fit(text, width))
+                    values[i] = text
+        self._update_scrollbar()
+
+    def _update_scrollbar(self):
+        total = len(self.rows)
+        if total <= self.visible_count() or total == 0:
+            self.scrollbar.set(0.0, 1.0)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.visible_count()) / total)
+
+    # --- Прокрутка ---
+
+    def scroll_to(self, first):
+        first = max(0, min(first, len(self.rows) - self.visible_count()))
+        if first != self.first:
+            self.first = first
+            self.schedule_redraw()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first + rows)
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == tk.MOVETO:
+            self.scroll_to(int(float(value) * len(self.rows)))
+        elif action == tk.SCROLL:
+            step = self.visible_count() if unit == tk.PAGES else 1
+            self.scroll_by(int(value) * step)
+
+    def _on_mousewheel(self, event):
+        self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _layout_slots(self, canvas_width):
+        width = max(sum(column[1] for column in self.columns), canvas_width)
+        for slot_index, slot in enumerate(self._slots):
+            y = slot_index * self.ROW_HEIGHT
+            self.canvas.coords(slot['rect'], 0, y, width, y + self.ROW_HEIGHT)
+
+    def _on_configure(self, event):
+        self._ensure_pool(event.height // self.ROW_HEIGHT + 1)
+        self._layout_slots(event.width)
+        self.scroll_to(self.first)
+        self.schedule_redraw()
+
+    # --- Мышь ---
+
+    def _slot_at(self, y):
+        slot = int(self.canvas.canvasy(y)) // self.ROW_HEIGHT
+        return slot if 0 <= slot < len(self._slots) else None
+
+    def _on_motion(self, event):
+        slot = self._slot_at(event.y)
+        if slot != self.hover_slot:
+            self.hover_slot = slot
+            self.schedule_redraw()
+
+    def _on_leave(self, event):
+        self.hover_slot = None
+        self.schedule_redraw()
+
+    def _position_at(self, y):
+        slot = self._slot_at(y)
+        if slot is None or self.first + slot >= len(self.rows):
+            return None
+        return self.first + slot
+
+    def _on_click(self, event):
+        self.canvas.focus_set()  # Для клавиш таблицы (Delete)
+        position = self._position_at(event.y)
+        if position is None:
+            return
+        proc = self.rows[position]
+        self.selected_key = process_key(proc)
+        self.selected_keys = {self.selected_key}
+        self._anchor = position
+        self.schedule_redraw()
+        if self.on_select:
+            self.on_select(proc)
+
+    def _on_ctrl_click(self, event):
+        position = self._position_at(event.y)
+        if position is None:
+            return
+        key = self.rows.key(position)
+        if key in self.selected_keys:
+            self.selected_keys.discard(key)
+        else:
+            self.selected_keys.add(key)
+        self._anchor = position
+        self.schedule_redraw()
+
+    def _on_shift_click(self, event):
+        position = self._position_at(event.y)
+        if position is None:
+            return
+        anchor = self._anchor if self._anchor is not None else position
+        low, high = min(anchor, position), max(anchor, position)
+        # Ключи берутся из представления без сборки записей - диапазон может быть большим
+        self.selected_keys = {self.rows.key(i) for i in range(low, high + 1)}
+        self.schedule_redraw()
+
+    def _on_right_click(self, event):
+        position = self._position_at(event.y)
+        if position is None:
+            return
+        key = self.rows.key(position)
+        if key not in self.selected_keys:
+            self._on_click(event)
+        if self.on_context:
+            self.on_context(event)
+
+    def _on_double_click(self, event):
+        slot = self._slot_at(event.y)
+        proc = self.row_at(slot) if slot is not None else None
+        if proc is not None and self.on_activate:
+            self.on_activate(proc)
@@ -27,6 +27,7 @@ COLOR_SCHEME = {
     "success_green": "#44ff44",
     "highlight": "#00394d",
     "highlight_light": "#005580",
+    "alert": "#4d1414",
     
     # Границы
     "border_dark": "#333333",